@@ -1,10 +1,15 @@
 """
 PDF extraction endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Request
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Request, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
+from typing import Optional, List, Tuple
+import asyncio
 import uuid
+import json
+import zipfile
+from pathlib import Path
 import aiofiles
 from loguru import logger
 from slowapi import Limiter
@@ -17,8 +22,41 @@ from app.models.schemas import (
     ModelType,
     ErrorResponse,
 )
+from app.models.pipeline import (
+    JobStatus,
+    JobSubmitResponse,
+    JobStatusResponse,
+    BatchManifest,
+    ExtractionResult,
+    ModelSelection,
+    QueueEntry,
+    QueueStatusResponse,
+)
 from app.services.processor import PDFProcessor
-from app.utils.file_utils import validate_pdf, save_upload_file
+from app.services.jobs import Job, job_queue, QueueFullError
+from app.services.batch import batch_runner, BatchDocument
+from app.services.telemetry import StageTimer
+from app.services.annotations import annotation_renderer, has_page_index, MEDIA_TYPES
+from app.services.result_store import result_store
+from app.services.columnar import negotiate, encode_compact
+from app.services.executors import Admission, ExecutorBusyError, model_executors
+from app.services.memory_budget import MemoryBudgetExceeded, memory_budget
+from app.services.spill import load_spilled, stream_spilled
+from app.services.model_selection import AUTO, select_model
+from app.services.scheduler import (
+    INTERACTIVE,
+    SchedulerBusyError,
+    Ticket,
+    estimate_cost,
+    extraction_scheduler,
+)
+from app.utils.file_utils import (
+    validate_pdf,
+    stream_upload_file,
+    save_zip_member,
+    cleanup_task_files,
+    SavedUpload,
+)
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
@@ -26,54 +64,88 @@ limiter = Limiter(key_func=get_remote_address)
 # Initialize processor
 processor = PDFProcessor()
 
+# How often a running extraction checks whether its client is still there
+DISCONNECT_POLL_INTERVAL = 1.0
+
 
-@router.post("/single", response_model=ExtractionResponse)
+@router.post("/single", response_model=ExtractionResult)
 @limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
 async def extract_single_model(
     request: Request,
     file: UploadFile = File(..., description="PDF file to extract"),
-    model: ModelType = Form(..., description="Model to use for extraction"),
+    model: str = Form(..., description="Model to use for extraction, or 'auto' to choose one for the document"),
     generate_annotations: bool = Form(True, description="Generate visual annotations"),
 ):
     """
     Extract content from PDF using a single model
     
     - **file**: PDF file to process (max 50MB)
-    - **model**: Extraction model to use (docling, mineru, or surya)
+    - **model**: Extraction model to use (docling, mineru, or surya), or
+      `auto` to use the fastest model expected to handle the document
     - **generate_annotations**: Whether to generate annotated images
     
-    Returns extracted markdown content, document elements, and metrics.
+    Returns extracted markdown content, document elements, and metrics;
+    with `auto`, `processing.auto_model` explains the choice.
+    Waits its turn in the extraction scheduler (reported as the `queue`
+    stage). Responds 503 with Retry-After when no slot frees up in time,
+    the model's executor is at capacity or memory stays near the ceiling;
+    work that has not started is cancelled if the client disconnects.
     """
     # Validate file
     try:
         await validate_pdf(file)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    requested = _parse_model(model)
+    
+    await _wait_for_memory()
     
     # Generate task ID
     task_id = str(uuid.uuid4())
     
+    # Save uploaded file
+    timer = StageTimer()
+    with timer.stage("upload"):
+        upload = await _save_upload(file, task_id)
+    
     try:
-        # Save uploaded file
-        file_path = await save_upload_file(file, task_id)
-        
-        # Process PDF
-        logger.info(f"Processing {file.filename} with {model} model")
-        result = await processor.process_pdf(
-            file_path=file_path,
-            model=model,
-            task_id=task_id,
-            generate_annotations=generate_annotations,
+        model, selection = await _choose_model(requested, upload.path, timer)
+        ticket = await _schedule(
+            request, task_id, await asyncio.to_thread(estimate_cost, upload.path)
         )
+        timer.add("queue", ticket.waited)
+        try:
+            # Process PDF
+            with _admit([model]):
+                logger.info(f"Processing {file.filename} with {model} model")
+                result = await _cancel_on_disconnect(
+                    request,
+                    processor.process_pdf(
+                        file_path=upload.path,
+                        model=model,
+                        task_id=task_id,
+                        generate_annotations=generate_annotations,
+                        file_hash=upload.sha256,
+                        timer=timer,
+                    ),
+                )
+        finally:
+            extraction_scheduler.release(ticket)
         
-        return result
+        if selection is not None:
+            result.processing.auto_model = selection
+        return _respond(request, result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing PDF: {str(e)}",
         )
+    finally:
+        result_store.release_upload(task_id)
 
 
 @router.post("/compare", response_model=ComparisonResponse)
@@ -83,6 +155,8 @@ async def extract_compare_models(
     file: UploadFile = File(..., description="PDF file to extract"),
     models: str = Form(..., description="Comma-separated list of models (e.g., 'docling,mineru')"),
     generate_annotations: bool = Form(True, description="Generate visual annotations"),
+    parallel: bool = Form(True, description="Run the models concurrently"),
+    consensus: bool = Form(False, description="Include the consensus element set"),
 ):
     """
     Extract content from PDF using multiple models for comparison
@@ -90,8 +164,17 @@ async def extract_compare_models(
     - **file**: PDF file to process (max 50MB)
     - **models**: Comma-separated model names (2-3 models)
     - **generate_annotations**: Whether to generate annotated images
+    - **parallel**: Run models concurrently (each model is still bounded by
+      the per-model timeout)
+    - **consensus**: Add the elements most models agree on to the comparison
     
-    Returns results from all models with comparison metrics.
+    Returns results from all models with comparison metrics. Models that fail
+    or time out are listed under `failed_models` in the comparison metrics,
+    and those that timed out but are still running under `still_running`;
+    `agreement` reports how well the models' elements match by bbox IoU.
+    Waits its turn in the extraction scheduler, costed per model. Responds
+    503 with Retry-After when no slot frees up in time, any model's
+    executor is at capacity or memory stays near the ceiling.
     """
     # Validate file
     try:
@@ -100,73 +183,496 @@ async def extract_compare_models(
         raise HTTPException(status_code=400, detail=str(e))
     
     # Parse models
+    model_list = _parse_compare_models(models)
+    
+    await _wait_for_memory()
+    
+    # Generate task ID
+    task_id = str(uuid.uuid4())
+    
+    # Save uploaded file
+    upload = await _save_upload(file, task_id)
+    
     try:
-        model_list = [ModelType(m.strip()) for m in models.split(",")]
-        if len(model_list) < 2 or len(model_list) > 3:
-            raise ValueError("Must select 2-3 models for comparison")
+        ticket = await _schedule(
+            request, task_id, await asyncio.to_thread(estimate_cost, upload.path, len(model_list))
+        )
+        try:
+            # Process with all models
+            with _admit(model_list):
+                logger.info(f"Processing {file.filename} with models: {model_list}")
+                comparison = await _cancel_on_disconnect(
+                    request,
+                    _run_comparison(
+                        upload=upload,
+                        model_list=model_list,
+                        task_id=task_id,
+                        generate_annotations=generate_annotations,
+                        parallel=parallel,
+                        consensus=consensus,
+                    ),
+                )
+        finally:
+            extraction_scheduler.release(ticket)
+        return _respond(request, comparison)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in comparison: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing comparison: {str(e)}",
+        )
+    finally:
+        result_store.release_upload(task_id)
+
+
+@router.post("/stream")
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def extract_stream(
+    request: Request,
+    file: UploadFile = File(..., description="PDF file to extract"),
+    model: str = Form(..., description="Model to use for extraction, or 'auto' to choose one for the document"),
+    generate_annotations: bool = Form(True, description="Generate visual annotations"),
+):
+    """
+    Extract content from PDF, streaming results page by page
+    
+    - **file**: PDF file to process (max 50MB)
+    - **model**: Extraction model to use, or `auto`
+    - **generate_annotations**: Whether to generate annotated images
+    
+    Emits one `page` event per page (elements, markdown and annotation URL)
+    followed by a `complete` event with the document metrics (and, with
+    `auto`, the model selection); the model used is in the `X-Model` header. Responds with
+    Server-Sent Events when the client accepts `text/event-stream`, and with
+    newline-delimited JSON otherwise. Holds an extraction scheduler slot
+    while streaming. Responds 503 with Retry-After when no slot frees up in
+    time, the model's executor is at capacity or memory stays near the
+    ceiling.
+    """
+    try:
+        await validate_pdf(file)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    requested = _parse_model(model)
     
-    # Generate task ID
+    await _wait_for_memory()
     task_id = str(uuid.uuid4())
+    upload = await _save_upload(file, task_id)
+    ticket = None
+    try:
+        model, selection = await _choose_model(requested, upload.path)
+        ticket = await _schedule(
+            request, task_id, await asyncio.to_thread(estimate_cost, upload.path)
+        )
+        admission = _admit([model])
+    except BaseException:
+        if ticket is not None:
+            extraction_scheduler.release(ticket)
+        result_store.release_upload(task_id)
+        raise
+    
+    def release() -> None:
+        # Each release is idempotent; runs when the stream ends and again
+        # after the response, which covers a body that never started
+        admission.release()
+        extraction_scheduler.release(ticket)
+        result_store.release_upload(task_id)
+    
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    
+    def encode(event: str, payload: str) -> str:
+        if use_sse:
+            return f"event: {event}\ndata: {payload}\n\n"
+        return payload + "\n"
+    
+    async def event_stream():
+        try:
+            async for event in processor.stream_pages(
+                file_path=upload.path,
+                model=model,
+                task_id=task_id,
+                generate_annotations=generate_annotations,
+            ):
+                if event.event == "complete":
+                    event.auto_model = selection
+                yield encode(event.event, event.model_dump_json())
+        except Exception as e:
+            logger.error(f"Error streaming PDF: {str(e)}", exc_info=True)
+            error = json.dumps({"event": "error", "task_id": task_id, "detail": str(e)})
+            yield encode("error", error)
+        finally:
+            release()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"X-Task-ID": task_id, "X-Model": model.value, "Cache-Control": "no-cache"},
+        background=BackgroundTask(release),
+    )
+
+
+@router.post("/batch", response_model=BatchManifest)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def extract_batch(
+    request: Request,
+    files: List[UploadFile] = File([], description="PDF files to extract"),
+    archive: Optional[UploadFile] = File(None, description="Zip archive of PDF files"),
+    model: str = Form(..., description="Model used for every document by default, or 'auto'"),
+    models: Optional[str] = Form(None, description="Comma-separated model (or 'auto') per uploaded file, overriding the default"),
+    generate_annotations: bool = Form(True, description="Generate visual annotations"),
+):
+    """
+    Extract content from many PDFs in one request
+    
+    - **files**: PDF files to process (each max 50MB)
+    - **archive**: Zip archive whose PDF members are added to the batch
+    - **model**: Default extraction model, or `auto` to choose per document
+    - **models**: Optional per-file models, in the same order as `files`
+    - **generate_annotations**: Whether to generate annotated images
+    
+    Documents are grouped by model and processed with bounded concurrency,
+    queued as bulk work in the extraction scheduler. Returns a manifest with a task ID and metrics (or error) per document;
+    each task's markdown is available from `/markdown/{task_id}`.
+    """
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    default_model = _parse_model(model)
+    file_models = [default_model] * len(files)
+    if models:
+        file_models = [_parse_model(m) for m in models.split(",")]
+        if len(file_models) != len(files):
+            raise HTTPException(
+                status_code=400,
+                detail="Number of models must match number of files",
+            )
+    
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum is {settings.BATCH_MAX_FILES} per batch",
+        )
+    
+    batch_id = str(uuid.uuid4())
+    documents = []
+    admitted = 0
     
     try:
-        # Save uploaded file
-        file_path = await save_upload_file(file, task_id)
+        for upload_file, file_model in zip(files, file_models):
+            document = BatchDocument(
+                task_id=str(uuid.uuid4()),
+                filename=upload_file.filename or "unnamed.pdf",
+                model=file_model,
+            )
+            documents.append(document)
+            try:
+                await validate_pdf(upload_file)
+                document.upload = await stream_upload_file(upload_file, document.task_id)
+            except ValueError as e:
+                document.error = str(e)
+        
+        if archive is not None:
+            documents.extend(await _unpack_archive(archive, batch_id, default_model))
         
-        # Process with all models
-        logger.info(f"Processing {file.filename} with models: {model_list}")
-        results = {}
+        if len(documents) > settings.BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many files. Maximum is {settings.BATCH_MAX_FILES} per batch",
+            )
         
-        for model in model_list:
+        try:
+            batch_runner.admit(len(documents))
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": "30"},
+            )
+        admitted = len(documents)
+        
+        await _choose_batch_models(documents)
+    except BaseException:
+        # Nothing runs, so nothing else would release the saved uploads
+        # or the admitted capacity
+        batch_runner.release(admitted)
+        _release_uploads(documents)
+        raise
+    
+    logger.info(f"Processing batch {batch_id} with {len(documents)} documents")
+    return await batch_runner.run(
+        processor=processor,
+        batch_id=batch_id,
+        documents=documents,
+        generate_annotations=generate_annotations,
+        client=_client(request),
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=BatchManifest)
+async def get_batch_manifest(batch_id: str):
+    """
+    Get the manifest of a finished batch
+    
+    - **batch_id**: Batch ID from the batch extraction response
+    """
+    manifest_path = Path(settings.RESULTS_DIR) / batch_id / "manifest.json"
+    if not manifest_path.exists():
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return BatchManifest.model_validate_json(manifest_path.read_text(encoding="utf-8"))
+
+
+@router.post("/jobs/single", response_model=JobSubmitResponse, status_code=202)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def submit_single_job(
+    request: Request,
+    file: UploadFile = File(..., description="PDF file to extract"),
+    model: str = Form(..., description="Model to use for extraction, or 'auto' to choose one for the document"),
+    generate_annotations: bool = Form(True, description="Generate visual annotations"),
+):
+    """
+    Queue a single-model extraction and return immediately
+    
+    Poll `/jobs/{task_id}` for status and fetch `/jobs/{task_id}/result`
+    once the job has completed. Jobs run as bulk work in the extraction
+    scheduler, behind interactive requests of the same size. With
+    `model=auto` the model is chosen at submission and reported in the
+    job metadata.
+    """
+    try:
+        await validate_pdf(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    requested = _parse_model(model)
+    
+    task_id = str(uuid.uuid4())
+    timer = StageTimer()
+    with timer.stage("upload"):
+        upload = await _save_upload(file, task_id)
+    try:
+        model, selection = await _choose_model(requested, upload.path, timer)
+    except BaseException:
+        result_store.release_upload(task_id)
+        raise
+    
+    async def runner():
+        try:
             result = await processor.process_pdf(
-                file_path=file_path,
+                file_path=upload.path,
                 model=model,
-                task_id=f"{task_id}_{model}",
+                task_id=task_id,
                 generate_annotations=generate_annotations,
+                file_hash=upload.sha256,
+                timer=timer,
             )
-            results[model.value] = result
-        
-        # Calculate comparison metrics
-        comparison_metrics = processor.compare_results(results)
-        
-        return ComparisonResponse(
-            task_id=task_id,
-            results=results,
-            comparison_metrics=comparison_metrics,
+            if selection is not None:
+                result.processing.auto_model = selection
+            return result
+        finally:
+            result_store.release_upload(task_id)
+    
+    metadata = {"filename": file.filename, "model": model.value}
+    if selection is not None:
+        metadata["auto_model"] = selection.model_dump(mode="json")
+    try:
+        return _submit_job(
+            request,
+            task_id,
+            "single",
+            runner,
+            metadata,
+            await asyncio.to_thread(estimate_cost, upload.path),
         )
-        
-    except Exception as e:
-        logger.error(f"Error in comparison: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing comparison: {str(e)}",
+    except BaseException:
+        result_store.release_upload(task_id)
+        raise
+
+
+@router.post("/jobs/compare", response_model=JobSubmitResponse, status_code=202)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def submit_compare_job(
+    request: Request,
+    file: UploadFile = File(..., description="PDF file to extract"),
+    models: str = Form(..., description="Comma-separated list of models (e.g., 'docling,mineru')"),
+    generate_annotations: bool = Form(True, description="Generate visual annotations"),
+    parallel: bool = Form(True, description="Run the models concurrently"),
+    consensus: bool = Form(False, description="Include the consensus element set"),
+):
+    """
+    Queue a multi-model comparison and return immediately
+    
+    Poll `/jobs/{task_id}` for status and fetch `/jobs/{task_id}/result`
+    once the job has completed. Jobs run as bulk work in the extraction
+    scheduler, behind interactive requests of the same size.
+    """
+    try:
+        await validate_pdf(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    model_list = _parse_compare_models(models)
+    task_id = str(uuid.uuid4())
+    upload = await _save_upload(file, task_id)
+    
+    async def runner():
+        try:
+            return await _run_comparison(
+                upload=upload,
+                model_list=model_list,
+                task_id=task_id,
+                generate_annotations=generate_annotations,
+                parallel=parallel,
+                consensus=consensus,
+            )
+        finally:
+            result_store.release_upload(task_id)
+    
+    try:
+        return _submit_job(
+            request,
+            task_id,
+            "compare",
+            runner,
+            {"filename": file.filename, "models": [m.value for m in model_list]},
+            await asyncio.to_thread(estimate_cost, upload.path, len(model_list)),
         )
+    except BaseException:
+        result_store.release_upload(task_id)
+        raise
+
+
+@router.get("/jobs/{task_id}", response_model=JobStatusResponse)
+async def get_job_status(task_id: str):
+    """
+    Get the status of a background extraction job
+    
+    - **task_id**: Task ID returned when the job was submitted
+    
+    While the job is queued, `queue_position` is its place in the
+    extraction queue.
+    """
+    job = job_queue.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobStatusResponse(
+        task_id=job.task_id,
+        kind=job.kind,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        metadata=job.metadata,
+        queue_position=job_queue.position(task_id) if job.status == JobStatus.QUEUED else None,
+    )
+
+
+@router.get("/jobs/{task_id}/result")
+async def get_job_result(request: Request, task_id: str):
+    """
+    Get the result of a completed background extraction job
+    
+    - **task_id**: Task ID returned when the job was submitted
+    
+    Returns the same body as the synchronous endpoint for the job type,
+    including the compact formats when requested through `Accept`. Results
+    can be fetched again until the job expires.
+    """
+    job = job_queue.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+    
+    return _job_response(request, job)
+
+
+@router.get("/queue", response_model=QueueStatusResponse)
+async def get_queue_status(request: Request):
+    """
+    Get the caller's extractions in the extraction scheduler
+    
+    Lists the client's running extractions, then its queued ones with their
+    place in the queue (1 starts next). Clients are identified as for
+    scheduling: by the SCHEDULER_CLIENT_HEADER header when configured,
+    otherwise by remote address.
+    """
+    client = _client(request)
+    entries = []
+    for ticket in extraction_scheduler.client_tickets(client):
+        running = ticket.started_at is not None
+        entries.append(QueueEntry(
+            task_id=ticket.task_id,
+            priority=ticket.priority,
+            cost=ticket.cost,
+            state="running" if running else "queued",
+            position=None if running else extraction_scheduler.position(ticket.task_id),
+            waited=ticket.waited,
+        ))
+    stats = extraction_scheduler.stats()
+    return QueueStatusResponse(
+        client=client,
+        queued=stats["queued"],
+        running=stats["running"],
+        entries=entries,
+    )
 
 
 @router.get("/annotations/{task_id}")
-async def get_annotations(task_id: str, page: int = 1):
+async def get_annotations(
+    task_id: str,
+    page: int = 1,
+    dpi: Optional[int] = Query(None, ge=36, le=settings.ANNOTATION_MAX_DPI, description="Render resolution"),
+    format: Optional[str] = Query(None, pattern="^(png|webp)$", description="Image format (png or webp)"),
+):
     """
     Get annotated image for a specific page
     
     - **task_id**: Task ID from extraction request
     - **page**: Page number (1-indexed)
+    - **dpi**: Render resolution (defaults to ANNOTATION_DPI)
+    - **format**: `png` or `webp` (defaults to ANNOTATION_FORMAT)
     
-    Returns PNG image with bounding box annotations.
+    Returns an image with bounding box annotations. Pages are drawn from the
+    stored elements the first time they are requested and cached after that.
     """
-    annotations_path = f"{settings.RESULTS_DIR}/{task_id}/annotations/page_{page}.png"
+    dpi = dpi or settings.ANNOTATION_DPI
+    image_format = format or settings.ANNOTATION_FORMAT
     
-    try:
+    # Images pre-rendered by the model service (LAZY_ANNOTATIONS off)
+    annotations_path = Path(settings.RESULTS_DIR) / task_id / "annotations" / f"page_{page}.png"
+    if annotations_path.exists() and not has_page_index(task_id):
         return FileResponse(
             annotations_path,
             media_type="image/png",
             filename=f"annotated_page_{page}.png",
         )
+    
+    try:
+        image = await asyncio.to_thread(
+            annotation_renderer.render, task_id, page, dpi, image_format
+        )
     except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="Annotations not found for this task/page",
         )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return Response(
+        content=image,
+        media_type=MEDIA_TYPES[image_format],
+        headers={
+            "Content-Disposition": f'inline; filename="annotated_page_{page}.{image_format}"',
+            "Cache-Control": "private, max-age=3600",
+        },
+    )
 
 
 @router.get("/markdown/{task_id}")
@@ -191,3 +697,319 @@ async def get_markdown(task_id: str):
             status_code=404,
             detail="Markdown file not found for this task",
         )
+
+
+def _parse_compare_models(models: str) -> List[ModelType]:
+    """Parse and validate the comma-separated model list"""
+    try:
+        model_list = [ModelType(m.strip()) for m in models.split(",")]
+        if len(model_list) < 2 or len(model_list) > 3:
+            raise ValueError("Must select 2-3 models for comparison")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return model_list
+
+
+async def _save_upload(file: UploadFile, task_id: str) -> SavedUpload:
+    """Stream the upload to disk, mapping invalid content to 400"""
+    try:
+        return await stream_upload_file(file, task_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _unpack_archive(
+    archive: UploadFile,
+    batch_id: str,
+    model: Optional[ModelType],
+) -> List[BatchDocument]:
+    """Stream a zip upload to disk and extract its PDF members as batch documents"""
+    try:
+        saved = await stream_upload_file(
+            archive,
+            batch_id,
+            max_size=settings.BATCH_MAX_ARCHIVE_SIZE,
+            require_pdf=False,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def unpack() -> List[BatchDocument]:
+        documents = []
+        with zipfile.ZipFile(saved.path) as zf:
+            members = [
+                info for info in zf.infolist()
+                if not info.is_dir()
+                and info.filename.lower().endswith(".pdf")
+                and not info.filename.startswith("__MACOSX/")
+            ]
+            if len(members) > settings.BATCH_MAX_FILES:
+                raise ValueError(
+                    f"Too many files. Maximum is {settings.BATCH_MAX_FILES} per batch"
+                )
+            try:
+                for info in members:
+                    document = BatchDocument(
+                        task_id=str(uuid.uuid4()),
+                        filename=info.filename,
+                        model=model,
+                    )
+                    documents.append(document)
+                    try:
+                        document.upload = save_zip_member(zf, info, document.task_id)
+                    except ValueError as e:
+                        document.error = str(e)
+            except BaseException:
+                _release_uploads(documents)
+                raise
+        return documents
+    
+    try:
+        return await asyncio.to_thread(unpack)
+    except (zipfile.BadZipFile, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+    finally:
+        cleanup_task_files(batch_id)
+
+
+def _release_uploads(documents: List[BatchDocument]) -> None:
+    """Release the saved uploads of batch documents that will not run"""
+    for document in documents:
+        if document.upload is not None:
+            result_store.release_upload(document.task_id)
+            document.upload = None
+
+
+async def _choose_batch_models(documents: List[BatchDocument]) -> None:
+    """Choose a model for each uploaded batch document that asked for auto"""
+    for document in documents:
+        if document.model is not None or document.upload is None:
+            continue
+        try:
+            document.auto_model = await asyncio.to_thread(select_model, document.upload.path)
+            document.model = document.auto_model.model
+        except Exception as e:
+            # Fails the document alone, as a rejected upload would
+            document.error = f"Model selection failed: {str(e)}"
+            document.upload = None
+            result_store.release_upload(document.task_id)
+
+
+async def _run_comparison(
+    upload: SavedUpload,
+    model_list: List[ModelType],
+    task_id: str,
+    generate_annotations: bool,
+    parallel: bool,
+    consensus: bool = False,
+) -> ComparisonResponse:
+    """Run the comparison and build the response, keeping partial results"""
+    results, errors, still_running = await processor.compare_models(
+        file_path=upload.path,
+        models=model_list,
+        task_id=task_id,
+        generate_annotations=generate_annotations,
+        parallel=parallel,
+        file_hash=upload.sha256,
+    )
+    
+    if not results:
+        raise RuntimeError(f"All models failed: {errors}")
+    
+    # Calculate comparison metrics
+    comparison_metrics = processor.compare_results(results, consensus=consensus)
+    comparison_metrics["failed_models"] = errors
+    comparison_metrics["still_running"] = still_running
+    
+    return ComparisonResponse(
+        task_id=task_id,
+        results=results,
+        comparison_metrics=comparison_metrics,
+    )
+
+
+async def _wait_for_memory() -> None:
+    """Hold a request while memory is near the ceiling, mapping a timeout to 503"""
+    try:
+        await memory_budget.wait(memory_budget.queue_timeout)
+    except MemoryBudgetExceeded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _parse_model(model: str) -> Optional[ModelType]:
+    """Model named in a request, or None when it asks for automatic selection"""
+    name = model.strip().lower()
+    if name == AUTO:
+        return None
+    try:
+        return ModelType(name)
+    except ValueError:
+        choices = ", ".join([m.value for m in ModelType] + [AUTO])
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid model: {model}. Choose from {choices}",
+        )
+
+
+async def _choose_model(
+    model: Optional[ModelType],
+    file_path: str,
+    timer: Optional[StageTimer] = None,
+) -> Tuple[ModelType, Optional[ModelSelection]]:
+    """
+    The requested model, or the one chosen for the document when None (auto)
+    
+    Selection time is recorded as the timer's `model_select` stage.
+    """
+    if model is not None:
+        return model, None
+    timer = timer or StageTimer()
+    try:
+        with timer.stage("model_select"):
+            selection = await asyncio.to_thread(select_model, file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Selected {selection.model.value}: {selection.reason}")
+    return selection.model, selection
+
+
+def _client(request: Request) -> str:
+    """Client identifier extraction work is shared out by"""
+    if settings.SCHEDULER_CLIENT_HEADER:
+        client = request.headers.get(settings.SCHEDULER_CLIENT_HEADER)
+        if client:
+            return client
+    return get_remote_address(request)
+
+
+async def _schedule(request: Request, task_id: str, cost: float) -> Ticket:
+    """Wait for an interactive scheduler slot, mapping a timeout to 503"""
+    try:
+        return await extraction_scheduler.acquire(
+            task_id,
+            _client(request),
+            INTERACTIVE,
+            cost,
+            timeout=extraction_scheduler.queue_timeout,
+        )
+    except SchedulerBusyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _admit(models: List[ModelType]) -> Admission:
+    """Reserve executor slots for a request, mapping a full executor to 503"""
+    try:
+        return model_executors.admit(models)
+    except ExecutorBusyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def _cancel_on_disconnect(request: Request, work):
+    """
+    Await an extraction, cancelling it if the client disconnects first
+    
+    Cancellation drops model calls that are still queued on the executors;
+    calls already running finish and their results are discarded.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info("Client disconnected, cancelling extraction")
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _job_response(request: Request, job: Job) -> Response:
+    """Response for a completed job's stored result"""
+    if job.kind != "compare":
+        # A result spilled in memory budget mode only holds the metadata
+        result = ExtractionResult.model_validate_json(job.result)
+        if result.processing.spilled:
+            return _respond(request, result)
+    
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type:
+        model = ComparisonResponse if job.kind == "compare" else ExtractionResult
+        return Response(
+            content=encode_compact(model.model_validate_json(job.result), media_type),
+            media_type=media_type,
+        )
+    return JSONResponse(content=json.loads(job.result))
+
+
+def _respond(request: Request, payload):
+    """
+    Return a response model as JSON, or in a compact format when the client
+    asks for one (columnar JSON or MessagePack) in its Accept header
+    
+    A result spilled to disk in memory budget mode is streamed from its
+    files as JSON; the compact formats read it back in whole.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    spilled = isinstance(payload, ExtractionResult) and payload.processing.spilled
+    if spilled and media_type is None:
+        return StreamingResponse(stream_spilled(payload), media_type="application/json")
+    if spilled:
+        payload = load_spilled(payload)
+    if media_type is None:
+        return payload
+    return Response(content=encode_compact(payload, media_type), media_type=media_type)
+
+
+def _submit_job(
+    request: Request,
+    task_id: str,
+    kind: str,
+    runner,
+    metadata: dict,
+    cost: float,
+) -> JobSubmitResponse:
+    """
+    Queue a job for the requesting client, mapping a full queue to 503
+    
+    The task's upload is released if the job is dropped before its runner
+    starts; the runner releases it otherwise.
+    """
+    try:
+        job = job_queue.submit(
+            task_id,
+            kind,
+            runner,
+            metadata,
+            client=_client(request),
+            cost=cost,
+            discard=lambda: result_store.release_upload(task_id),
+        )
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "30"},
+        )
+    
+    status_url = f"{settings.API_V1_PREFIX}/extract/jobs/{task_id}"
+    return JobSubmitResponse(
+        task_id=task_id,
+        status=job.status,
+        status_url=status_url,
+        result_url=f"{status_url}/result",
+    )
@@ -2,28 +2,27 @@
 Health check endpoints
 """
 from fastapi import APIRouter
-from app.models.schemas import HealthResponse
-import torch
+from app.models.pipeline import DetailedHealthResponse
+from app.services.execution import gpu_visible
+from app.services.registry import model_registry
 
 router = APIRouter()
 
 
-@router.get("/health", response_model=HealthResponse)
+@router.get("/health", response_model=DetailedHealthResponse)
 async def health_check():
     """
     Check API health and model availability
-    """
-    # Check which models are available
-    models_loaded = []
-    
-    try:
-        # These would be actual checks if models are loaded
-        models_loaded = ["docling", "mineru"]  # surya temporarily disabled
-    except Exception:
-        pass
     
-    return HealthResponse(
+    Reports which models are loaded along with their load state and load
+    time. Models load lazily, so a model shows as not_loaded until it is
+    preloaded at startup or first used, and the execution profile is
+    reported once the first model has loaded.
+    """
+    return DetailedHealthResponse(
         status="healthy",
-        models_loaded=models_loaded,
-        gpu_available=torch.cuda.is_available(),
+        models_loaded=model_registry.loaded_models(),
+        gpu_available=gpu_visible(),
+        models_status=model_registry.status(),
+        execution=model_registry.execution_profile(),
     )
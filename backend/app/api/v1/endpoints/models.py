@@ -1,9 +1,10 @@
 """
 Model information endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from typing import List
 from app.models.schemas import ModelInfo, ModelType
+from app.benchmarks.results import load_report, measured_throughput
 
 router = APIRouter()
 
@@ -105,12 +106,40 @@ MODEL_INFO = {
 }
 
 
+def _with_measurements(info: ModelInfo) -> ModelInfo:
+    """Replace the static speed estimate with benchmark results when available"""
+    measured = measured_throughput(info.name)
+    if measured is None:
+        return info
+    
+    return info.model_copy(update={
+        "average_speed": (
+            f"~{measured['seconds_per_page']:.2f} seconds per page "
+            f"({measured['pages_per_sec']:.2f} pages/sec, "
+            f"p95 {measured['page_latency_p95']:.2f}s per page, measured)"
+        ),
+    })
+
+
 @router.get("/", response_model=List[ModelInfo])
 async def list_models():
     """
     Get list of all available extraction models with their capabilities
     """
-    return list(MODEL_INFO.values())
+    return [_with_measurements(info) for info in MODEL_INFO.values()]
+
+
+@router.get("/benchmarks")
+async def get_benchmarks():
+    """
+    Get the latest benchmark report (pages/sec, latency percentiles, peak RSS)
+    
+    Generate it with `python -m app.benchmarks.runner`.
+    """
+    report = load_report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No benchmark report available")
+    return report
 
 
 @router.get("/{model_name}", response_model=ModelInfo)
@@ -118,4 +147,4 @@ async def get_model_info(model_name: ModelType):
     """
     Get detailed information about a specific model
     """
-    return MODEL_INFO[model_name]
+    return _with_measurements(MODEL_INFO[model_name])
@@ -0,0 +1,137 @@
+"""
+Synthetic benchmark corpus
+Generates deterministic PDFs of varying length and layout
+"""
+from pathlib import Path
+from typing import List
+
+PARAGRAPH = (
+    "Document understanding systems convert page images and text layers into "
+    "structured content. This paragraph is repeated to give each page a "
+    "realistic amount of running text for layout analysis and OCR. "
+)
+
+
+def _draw_table(page, top: float, rows: int = 6, cols: int = 4) -> None:
+    """Draw a ruled table with numeric cells"""
+    import fitz
+
+    left, width, row_height = 72, 450, 18
+    col_width = width / cols
+    for row in range(rows + 1):
+        y = top + row * row_height
+        page.draw_line(fitz.Point(left, y), fitz.Point(left + width, y))
+    for col in range(cols + 1):
+        x = left + col * col_width
+        page.draw_line(fitz.Point(x, top), fitz.Point(x, top + rows * row_height))
+    for row in range(rows):
+        for col in range(cols):
+            page.insert_text(
+                (left + col * col_width + 4, top + row * row_height + 13),
+                f"{row * cols + col:.2f}" if row else f"Col {col + 1}",
+                fontsize=9,
+            )
+
+
+def _standard_page(doc, index: int, width: float = 612, height: float = 792):
+    """Add a page of headings, paragraphs and a table or formulas"""
+    import fitz
+
+    page = doc.new_page(width=width, height=height)
+    page.insert_text((72, 72), f"Section {index + 1}", fontsize=18)
+    page.insert_textbox(
+        fitz.Rect(72, 90, 540, 330),
+        PARAGRAPH * 4,
+        fontsize=10,
+    )
+    if index % 2 == 0:
+        _draw_table(page, top=350)
+    else:
+        page.insert_text((72, 370), "E = mc^2,  a^2 + b^2 = c^2", fontsize=12)
+        page.insert_textbox(
+            fitz.Rect(72, 400, 300, 700),
+            PARAGRAPH * 3,
+            fontsize=9,
+        )
+        page.insert_textbox(
+            fitz.Rect(312, 400, 540, 700),
+            PARAGRAPH * 3,
+            fontsize=9,
+        )
+    return page
+
+
+def _small_print_page(doc, index: int) -> None:
+    """Add a dense two-column page of 6pt text"""
+    import fitz
+
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((36, 40), f"Terms and conditions {index + 1}", fontsize=9)
+    for left in (36, 312):
+        page.insert_textbox(fitz.Rect(left, 50, left + 264, 760), PARAGRAPH * 14, fontsize=6)
+
+
+def _slide_page(doc, index: int) -> None:
+    """Add a landscape slide with a few lines of large text"""
+    page = doc.new_page(width=792, height=612)
+    page.insert_text((60, 100), f"Quarterly review {index + 1}", fontsize=40)
+    for line, text in enumerate(("Revenue up 12%", "Two new regions", "Hiring plan on track")):
+        page.insert_text((80, 200 + line * 70), f"- {text}", fontsize=28)
+
+
+def _scanned_page(doc, index: int, dpi: int = 150) -> None:
+    """Add a page that is only a grayscale image of a standard page, as a scanner makes"""
+    import fitz
+
+    with fitz.open() as source:
+        _standard_page(source, index)
+        pixmap = source[0].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    page = doc.new_page(width=612, height=792)
+    page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+
+
+def _large_format_page(doc, index: int) -> None:
+    """Add an A3 page of ordinary body text"""
+    page = _standard_page(doc, index, width=842, height=1191)
+    page.insert_text((72, 760), "Appendix drawing sheet", fontsize=14)
+
+
+MIXED_LAYOUTS = (_standard_page, _small_print_page, _slide_page, _scanned_page, _large_format_page)
+
+
+def generate_pdf(path: Path, num_pages: int, mixed: bool = False) -> Path:
+    """
+    Write a PDF mixing headings, paragraphs, tables and formulas
+
+    Args:
+        path: Output file
+        num_pages: Pages to generate
+        mixed: Cycle through page layouts that want different render
+            resolutions (standard, 6pt small print, slide, 150 DPI scan,
+            A3) instead of only standard pages
+
+    Returns:
+        The output path
+    """
+    import fitz
+
+    doc = fitz.open()
+    for index in range(num_pages):
+        layout = MIXED_LAYOUTS[index % len(MIXED_LAYOUTS)] if mixed else _standard_page
+        layout(doc, index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def build_corpus(directory: Path, page_counts: List[int], mixed: bool = False) -> List[Path]:
+    """Generate one PDF per requested page count (reusing existing files)"""
+    paths = []
+    for num_pages in page_counts:
+        name = f"synthetic_mixed_{num_pages}p.pdf" if mixed else f"synthetic_{num_pages}p.pdf"
+        path = directory / name
+        if not path.exists():
+            generate_pdf(path, num_pages, mixed)
+        paths.append(path)
+    return paths
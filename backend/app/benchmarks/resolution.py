@@ -0,0 +1,157 @@
+"""
+DPI Policy Benchmark
+Compares page rasterisation under the fixed and adaptive DPI policies
+
+Both policies render every page of the same corpus (mixed page layouts by
+default) from scratch, so the figures cover DPI selection plus rendering
+with no cache reuse. Image bytes are what the models receive per page and
+bound the memory inference needs for it.
+
+Usage:
+    python -m app.benchmarks.resolution
+    python -m app.benchmarks.resolution --pages 10 40 --repeats 3 --output dpi.json
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.config import settings
+from app.benchmarks.corpus import build_corpus
+from app.services.raster import render_pages
+from app.services.resolution import POLICIES, page_resolutions
+from app.utils.memory import PeakRSSSampler
+
+
+def benchmark_policy(policy: str, corpus: List[Path], repeats: int) -> Dict[str, Any]:
+    """
+    Select DPIs and render every corpus page under one policy
+
+    Returns:
+        Throughput, image size, peak RSS and the DPIs chosen
+    """
+    select_time = render_time = 0.0
+    pages = image_bytes = 0
+    dpi_pages: Dict[int, int] = {}
+    reasons: Dict[str, int] = {}
+
+    root = Path(tempfile.mkdtemp(prefix="dpi_bench_"))
+    try:
+        with PeakRSSSampler() as sampler:
+            for repeat in range(repeats):
+                for path in corpus:
+                    start = time.perf_counter()
+                    resolutions = page_resolutions(str(path), policy)
+                    select_time += time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    written = render_pages(
+                        str(path),
+                        [r.page for r in resolutions],
+                        [r.dpi for r in resolutions],
+                        [f"{path.stem}_{repeat}_{r.page}" for r in resolutions],
+                        str(root),
+                    )
+                    render_time += time.perf_counter() - start
+                    shutil.rmtree(root, ignore_errors=True)
+
+                    pages += len(resolutions)
+                    image_bytes += sum(size for _, size in written)
+                    for r in resolutions:
+                        dpi_pages[r.dpi] = dpi_pages.get(r.dpi, 0) + 1
+                        reasons[r.reason] = reasons.get(r.reason, 0) + 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    total_time = select_time + render_time
+    return {
+        "pages": pages,
+        "select_time": select_time,
+        "render_time": render_time,
+        "pages_per_sec": pages / total_time if total_time else 0.0,
+        "image_bytes": image_bytes,
+        "image_bytes_per_page": image_bytes / pages if pages else 0.0,
+        "mean_dpi": sum(dpi * n for dpi, n in dpi_pages.items()) / pages if pages else 0.0,
+        "dpi_pages": {str(dpi): n for dpi, n in sorted(dpi_pages.items())},
+        "reasons": reasons,
+        "peak_rss_delta_bytes": sampler.delta_bytes,
+    }
+
+
+def run_benchmark(page_counts: List[int], repeats: int, corpus_dir: Path, mixed: bool) -> Dict[str, Any]:
+    """Benchmark every DPI policy on one corpus and compare adaptive to fixed"""
+    corpus = build_corpus(corpus_dir, page_counts, mixed=mixed)
+    report: Dict[str, Any] = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "corpus": [{"name": path.name, "pages": n} for path, n in zip(corpus, page_counts)],
+        "repeats": repeats,
+        "settings": {
+            "DEFAULT_DPI": settings.DEFAULT_DPI,
+            "ADAPTIVE_DPI_MIN": settings.ADAPTIVE_DPI_MIN,
+            "ADAPTIVE_DPI_MAX": settings.ADAPTIVE_DPI_MAX,
+            "ADAPTIVE_DPI_TEXT_PX": settings.ADAPTIVE_DPI_TEXT_PX,
+            "ADAPTIVE_DPI_MAX_PIXELS": settings.ADAPTIVE_DPI_MAX_PIXELS,
+        },
+        "policies": {},
+    }
+    # Warm up fonts and the temp filesystem so the first policy is not penalised
+    benchmark_policy(POLICIES[0], corpus, 1)
+    for policy in POLICIES:
+        print(f"Rendering corpus with the {policy} DPI policy...")
+        report["policies"][policy] = benchmark_policy(policy, corpus, repeats)
+
+    fixed, adaptive = report["policies"]["fixed"], report["policies"]["adaptive"]
+    report["adaptive_vs_fixed"] = {
+        "throughput_ratio": (
+            adaptive["pages_per_sec"] / fixed["pages_per_sec"] if fixed["pages_per_sec"] else 0.0
+        ),
+        "image_bytes_ratio": (
+            adaptive["image_bytes"] / fixed["image_bytes"] if fixed["image_bytes"] else 0.0
+        ),
+    }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the fixed and adaptive DPI policies")
+    parser.add_argument(
+        "--pages",
+        nargs="+",
+        type=int,
+        default=[10, 40],
+        help="Page counts of the generated corpus documents",
+    )
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per document")
+    parser.add_argument(
+        "--standard-only",
+        action="store_true",
+        help="Use the standard-page corpus of app.benchmarks.runner instead of mixed layouts",
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        default=str(Path(settings.UPLOAD_DIR) / "_benchmark_corpus"),
+        help="Where generated PDFs are written",
+    )
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        page_counts=args.pages,
+        repeats=args.repeats,
+        corpus_dir=Path(args.corpus_dir),
+        mixed=not args.standard_only,
+    )
+    print(json.dumps(report, indent=2))
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Access to the latest benchmark report
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import ModelType
+
+
+_cached_report: Dict[str, Any] = {"mtime": None, "report": None}
+
+
+def load_report() -> Optional[Dict[str, Any]]:
+    """
+    Load the benchmark report written by app.benchmarks.runner
+
+    The file is re-read only when it changes on disk.
+    """
+    path = Path(settings.BENCHMARK_RESULTS_PATH)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+
+    if _cached_report["mtime"] != mtime:
+        try:
+            _cached_report["report"] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read benchmark report {path}: {str(e)}")
+            _cached_report["report"] = None
+        _cached_report["mtime"] = mtime
+
+    return _cached_report["report"]
+
+
+def measured_throughput(
+    model: ModelType,
+    sections: Tuple[str, ...] = ("pipeline", "services"),
+) -> Optional[Dict[str, Any]]:
+    """
+    Measured throughput for a model, preferring end-to-end pipeline numbers
+
+    Args:
+        model: Model to look up
+        sections: Report sections to try, in order ("services" alone gives
+            the raw model time per page)
+
+    Returns:
+        Benchmark summary with pages_per_sec, seconds_per_page, latency
+        percentiles and peak RSS, or None if the model was not measured
+    """
+    report = load_report()
+    if not report:
+        return None
+
+    for section in sections:
+        summary = report.get(section, {}).get(model.value)
+        if summary and summary.get("pages"):
+            return summary
+    return None
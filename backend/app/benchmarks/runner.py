@@ -0,0 +1,269 @@
+"""
+Benchmark Runner
+Measures model services and the processor pipeline on a synthetic corpus
+
+Usage:
+    python -m app.benchmarks.runner --models docling mineru --pages 1 5 20
+    python -m app.benchmarks.runner --models docling --profiles default cpu
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.models.pipeline import ExecutionProfile
+from app.benchmarks.corpus import build_corpus
+from app.services.execution import default_profile, resolve_profile
+from app.services.registry import ModelRegistry, model_registry
+from app.services.sharding import count_pages
+from app.utils.memory import PeakRSSSampler
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarise(latencies: List[float], pages: List[int], peak_rss: int, errors: List[str]) -> Dict[str, Any]:
+    """Aggregate per-document latencies into throughput figures"""
+    total_time = sum(latencies)
+    total_pages = sum(pages)
+    page_latencies = [t / p for t, p in zip(latencies, pages) if p]
+    return {
+        "documents": len(latencies),
+        "pages": total_pages,
+        "total_time": total_time,
+        "pages_per_sec": total_pages / total_time if total_time else 0.0,
+        "seconds_per_page": total_time / total_pages if total_pages else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "page_latency_p50": percentile(page_latencies, 50),
+        "page_latency_p95": percentile(page_latencies, 95),
+        "peak_rss_bytes": peak_rss,
+        "errors": errors,
+    }
+
+
+async def benchmark_service(
+    model: ModelType,
+    corpus: List[Path],
+    repeats: int,
+    registry: ModelRegistry = model_registry,
+) -> Dict[str, Any]:
+    """Time the raw model service on every corpus document"""
+    service = registry.get(model)
+    latencies, pages, errors = [], [], []
+
+    with PeakRSSSampler() as sampler:
+        for _ in range(repeats):
+            for path in corpus:
+                task_id = f"bench_{uuid.uuid4().hex}"
+                start_time = time.perf_counter()
+                try:
+                    await service.extract(
+                        file_path=str(path),
+                        task_id=task_id,
+                        generate_annotations=False,
+                    )
+                except Exception as e:
+                    errors.append(f"{path.name}: {str(e)}")
+                    continue
+                finally:
+                    shutil.rmtree(Path(settings.RESULTS_DIR) / task_id, ignore_errors=True)
+                latencies.append(time.perf_counter() - start_time)
+                pages.append(count_pages(str(path)))
+
+    return summarise(latencies, pages, sampler.peak_bytes, errors)
+
+
+async def benchmark_pipeline(
+    model: ModelType,
+    corpus: List[Path],
+    repeats: int,
+    registry: ModelRegistry = model_registry,
+) -> Dict[str, Any]:
+    """
+    Time PDFProcessor.process_pdf end to end (result cache disabled)
+
+    The text-layer fast path and spilling are turned off so every page goes
+    through the model and the figures stay per-model throughput.
+    """
+    from app.services.processor import PDFProcessor
+
+    processor = PDFProcessor(registry)
+    latencies, pages, errors = [], [], []
+
+    with PeakRSSSampler() as sampler:
+        for _ in range(repeats):
+            for path in corpus:
+                task_id = f"bench_{uuid.uuid4().hex}"
+                start_time = time.perf_counter()
+                try:
+                    await processor.process_pdf(
+                        file_path=str(path),
+                        model=model,
+                        task_id=task_id,
+                        generate_annotations=True,
+                        text_fast_path=False,
+                        spill=False,
+                    )
+                except Exception as e:
+                    errors.append(f"{path.name}: {str(e)}")
+                    continue
+                finally:
+                    shutil.rmtree(Path(settings.RESULTS_DIR) / task_id, ignore_errors=True)
+                latencies.append(time.perf_counter() - start_time)
+                pages.append(count_pages(str(path)))
+
+    return summarise(latencies, pages, sampler.peak_bytes, errors)
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine the benchmark ran on"""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "gpu": None,
+    }
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            info["gpu"] = torch.cuda.get_device_name(0)
+    except ImportError:
+        pass
+    return info
+
+
+def benchmark_profile(name: str) -> ExecutionProfile:
+    """Execution profile for a --profiles name ("default" = library defaults)"""
+    if name == "default":
+        return default_profile()
+    return resolve_profile(name)
+
+
+async def run_benchmarks(
+    models: List[ModelType],
+    page_counts: List[int],
+    repeats: int,
+    corpus_dir: Path,
+    profiles: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the service and pipeline benchmarks for each model
+
+    Each execution profile gets its own registry, so models are loaded (and
+    quantized) afresh per profile. Profiles run one after another in this
+    process; the top-level services/pipeline figures are those of the first.
+    """
+    corpus = build_corpus(corpus_dir, page_counts)
+    profiles = profiles or ["auto"]
+    report: Dict[str, Any] = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment_info(),
+        "corpus": [{"name": path.name, "pages": n} for path, n in zip(corpus, page_counts)],
+        "repeats": repeats,
+        "services": {},
+        "pipeline": {},
+        "profiles": {},
+    }
+
+    cache_enabled = settings.RESULT_CACHE_ENABLED
+    settings.RESULT_CACHE_ENABLED = False
+    try:
+        for name in profiles:
+            profile = benchmark_profile(name)
+            registry = ModelRegistry(profile=profile)
+            section: Dict[str, Any] = {
+                "execution": profile.model_dump(),
+                "services": {},
+                "pipeline": {},
+            }
+            for model in models:
+                print(f"Benchmarking {model.value} service ({profile.name} profile)...")
+                section["services"][model.value] = await benchmark_service(
+                    model, corpus, repeats, registry
+                )
+                print(f"Benchmarking {model.value} pipeline ({profile.name} profile)...")
+                section["pipeline"][model.value] = await benchmark_pipeline(
+                    model, corpus, repeats, registry
+                )
+            report["profiles"][name] = section
+    finally:
+        settings.RESULT_CACHE_ENABLED = cache_enabled
+
+    first = report["profiles"][profiles[0]]
+    report["services"] = first["services"]
+    report["pipeline"] = first["pipeline"]
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction models")
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=settings.SUPPORTED_MODELS,
+        help="Models to benchmark",
+    )
+    parser.add_argument(
+        "--pages",
+        nargs="+",
+        type=int,
+        default=[1, 5, 20],
+        help="Page counts of the generated corpus documents",
+    )
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per document")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=["auto"],
+        choices=["auto", "gpu", "cpu", "default"],
+        help="Execution profiles to compare (default = no thread tuning or quantization)",
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        default=str(Path(settings.UPLOAD_DIR) / "_benchmark_corpus"),
+        help="Where generated PDFs are written",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.BENCHMARK_RESULTS_PATH,
+        help="JSON report path (read by the models endpoint)",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_benchmarks(
+            models=[ModelType(m) for m in args.models],
+            page_counts=args.pages,
+            repeats=args.repeats,
+            corpus_dir=Path(args.corpus_dir),
+            profiles=args.profiles,
+        )
+    )
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report, indent=2))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Startup Import Budget
+Measures how long importing the API takes and fails when it exceeds the budget
+
+Every run imports app.main in a fresh interpreter, like a cold container,
+and also fails if any heavy module (torch, model libraries, PyMuPDF, ...)
+was imported on the way.
+
+Usage:
+    python -m app.benchmarks.startup
+    python -m app.benchmarks.startup --budget-ms 1500 --repeats 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+
+
+# Modules that must only load on demand, never while importing the API
+HEAVY_MODULES = (
+    "torch",
+    "torchvision",
+    "transformers",
+    "docling",
+    "surya",
+    "magic_pdf",
+    "cv2",
+    "fitz",
+    "pymupdf",
+    "pdf2image",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+heavy = sorted({name.split(".")[0] for name in sys.modules} & set(json.loads(sys.argv[1])))
+print(json.dumps({"seconds": elapsed, "heavy_modules": heavy}))
+"""
+
+
+def probe_import(importtime: bool = False) -> Tuple[Dict[str, Any], str]:
+    """
+    Import app.main in a fresh interpreter
+
+    Args:
+        importtime: Run with -X importtime and return its report
+
+    Returns:
+        Tuple of (probe result, -X importtime output or "")
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE, json.dumps(HEAVY_MODULES)]
+
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing app.main failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result, completed.stderr if importtime else ""
+
+
+def slowest_imports(report: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Packages that spent the most time importing (own modules, summed)"""
+    packages: Dict[str, int] = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"package": name, "ms": us / 1000} for name, us in ranked]
+
+
+def check_startup(budget_ms: float, repeats: int) -> Dict[str, Any]:
+    """
+    Measure the API import time against a budget
+
+    Returns:
+        Report with the median import time, the slowest imports, any heavy
+        modules that were loaded and whether the check passed
+    """
+    timings = []
+    heavy = set()
+    for _ in range(max(1, repeats)):
+        result, _ = probe_import()
+        timings.append(result["seconds"] * 1000)
+        heavy.update(result["heavy_modules"])
+
+    _, importtime = probe_import(importtime=True)
+    median_ms = statistics.median(timings)
+    return {
+        "budget_ms": budget_ms,
+        "median_ms": median_ms,
+        "runs_ms": timings,
+        "heavy_modules": sorted(heavy),
+        "slowest_imports": slowest_imports(importtime),
+        "passed": median_ms <= budget_ms and not heavy,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the API import time budget")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=settings.STARTUP_IMPORT_BUDGET_MS,
+        help="Maximum median time to import app.main",
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters to time")
+    args = parser.parse_args()
+
+    report = check_startup(args.budget_ms, args.repeats)
+    print(json.dumps(report, indent=2))
+    if report["heavy_modules"]:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(report['heavy_modules'])}")
+    elif not report["passed"]:
+        print(f"FAIL: import took {report['median_ms']:.0f}ms (budget {args.budget_ms:.0f}ms)")
+    else:
+        print(f"OK: import took {report['median_ms']:.0f}ms (budget {args.budget_ms:.0f}ms)")
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
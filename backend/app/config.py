@@ -2,7 +2,7 @@
 Application Configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -22,6 +22,7 @@ class Settings(BaseSettings):
     ALLOWED_EXTENSIONS: List[str] = ["pdf"]
     UPLOAD_DIR: str = "./uploads"
     RESULTS_DIR: str = "./results"
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 1MB streamed per read
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 10
@@ -34,10 +35,115 @@ class Settings(BaseSettings):
     # Model Configuration
     MODEL_CACHE_DIR: str = "/cache/models"
     SUPPORTED_MODELS: List[str] = ["docling", "mineru"]  # surya temporarily disabled
+    PRELOAD_MODELS: bool = True  # warm SUPPORTED_MODELS at startup
+    BENCHMARK_RESULTS_PATH: str = "./benchmarks.json"  # written by app.benchmarks.runner
+    STARTUP_IMPORT_BUDGET_MS: int = 1500  # checked by app.benchmarks.startup
+    
+    # Execution profile
+    EXECUTION_PROFILE: str = "auto"  # "auto", "gpu" or "cpu"; auto uses cpu when no GPU is visible
+    CPU_INTRA_OP_THREADS: int = 0  # 0 = cores divided among shard workers
+    CPU_INTER_OP_THREADS: int = 1
+    CPU_QUANTIZE: bool = True  # int8 dynamic quantization of Linear layers on cpu
     
     # Processing
     MAX_PAGES: int = 100
     DEFAULT_DPI: int = 200
+    DPI_POLICY: str = "fixed"  # "fixed" (DEFAULT_DPI) or "adaptive" (chosen per page)
+    ADAPTIVE_DPI_MIN: int = 100
+    ADAPTIVE_DPI_MAX: int = 300
+    ADAPTIVE_DPI_TEXT_PX: int = 26  # pixels per em for a page's small print
+    ADAPTIVE_DPI_MAX_PIXELS: int = 10000000  # per page; large formats get a lower DPI
+    
+    # Page rasterisation (shared page image cache)
+    RASTER_CACHE_MAX_BYTES: int = 1073741824  # 1GB of rendered pages
+    RASTER_WORKERS: int = 0  # processes rendering pages in parallel; 0/1 = render in-line
+    RASTER_PRERENDER: bool = False  # render model pages before inference (for services reading the cache)
+    
+    # Memory budget
+    MEMORY_CEILING_BYTES: int = 0  # process RSS ceiling; 0 = unbounded
+    MEMORY_HIGH_WATER: float = 0.85  # new work waits while RSS is above this share of the ceiling
+    MEMORY_QUEUE_TIMEOUT: float = 30.0  # seconds a request waits for memory before a 503
+    MEMORY_BUDGET_MODE: bool = False  # extract page by page, spilling results to disk
+    
+    # Scheduling (weighted fair queuing of extraction work between clients)
+    SCHEDULER_MAX_CONCURRENT: int = 4  # documents extracting at once; 0 = unbounded
+    SCHEDULER_INTERACTIVE_RESERVED: int = 1  # slots jobs and batch documents may not take
+    SCHEDULER_PRIORITY_WEIGHTS: Dict[str, float] = {"interactive": 8.0, "bulk": 1.0}
+    SCHEDULER_CLIENT_WEIGHTS: Dict[str, float] = {}  # per client; others weigh 1
+    SCHEDULER_CLIENT_HEADER: str = ""  # header identifying the client, e.g. "X-Client-ID"; default: remote address
+    SCHEDULER_QUEUE_TIMEOUT: float = 60.0  # seconds a request waits for a slot before a 503
+    
+    # Model executors (inference runs off the event loop)
+    MODEL_EXECUTOR_MODE: str = "thread"  # "thread" or "process" (own model copy per worker)
+    MODEL_EXECUTOR_MODE_OVERRIDES: Dict[str, str] = {}  # per model, e.g. {"mineru": "process"}
+    MODEL_EXECUTOR_WORKERS: int = 1  # per model
+    MODEL_EXECUTOR_WORKER_OVERRIDES: Dict[str, int] = {}
+    MODEL_EXECUTOR_QUEUE_SIZE: int = 4  # requests waiting per model before 503
+    
+    # Inference batching (pages of concurrent requests share model calls)
+    INFERENCE_BATCHING_ENABLED: bool = False
+    INFERENCE_BATCH_MAX_PAGES: int = 8
+    INFERENCE_BATCH_MAX_WAIT_MS: int = 10  # longest a page waits for others to join
+    
+    # Result retention
+    RESULT_TTL_SECONDS: int = 604800  # 7 days since last write; 0 keeps results forever
+    RESULT_STORE_MAX_BYTES: int = 10737418240  # 10GB of task results; 0 disables the quota
+    RESULT_SWEEP_INTERVAL: int = 600  # seconds between sweeps
+    UPLOAD_RETENTION_SECONDS: int = 86400  # leftover uploads older than this are removed
+    DELETE_UPLOADS_AFTER_EXTRACTION: bool = True
+    
+    # Text-layer fast path (born-digital pages skip the model)
+    TEXT_FAST_PATH_ENABLED: bool = True
+    TEXT_LAYER_MIN_CHARS: int = 200  # minimum extractable characters per page
+    TEXT_LAYER_MAX_IMAGE_COVERAGE: float = 0.15  # fraction of page area
+    TEXT_LAYER_MAX_DRAWINGS: int = 40  # vector paths; ruled tables and charts exceed this
+    TEXT_LAYER_MAX_GARBLED_RATIO: float = 0.02  # unmappable glyphs / characters
+    
+    # Per-page reuse across document revisions
+    PAGE_REUSE_ENABLED: bool = False
+    PAGE_CACHE_MAX_BYTES: int = 536870912  # 512MB
+    
+    # Annotations
+    LAZY_ANNOTATIONS: bool = True  # draw annotated pages on first request
+    ANNOTATION_DPI: int = 100
+    ANNOTATION_MAX_DPI: int = 300
+    ANNOTATION_FORMAT: str = "png"  # "png" or "webp"
+    ANNOTATION_CACHE_MAX_BYTES: int = 268435456  # 256MB of rendered pages
+    
+    # Page sharding (large documents split across a process pool)
+    SHARDING_ENABLED: bool = False
+    SHARD_MIN_PAGES: int = 40  # only shard documents at least this long
+    SHARD_PAGE_SIZE: int = 20
+    SHARD_WORKERS: int = 2
+    
+    # Automatic model selection (model=auto)
+    AUTO_MODEL_QUALITY_THRESHOLD: float = 0.75  # expected quality the chosen model must reach
+    AUTO_MODEL_SAMPLE_PAGES: int = 12  # pages analysed per document, spread evenly
+    AUTO_MODEL_EQUATION_SYMBOLS: int = 6  # math symbols that make a page an equation page
+    AUTO_MODEL_QUALITY: Dict[str, Dict[str, float]] = {}  # overrides of the quality priors, e.g. {"surya": {"table": 0.5}}
+    
+    # Model comparison
+    COMPARE_MAX_CONCURRENCY: int = 3  # models running at the same time
+    COMPARE_MODEL_TIMEOUT: int = 600  # seconds allowed per model, and again to wait for a worker
+    CONSENSUS_IOU_THRESHOLD: float = 0.5  # bbox IoU for two models' elements to match
+    CONSENSUS_MIN_VOTES: int = 0  # models needed per consensus element; 0 = majority
+    
+    # Batch extraction
+    BATCH_MAX_FILES: int = 50
+    BATCH_MAX_CONCURRENCY: int = 2  # documents processed at the same time
+    BATCH_MAX_PENDING: int = 200  # documents admitted across all batches
+    BATCH_MAX_ARCHIVE_SIZE: int = 524288000  # 500MB
+    
+    # Background jobs
+    JOB_STORE_BACKEND: str = "memory"  # "memory" or "sqlite"
+    JOB_STORE_PATH: str = "./jobs.db"
+    JOB_STORE_MAX_JOBS: int = 10000  # memory backend; oldest finished jobs go first
+    JOB_QUEUE_MAX_SIZE: int = 50
+    JOB_WORKERS: int = 2
+    
+    # Result cache
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_BYTES: int = 2147483648  # 2GB
     
     class Config:
         env_file = ".env"
@@ -3,15 +3,30 @@ Main FastAPI Application
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from loguru import logger
+import asyncio
 import sys
+import time
 
 from app.config import settings
 from app.api.v1 import router as api_v1_router
+from app.services.jobs import job_queue
+from app.services.result_cache import result_cache
+from app.services.registry import model_registry, supported_models
+from app.services.batch import batch_runner
+from app.services.annotations import annotation_renderer
+from app.services.page_cache import page_cache
+from app.services.raster import page_images
+from app.services.memory_budget import memory_budget
+from app.services.scheduler import extraction_scheduler
+from app.services.result_store import result_store
+from app.services.batching import inference_batcher
+from app.services.executors import model_executors
+from app.services.telemetry import metrics
 
 # Configure logging
 logger.remove()
@@ -47,13 +62,39 @@ app.add_middleware(
 )
 
 
+# Gauges read when /metrics is scraped
+app.state.in_flight = 0
+metrics.gauge("http_requests_in_flight", "Requests currently being handled", lambda: app.state.in_flight)
+metrics.gauge("job_queue_depth", "Background jobs waiting to start", lambda: job_queue.depth)
+metrics.gauge("batch_documents_pending", "Batch documents admitted but not finished", lambda: batch_runner.pending)
+metrics.gauge("result_cache", "Result cache counters and size", result_cache.stats, label="stat")
+metrics.gauge("page_cache", "Per-page result cache counters and size", page_cache.stats, label="stat")
+metrics.gauge("page_images", "Rendered page image cache counters and size", page_images.stats, label="stat")
+metrics.gauge("result_store", "Stored task results and uploads as of the last sweep", result_store.stats, label="stat")
+metrics.gauge("model_executor", "Model executor admission and call counters", model_executors.stats, label="stat")
+metrics.gauge("inference_batches", "Inference batching counters", inference_batcher.stats, label="stat")
+metrics.gauge("scheduler", "Extraction scheduler slots, queue and wait counters", extraction_scheduler.stats, label="stat")
+metrics.gauge("memory_budget", "Process RSS against the memory ceiling and admission counters", memory_budget.stats, label="stat")
+metrics.gauge("annotation_cache", "Rendered annotation cache counters and size", annotation_renderer.stats, label="stat")
+metrics.gauge(
+    "model_loaded",
+    "Whether each model service is loaded",
+    lambda: {name: float(status.state == "loaded") for name, status in model_registry.status().items()},
+    label="model",
+)
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests"""
+    """Log all requests and record request metrics"""
     logger.info(f"{request.method} {request.url.path}")
+    app.state.in_flight += 1
+    start_time = time.perf_counter()
+    status_code = 500
     try:
         response = await call_next(request)
-        logger.info(f"Status: {response.status_code}")
+        status_code = response.status_code
+        logger.info(f"Status: {response.status_code} ({time.perf_counter() - start_time:.3f}s)")
         return response
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
@@ -61,6 +102,17 @@ async def log_requests(request: Request, call_next):
             status_code=500,
             content={"detail": "Internal server error"},
         )
+    finally:
+        app.state.in_flight -= 1
+        # Label by route template rather than raw path to bound cardinality
+        route = request.scope.get("route")
+        labels = {
+            "method": request.method,
+            "route": getattr(route, "path", "unmatched"),
+            "status": str(status_code),
+        }
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start_time, labels)
+        metrics.inc("http_requests_total", labels)
 
 
 @app.exception_handler(Exception)
@@ -73,6 +125,32 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.on_event("startup")
+async def startup():
+    """Start background workers and warm up models"""
+    await job_queue.start()
+    await result_store.start()
+    if settings.PRELOAD_MODELS:
+        # Load in the background so /health answers while models warm up
+        # Models run by process executors are loaded by their workers instead
+        app.state.model_warmup = asyncio.create_task(
+            model_registry.warm_up(
+                model for model in supported_models()
+                if model_executors.get(model).in_process
+            )
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers"""
+    await job_queue.stop()
+    await result_store.stop()
+    inference_batcher.shutdown()
+    model_executors.shutdown()
+    page_images.shutdown()
+
+
 # Include routers
 app.include_router(api_v1_router, prefix=settings.API_V1_PREFIX)
 
@@ -93,9 +171,20 @@ async def health_check():
     return {
         "status": "healthy",
         "environment": settings.ENVIRONMENT,
+        "result_cache": result_cache.stats(),
+        "result_store": result_store.stats(),
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics"""
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
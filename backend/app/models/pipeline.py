@@ -0,0 +1,220 @@
+"""
+Pydantic schemas for background processing
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+from enum import Enum
+
+from app.models.schemas import (
+    HealthResponse,
+    DocumentElement,
+    ExtractionMetrics,
+    ExtractionResponse,
+    ModelType,
+)
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a background extraction job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobSubmitResponse(BaseModel):
+    """Returned as soon as a job has been accepted"""
+    task_id: str = Field(..., description="Identifier to poll for status")
+    status: JobStatus = Field(..., description="Initial job status")
+    status_url: str = Field(..., description="URL to poll for job status")
+    result_url: str = Field(..., description="URL of the result once completed")
+
+
+class JobStatusResponse(BaseModel):
+    """Current state of a background extraction job"""
+    task_id: str = Field(..., description="Job identifier")
+    kind: str = Field(..., description="Job type (single or compare)")
+    status: JobStatus = Field(..., description="Current job status")
+    created_at: float = Field(..., description="Submission time (unix seconds)")
+    started_at: Optional[float] = Field(None, description="Start time (unix seconds)")
+    finished_at: Optional[float] = Field(None, description="Finish time (unix seconds)")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Job parameters")
+    queue_position: Optional[int] = Field(
+        None, description="Place in the extraction queue while queued (1 starts next)"
+    )
+
+
+class QueueEntry(BaseModel):
+    """One of a client's extractions in the scheduler"""
+    task_id: str = Field(..., description="Task identifier")
+    priority: str = Field(..., description="Priority class (interactive or bulk)")
+    cost: float = Field(..., description="Estimated cost (pages times models)")
+    state: str = Field(..., description="queued or running")
+    position: Optional[int] = Field(None, description="Place in the queue while queued")
+    waited: float = Field(..., description="Seconds spent waiting for a slot")
+
+
+class QueueStatusResponse(BaseModel):
+    """A client's view of the extraction queue"""
+    client: str = Field(..., description="Client identifier work is shared out by")
+    queued: int = Field(..., description="Extractions waiting across all clients")
+    running: int = Field(..., description="Extractions running across all clients")
+    entries: List[QueueEntry] = Field(default_factory=list, description="This client's extractions")
+
+
+class ModelLoadState(str, Enum):
+    """Load state of a model service"""
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    LOADED = "loaded"
+    FAILED = "failed"
+
+
+class ModelStatus(BaseModel):
+    """Load state and timing for one model service"""
+    state: ModelLoadState = Field(..., description="Current load state")
+    load_time: Optional[float] = Field(None, description="Seconds taken to load")
+    loaded_at: Optional[float] = Field(None, description="Load completion time (unix seconds)")
+    error: Optional[str] = Field(None, description="Error message if loading failed")
+
+
+class ExecutionProfile(BaseModel):
+    """Device, threading and quantization used to run the models"""
+    name: str = Field(..., description="Profile name (gpu, cpu or default)")
+    device: str = Field(..., description="Torch device the models run on")
+    intra_op_threads: int = Field(0, description="Threads per operator (0 = library default)")
+    inter_op_threads: int = Field(0, description="Threads running operators in parallel (0 = library default)")
+    quantize: bool = Field(False, description="Linear layers quantized to int8")
+
+
+class DetailedHealthResponse(HealthResponse):
+    """Health response with per-model load state"""
+    models_status: Dict[str, ModelStatus] = Field(
+        default_factory=dict,
+        description="Load state and load time per model",
+    )
+    execution: Optional[ExecutionProfile] = Field(
+        None,
+        description="Execution profile applied when the first model loaded",
+    )
+
+
+class DocumentAnalysis(BaseModel):
+    """Quick profile of a document used to choose its model"""
+    pages: int = Field(..., description="Pages in the document")
+    sampled_pages: int = Field(..., description="Pages analysed")
+    text_native_pages: int = Field(..., description="Sampled pages the text-layer fast path can take")
+    scanned_pages: int = Field(..., description="Sampled pages that are mostly image without a text layer")
+    table_pages: int = Field(..., description="Sampled pages with a ruled table")
+    equation_pages: int = Field(..., description="Sampled pages with mathematical notation")
+    non_latin_pages: int = Field(..., description="Sampled pages mostly in a non-Latin script")
+    scripts: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Share of letters per Unicode script",
+    )
+
+
+class ModelCandidate(BaseModel):
+    """How one model scored for a document"""
+    model: ModelType = Field(..., description="Candidate model")
+    expected_quality: float = Field(..., description="Expected quality (0-1) on the pages it would extract")
+    estimated_seconds: float = Field(..., description="Estimated model time for the document")
+    seconds_per_page: float = Field(..., description="Model time per page the estimate used")
+    measured: bool = Field(..., description="Whether seconds_per_page comes from the benchmark report")
+    meets_threshold: bool = Field(..., description="Whether expected_quality reaches the threshold")
+
+
+class ModelSelection(BaseModel):
+    """Model chosen for a request with model=auto, and why"""
+    model: ModelType = Field(..., description="Model chosen")
+    reason: str = Field(..., description="Why the model was chosen")
+    quality_threshold: float = Field(..., description="Expected quality a model had to reach")
+    analysis: DocumentAnalysis = Field(..., description="Document profile the choice was based on")
+    candidates: List[ModelCandidate] = Field(default_factory=list, description="Every model considered, fastest first")
+
+
+class PageResult(BaseModel):
+    """Extraction result for a single page, emitted while streaming"""
+    event: str = Field("page", description="Event type")
+    task_id: str = Field(..., description="Task identifier")
+    page: int = Field(..., description="Page number (1-indexed)")
+    total_pages: int = Field(..., description="Pages in the document")
+    elements: List[DocumentElement] = Field(default_factory=list, description="Elements found on the page")
+    markdown: str = Field("", description="Markdown for the page")
+    annotation_url: Optional[str] = Field(None, description="Annotated image for the page")
+
+
+class StreamComplete(BaseModel):
+    """Final event of a streamed extraction"""
+    event: str = Field("complete", description="Event type")
+    task_id: str = Field(..., description="Task identifier")
+    model: ModelType = Field(..., description="Model used")
+    metrics: ExtractionMetrics = Field(..., description="Metrics for the whole document")
+    auto_model: Optional[ModelSelection] = Field(None, description="How the model was chosen (model=auto)")
+
+
+class BatchItem(BaseModel):
+    """Outcome for one document of a batch"""
+    task_id: str = Field(..., description="Task identifier for the document")
+    filename: str = Field(..., description="Uploaded or archived file name")
+    model: Optional[ModelType] = Field(None, description="Model used (unset if model=auto failed before choosing)")
+    status: JobStatus = Field(..., description="completed or failed")
+    error: Optional[str] = Field(None, description="Error message if the document failed")
+    metrics: Optional[ExtractionMetrics] = Field(None, description="Extraction metrics")
+    markdown_url: Optional[str] = Field(None, description="URL of the extracted markdown")
+    auto_model: Optional[ModelSelection] = Field(None, description="How the model was chosen (model=auto)")
+
+
+class BatchManifest(BaseModel):
+    """Result manifest for a batch extraction"""
+    batch_id: str = Field(..., description="Batch identifier")
+    total: int = Field(..., description="Documents in the batch")
+    completed: int = Field(..., description="Documents extracted successfully")
+    failed: int = Field(..., description="Documents that failed")
+    elapsed: float = Field(..., description="Wall-clock seconds for the batch")
+    items: List[BatchItem] = Field(default_factory=list, description="Per-document results")
+
+
+class ProcessingDetails(BaseModel):
+    """How a result was produced"""
+    stage_timings: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Seconds spent per processing stage",
+    )
+    cache_hit: bool = Field(False, description="Whether the result came from the result cache")
+    text_layer_pages: List[int] = Field(
+        default_factory=list,
+        description="Pages extracted from the PDF text layer instead of the model",
+    )
+    reused_pages: List[int] = Field(
+        default_factory=list,
+        description="Pages whose results were reused from an earlier revision",
+    )
+    page_dpi: Dict[int, int] = Field(
+        default_factory=dict,
+        description=(
+            "Resolution each model page was pre-rendered at under the adaptive "
+            "DPI policy (RASTER_PRERENDER)"
+        ),
+    )
+    peak_rss_bytes: Optional[int] = Field(
+        None,
+        description="Peak process RSS while the task ran (includes concurrent tasks)",
+    )
+    spilled: bool = Field(
+        False,
+        description="Elements and markdown were written to disk page by page (memory budget mode)",
+    )
+    auto_model: Optional[ModelSelection] = Field(
+        None,
+        description="How the model was chosen when the request asked for model=auto",
+    )
+
+
+class ExtractionResult(ExtractionResponse):
+    """ExtractionResponse with processing details attached"""
+    processing: ProcessingDetails = Field(
+        default_factory=ProcessingDetails,
+        description="Stage timings and other processing details",
+    )
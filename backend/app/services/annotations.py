@@ -0,0 +1,215 @@
+"""
+Annotation Rendering
+Draws element bounding boxes on demand from stored extraction results
+"""
+import io
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+
+# Outline colours per element type (RGB)
+ELEMENT_COLORS: Dict[str, Tuple[int, int, int]] = {
+    "title": (220, 38, 38),
+    "header": (234, 88, 12),
+    "text": (37, 99, 235),
+    "paragraph": (37, 99, 235),
+    "list": (8, 145, 178),
+    "table": (22, 163, 74),
+    "figure": (147, 51, 234),
+    "image": (147, 51, 234),
+    "caption": (219, 39, 119),
+    "formula": (202, 138, 4),
+    "equation": (202, 138, 4),
+}
+DEFAULT_COLOR = (107, 114, 128)
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+SOURCE_FILE = "source.pdf"
+ELEMENTS_DIR = "elements"
+
+
+def element_dict(element: Any) -> Dict[str, Any]:
+    """Plain-dict form of a DocumentElement or element dict"""
+    if hasattr(element, "model_dump"):
+        return element.model_dump(mode="json")
+    return dict(element)
+
+
+def bbox_rect(bbox: Any) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Normalise a bounding box to (x0, y0, x1, y1) in PDF points
+
+    Accepts x0/y0/x1/y1 or x/y/width/height mappings and 4-item sequences.
+    """
+    if bbox is None:
+        return None
+    if hasattr(bbox, "x0"):
+        return bbox.x0, bbox.y0, bbox.x1, bbox.y1
+    if hasattr(bbox, "model_dump"):
+        bbox = bbox.model_dump()
+    if isinstance(bbox, dict):
+        if "x0" in bbox:
+            return bbox["x0"], bbox["y0"], bbox["x1"], bbox["y1"]
+        if "width" in bbox:
+            return bbox["x"], bbox["y"], bbox["x"] + bbox["width"], bbox["y"] + bbox["height"]
+        return None
+    if isinstance(bbox, (list, tuple)) and len(bbox) == 4:
+        return tuple(bbox)
+    return None
+
+
+def store_page_index(
+    task_id: str,
+    file_path: str,
+    elements: Iterable[Any],
+) -> None:
+    """
+    Keep what is needed to draw annotations later
+
+    Elements are written one JSON file per page so a render only reads the
+    page it needs, and the source PDF is linked (or copied) into the task's
+    result directory so rendering still works once the upload is removed.
+    Calling it again for the same task adds pages (used when streaming).
+
+    Args:
+        task_id: Task identifier
+        file_path: Source PDF
+        elements: Elements to index (any pages)
+    """
+    result_dir = Path(settings.RESULTS_DIR) / task_id
+    elements_dir = result_dir / ELEMENTS_DIR
+    elements_dir.mkdir(parents=True, exist_ok=True)
+
+    source = result_dir / SOURCE_FILE
+    if not source.exists():
+        try:
+            os.link(file_path, source)
+        except OSError:
+            shutil.copyfile(file_path, source)
+
+    pages: Dict[int, List[Dict[str, Any]]] = {}
+    for element in elements:
+        data = element_dict(element)
+        pages.setdefault(int(data.get("page", 1)), []).append(data)
+
+    for page, page_elements in pages.items():
+        (elements_dir / f"page_{page}.json").write_text(
+            json.dumps(page_elements), encoding="utf-8"
+        )
+
+
+def has_page_index(task_id: str) -> bool:
+    """Whether annotations for a task can be rendered on demand"""
+    return (Path(settings.RESULTS_DIR) / task_id / SOURCE_FILE).exists()
+
+
+class AnnotationRenderer:
+    """
+    Renders annotated page images and keeps recent ones in an LRU cache
+
+    Cache entries are keyed on task, page, DPI and format and bounded by
+    total encoded size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[Tuple[str, int, int, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, task_id: str, page: int, dpi: int, fmt: str) -> bytes:
+        """
+        Get an annotated page image, drawing it on first request
+
+        Args:
+            task_id: Task identifier
+            page: Page number (1-indexed)
+            dpi: Render resolution
+            fmt: "png" or "webp"
+
+        Returns:
+            Encoded image bytes
+
+        Raises:
+            FileNotFoundError: If the task has no stored results
+            ValueError: If the page does not exist
+        """
+        key = (task_id, page, dpi, fmt)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = self._draw(task_id, page, dpi, fmt)
+
+        with self._lock:
+            if key not in self._cache and len(image) <= self.max_bytes:
+                self._cache[key] = image
+                self._size += len(image)
+                while self._size > self.max_bytes:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._size -= len(evicted)
+        return image
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters and size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._cache),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _draw(self, task_id: str, page: int, dpi: int, fmt: str) -> bytes:
+        """Outline a page's elements on its image from the page image cache"""
+        from PIL import Image, ImageDraw
+        from app.services.raster import page_images
+
+        result_dir = Path(settings.RESULTS_DIR) / task_id
+        source = result_dir / SOURCE_FILE
+        if not source.exists():
+            raise FileNotFoundError(f"No stored results for task {task_id}")
+
+        elements_path = result_dir / ELEMENTS_DIR / f"page_{page}.json"
+        elements = []
+        if elements_path.exists():
+            elements = json.loads(elements_path.read_text(encoding="utf-8"))
+
+        # Copied once here, since the cached image is shared and read-only
+        image = Image.fromarray(np.array(page_images.get(str(source), page, dpi)))
+
+        scale = dpi / 72
+        draw = ImageDraw.Draw(image)
+        for element in elements:
+            rect = bbox_rect(element.get("bbox"))
+            if rect is None:
+                continue
+            color = ELEMENT_COLORS.get(str(element.get("type", "")).lower(), DEFAULT_COLOR)
+            x0, y0, x1, y1 = (coord * scale for coord in rect)
+            draw.rectangle([x0, y0, x1, y1], outline=color, width=max(1, round(scale)))
+            draw.text((x0 + 2, max(0, y0 - 11)), str(element.get("type", "")), fill=color)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt.upper())
+        return buffer.getvalue()
+
+
+# Shared renderer
+annotation_renderer = AnnotationRenderer(max_bytes=settings.ANNOTATION_CACHE_MAX_BYTES)
@@ -0,0 +1,195 @@
+"""
+Batch Extraction
+Schedules many documents together, grouped by model
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.models.pipeline import BatchItem, BatchManifest, JobStatus, ModelSelection
+from app.services.jobs import QueueFullError
+from app.services.memory_budget import memory_budget
+from app.services.result_store import result_store
+from app.services.scheduler import BULK, estimate_cost, extraction_scheduler
+from app.utils.file_utils import SavedUpload
+
+
+# Scheduler pool of batch documents
+POOL = "batch"
+
+
+@dataclass
+class BatchDocument:
+    """A document admitted into a batch"""
+    task_id: str
+    filename: str
+    model: Optional[ModelType]  # None until chosen for model=auto
+    upload: Optional[SavedUpload] = None
+    error: Optional[str] = None  # set when the upload itself was rejected
+    auto_model: Optional[ModelSelection] = None  # how model=auto chose the model
+
+
+class BatchRunner:
+    """
+    Runs batches of documents with shared, bounded concurrency
+
+    Documents are grouped by model and each group is processed before the
+    next, so a model is loaded once and stays hot for its whole group.
+    Within a group at most BATCH_MAX_CONCURRENCY documents run at a time
+    (shared by every batch in the process), and no more than
+    BATCH_MAX_PENDING documents may be admitted at once. Documents start
+    in the extraction scheduler's fair order as bulk work, so concurrent
+    batches from different clients are interleaved.
+    """
+
+    def __init__(self, max_concurrency: int, max_pending: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="batch",
+        )
+        extraction_scheduler.limit_pool(POOL, self.max_concurrency)
+
+    @property
+    def pending(self) -> int:
+        """Documents admitted but not yet finished"""
+        return self._pending
+
+    def admit(self, count: int) -> None:
+        """
+        Reserve capacity for a batch
+
+        Raises:
+            QueueFullError: If the batch would exceed BATCH_MAX_PENDING
+        """
+        with self._lock:
+            if self._pending + count > self.max_pending:
+                raise QueueFullError(
+                    f"Batch capacity exceeded ({self._pending} documents pending), "
+                    "try again later"
+                )
+            self._pending += count
+
+    def release(self, count: int) -> None:
+        """Return capacity reserved by admit"""
+        with self._lock:
+            self._pending = max(0, self._pending - count)
+
+    async def run(
+        self,
+        processor,
+        batch_id: str,
+        documents: List[BatchDocument],
+        generate_annotations: bool = True,
+        client: str = "",
+    ) -> BatchManifest:
+        """
+        Process admitted documents and build the batch manifest
+
+        Args:
+            processor: PDFProcessor used for each document
+            batch_id: Batch identifier
+            documents: Documents to process (capacity already admitted)
+            generate_annotations: Whether to generate visual annotations
+            client: Client the documents are scheduled for
+
+        Returns:
+            BatchManifest with one item per document, in submission order
+        """
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        items: Dict[str, BatchItem] = {}
+
+        groups: Dict[ModelType, List[BatchDocument]] = defaultdict(list)
+        for document in documents:
+            if document.upload is None:
+                items[document.task_id] = self._item(document, error=document.error)
+                self.release(1)
+            else:
+                groups[document.model].append(document)
+
+        async def run_document(document: BatchDocument) -> None:
+            try:
+                cost = await asyncio.to_thread(estimate_cost, document.upload.path)
+                async with extraction_scheduler.slot(
+                    document.task_id, client, BULK, cost, pool=POOL
+                ):
+                    # Documents wait their turn while memory is near the ceiling
+                    await memory_budget.wait()
+                    job = processor.process_pdf(
+                        file_path=document.upload.path,
+                        model=document.model,
+                        task_id=document.task_id,
+                        generate_annotations=generate_annotations,
+                        file_hash=document.upload.sha256,
+                    )
+                    result = await loop.run_in_executor(self._executor, asyncio.run, job)
+                items[document.task_id] = self._item(document, metrics=result.metrics)
+            except Exception as e:
+                logger.warning(f"Batch {batch_id}: {document.filename} failed: {str(e)}")
+                items[document.task_id] = self._item(document, error=str(e))
+            finally:
+                self.release(1)
+                result_store.release_upload(document.task_id)
+
+        for model, group in groups.items():
+            logger.info(f"Batch {batch_id}: {len(group)} documents with {model.value}")
+            await asyncio.gather(*(run_document(document) for document in group))
+
+        ordered = [items[document.task_id] for document in documents]
+        completed = sum(1 for item in ordered if item.status == JobStatus.COMPLETED)
+        manifest = BatchManifest(
+            batch_id=batch_id,
+            total=len(ordered),
+            completed=completed,
+            failed=len(ordered) - completed,
+            elapsed=time.time() - start_time,
+            items=ordered,
+        )
+
+        manifest_dir = Path(settings.RESULTS_DIR) / batch_id
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        (manifest_dir / "manifest.json").write_text(
+            manifest.model_dump_json(indent=2), encoding="utf-8"
+        )
+        return manifest
+
+    @staticmethod
+    def _item(document: BatchDocument, metrics=None, error: Optional[str] = None) -> BatchItem:
+        """Build the manifest entry for a document"""
+        if error is not None:
+            return BatchItem(
+                task_id=document.task_id,
+                filename=document.filename,
+                model=document.model,
+                status=JobStatus.FAILED,
+                error=error,
+                auto_model=document.auto_model,
+            )
+        return BatchItem(
+            task_id=document.task_id,
+            filename=document.filename,
+            model=document.model,
+            status=JobStatus.COMPLETED,
+            metrics=metrics,
+            markdown_url=f"{settings.API_V1_PREFIX}/extract/markdown/{document.task_id}",
+            auto_model=document.auto_model,
+        )
+
+
+# Shared batch runner
+batch_runner = BatchRunner(
+    max_concurrency=settings.BATCH_MAX_CONCURRENCY,
+    max_pending=settings.BATCH_MAX_PENDING,
+)
@@ -0,0 +1,344 @@
+"""
+Inference Batching
+Groups pages submitted concurrently for the same model into shared service calls
+"""
+import asyncio
+import bisect
+import shutil
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.services.executors import ModelExecutor, model_executors
+from app.services.sharding import count_pages, element_page, page_markdown, shift_page
+
+
+@dataclass
+class PendingExtraction:
+    """A document (usually a single-page shard) waiting for a batch"""
+    file_path: str
+    task_id: str
+    num_pages: int
+    future: asyncio.Future
+    enqueued_at: float
+
+
+@dataclass
+class _Lane:
+    """Queue and worker for one service (on the batcher's event loop)"""
+    executor: ModelExecutor
+    service: Any
+    pending: Deque[PendingExtraction] = field(default_factory=deque)
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: Optional[asyncio.Task] = None
+
+
+def split_batch_result(
+    items: List[PendingExtraction],
+    result: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """
+    Split the result of a combined document back into per-item results
+
+    Elements are assigned by page and rebased onto each item. Markdown
+    comes from the service's page_markdown (page -> markdown) when it
+    reports one and is otherwise rebuilt from each page's elements.
+    """
+    offsets = []
+    total = 0
+    for item in items:
+        offsets.append(total)
+        total += item.num_pages
+
+    elements: List[List[Any]] = [[] for _ in items]
+    for element in result["elements"]:
+        index = bisect.bisect_right(offsets, element_page(element) - 1) - 1
+        elements[index].append(shift_page(element, -offsets[index]))
+
+    reported_markdown = {
+        int(page): markdown
+        for page, markdown in (result.get("page_markdown") or {}).items()
+    }
+    parts = []
+    for item, offset, item_elements in zip(items, offsets, elements):
+        pages = range(offset + 1, offset + item.num_pages + 1)
+        if reported_markdown:
+            markdown = "\n\n".join(
+                reported_markdown[p] for p in pages if reported_markdown.get(p)
+            )
+        else:
+            markdown = "\n\n".join(
+                filter(None, (
+                    page_markdown([e for e in item_elements if element_page(e) == p - offset])
+                    for p in pages
+                ))
+            )
+        parts.append({
+            "elements": item_elements,
+            "markdown_content": markdown,
+            "annotations_url": None,
+        })
+    return parts
+
+
+def combine_pdfs(paths: List[str], output: Path) -> None:
+    """Concatenate PDFs into one file"""
+    import fitz
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with fitz.open() as combined:
+        for path in paths:
+            with fitz.open(path) as source:
+                combined.insert_pdf(source)
+        combined.save(str(output))
+
+
+class InferenceBatcher:
+    """
+    Micro-batching scheduler in front of the model services
+
+    Extractions submitted for the same service are queued and dispatched
+    together once the batch holds max_pages pages or the oldest has waited
+    max_wait_ms. A batch of several documents is concatenated into one PDF
+    and sent to the service in a single call; its result is split back by
+    page and each caller's future resolved. A batch of one goes to the
+    service unchanged, so a lone request only pays the wait, and a batch
+    that fails is retried one document at a time so a bad page only fails
+    its own caller.
+
+    Services may implement ``extract_batch(file_paths, task_ids)`` returning
+    one result per document to receive batches directly instead.
+
+    Comparisons, jobs and batches run on event loops of their own, so the
+    lanes live on one dedicated loop in a background thread and callers on
+    any loop submit to it; pages from every request then share batches.
+    """
+
+    def __init__(self, max_pages: int, max_wait_ms: float):
+        self.max_pages = max(1, max_pages)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+
+        # Only touched on the batcher's loop
+        self._lanes: Dict[Tuple[ModelType, int], _Lane] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "batches": 0,
+            "batched_documents": 0,
+            "batched_pages": 0,
+            "single_calls": 0,
+            "failed_batches": 0,
+        }
+
+    async def extract(
+        self,
+        model: ModelType,
+        service: Any,
+        file_path: str,
+        task_id: str,
+    ) -> Dict[str, Any]:
+        """
+        Extract a document through the shared batch for its service
+
+        Args:
+            model: Model the service implements
+            service: Model service (None when the model runs in worker processes)
+            file_path: PDF to extract (typically a single-page shard)
+            task_id: Task identifier used when the document runs alone
+
+        Returns:
+            Service-style result dict with elements, markdown_content and
+            annotations_url
+        """
+        executor = model_executors.get(model)
+        num_pages = await asyncio.to_thread(count_pages, file_path)
+        if num_pages >= self.max_pages:
+            self._count(single_calls=1)
+            return await executor.extract(service, file_path, task_id, False)
+
+        # Cancelling the caller cancels the submission, whose pending item
+        # is then skipped
+        submission = asyncio.run_coroutine_threadsafe(
+            self._submit(executor, service, file_path, task_id, num_pages),
+            self._batch_loop(),
+        )
+        return await asyncio.wrap_future(submission)
+
+    def stats(self) -> Dict[str, int]:
+        """Batch counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self) -> None:
+        """Stop the lane workers and the batcher's loop"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def stop() -> None:
+            workers = [lane.worker for lane in self._lanes.values()]
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._lanes.clear()
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(stop(), loop)
+
+    def _batch_loop(self) -> asyncio.AbstractEventLoop:
+        """The batcher's event loop, started in a daemon thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="inference-batcher",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+    async def _submit(
+        self,
+        executor: ModelExecutor,
+        service: Any,
+        file_path: str,
+        task_id: str,
+        num_pages: int,
+    ) -> Dict[str, Any]:
+        """Queue a document on its lane and wait for its result (batcher's loop)"""
+        loop = asyncio.get_running_loop()
+        lane = self._lane(loop, executor, service)
+        future = loop.create_future()
+        lane.pending.append(
+            PendingExtraction(file_path, task_id, num_pages, future, loop.time())
+        )
+        lane.wake.set()
+        return await future
+
+    def _lane(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        executor: ModelExecutor,
+        service: Any,
+    ) -> _Lane:
+        key = (executor.model, id(service))
+        lane = self._lanes.get(key)
+        if lane is None or lane.worker.done():
+            lane = _Lane(executor=executor, service=service)
+            lane.worker = loop.create_task(self._run(lane))
+            self._lanes[key] = lane
+        return lane
+
+    async def _run(self, lane: _Lane) -> None:
+        """Form batches from a lane's queue, one at a time"""
+        loop = asyncio.get_running_loop()
+        while True:
+            while not lane.pending:
+                lane.wake.clear()
+                await lane.wake.wait()
+
+            deadline = lane.pending[0].enqueued_at + self.max_wait
+            while sum(item.num_pages for item in lane.pending) < self.max_pages:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                lane.wake.clear()
+                try:
+                    await asyncio.wait_for(lane.wake.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch: List[PendingExtraction] = []
+            pages = 0
+            while lane.pending:
+                item = lane.pending[0]
+                if item.future.done():  # caller went away
+                    lane.pending.popleft()
+                    continue
+                if batch and pages + item.num_pages > self.max_pages:
+                    break
+                batch.append(lane.pending.popleft())
+                pages += item.num_pages
+
+            if batch:
+                await self._dispatch(lane, batch)
+
+    async def _dispatch(self, lane: _Lane, batch: List[PendingExtraction]) -> None:
+        """Run one batch on the model's executor and resolve its futures"""
+        executor, service = lane.executor, lane.service
+        if len(batch) > 1:
+            try:
+                if executor.in_process and hasattr(service, "extract_batch"):
+                    results = await executor.extract_batch(
+                        service,
+                        [item.file_path for item in batch],
+                        [item.task_id for item in batch],
+                    )
+                else:
+                    results = await self._extract_combined(executor, service, batch)
+            except Exception as e:
+                self._count(failed_batches=1)
+                logger.warning(
+                    f"Inference batch of {len(batch)} failed, retrying singly: {str(e)}"
+                )
+            else:
+                self._count(
+                    batches=1,
+                    batched_documents=len(batch),
+                    batched_pages=sum(item.num_pages for item in batch),
+                )
+                for item, result in zip(batch, results):
+                    if not item.future.done():
+                        item.future.set_result(result)
+                return
+
+        for item in batch:
+            if item.future.done():
+                continue
+            self._count(single_calls=1)
+            try:
+                result = await executor.extract(service, item.file_path, item.task_id, False)
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            else:
+                if not item.future.done():
+                    item.future.set_result(result)
+
+    async def _extract_combined(
+        self,
+        executor: ModelExecutor,
+        service: Any,
+        batch: List[PendingExtraction],
+    ) -> List[Dict[str, Any]]:
+        """Concatenate a batch into one PDF, extract it once and split the result"""
+        batch_id = f"_batch_{uuid.uuid4().hex}"
+        combined = Path(settings.UPLOAD_DIR) / "_batches" / f"{batch_id}.pdf"
+        try:
+            await asyncio.to_thread(
+                combine_pdfs, [item.file_path for item in batch], combined
+            )
+            result = await executor.extract(service, str(combined), batch_id, False)
+            return split_batch_result(batch, result)
+        finally:
+            combined.unlink(missing_ok=True)
+            shutil.rmtree(Path(settings.RESULTS_DIR) / batch_id, ignore_errors=True)
+
+    def _count(self, **amounts: int) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+
+# Shared inference batcher
+inference_batcher = InferenceBatcher(
+    max_pages=settings.INFERENCE_BATCH_MAX_PAGES,
+    max_wait_ms=settings.INFERENCE_BATCH_MAX_WAIT_MS,
+)
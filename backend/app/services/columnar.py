@@ -0,0 +1,189 @@
+"""
+Columnar Elements
+Compact parallel-array layout of document elements and compact response encoding
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.annotations import bbox_rect
+
+try:
+    import msgpack
+except ImportError:  # msgpack responses are simply not offered
+    msgpack = None
+
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.pdf-extraction.columnar+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+LAYOUT_VERSION = 1
+
+
+@dataclass
+class ElementColumns:
+    """
+    Document elements as parallel arrays
+
+    Element types are indices into a string table; bounding boxes are an
+    (n, 4) array of x0, y0, x1, y1 with NaN rows for elements without one,
+    and missing confidences are NaN.
+    """
+    type_table: List[str]
+    types: np.ndarray  # uint16 indices into type_table
+    pages: np.ndarray  # int32
+    bboxes: np.ndarray  # float32, shape (n, 4)
+    confidence: np.ndarray  # float32
+    content: List[str]
+
+    def __len__(self) -> int:
+        return len(self.content)
+
+    @classmethod
+    def from_elements(cls, elements: List[Any]) -> "ElementColumns":
+        """Build columns from DocumentElements or element dicts in one pass"""
+        count = len(elements)
+        type_index: Dict[Any, int] = {}
+        types = np.empty(count, dtype=np.uint16)
+        pages = np.empty(count, dtype=np.int32)
+        bboxes = np.full((count, 4), np.nan, dtype=np.float32)
+        confidence = np.full(count, np.nan, dtype=np.float32)
+        content: List[str] = []
+
+        for i, element in enumerate(elements):
+            if isinstance(element, dict):
+                elem_type = element.get("type")
+                page = element.get("page", 1)
+                bbox = element.get("bbox")
+                score = element.get("confidence")
+                text = element.get("content", "")
+            else:
+                elem_type = element.type
+                page = element.page
+                bbox = element.bbox
+                score = element.confidence
+                text = element.content
+
+            types[i] = type_index.setdefault(elem_type, len(type_index))
+            pages[i] = page
+            rect = bbox_rect(bbox)
+            if rect is not None:
+                bboxes[i] = rect
+            if score is not None:
+                confidence[i] = score
+            content.append(text or "")
+
+        return cls(
+            type_table=[getattr(t, "value", t) for t in type_index],
+            types=types,
+            pages=pages,
+            bboxes=bboxes,
+            confidence=confidence,
+            content=content,
+        )
+
+    def element_counts(self) -> Dict[str, int]:
+        """Number of elements per type"""
+        counts = np.bincount(self.types, minlength=len(self.type_table))
+        return {name: int(n) for name, n in zip(self.type_table, counts) if n}
+
+    def num_pages(self) -> int:
+        """Number of distinct pages with at least one element"""
+        return int(np.unique(self.pages).size)
+
+    def to_dict(self, binary: bool = False) -> Dict[str, Any]:
+        """
+        Serialisable form of the columns
+
+        Args:
+            binary: Pack numeric columns as little-endian raw bytes (for
+                MessagePack) instead of JSON lists
+
+        Returns:
+            Dict with the string table and one entry per column
+        """
+        if binary:
+            numeric = {
+                "type": self.types.astype("<u2").tobytes(),
+                "page": self.pages.astype("<i4").tobytes(),
+                "bbox": self.bboxes.astype("<f4").tobytes(),
+                "confidence": self.confidence.astype("<f4").tobytes(),
+            }
+        else:
+            numeric = {
+                "type": self.types.tolist(),
+                "page": self.pages.tolist(),
+                "bbox": _json_floats(self.bboxes.ravel()),
+                "confidence": _json_floats(self.confidence),
+            }
+        return {
+            "layout": LAYOUT_VERSION,
+            "count": len(self),
+            "strings": self.type_table,
+            "dtypes": {"type": "<u2", "page": "<i4", "bbox": "<f4", "confidence": "<f4"},
+            **numeric,
+            "content": self.content,
+        }
+
+
+def _json_floats(values: np.ndarray) -> List[Optional[float]]:
+    """Float array as a JSON list, with NaN written as null"""
+    rounded = np.round(values.astype(np.float64), 3)
+    missing = np.isnan(rounded)
+    if not missing.any():
+        return rounded.tolist()
+    return [None if gap else value for value, gap in zip(rounded.tolist(), missing.tolist())]
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    Pick a compact media type from an Accept header
+
+    Returns:
+        The compact media type to respond with, or None for plain JSON
+    """
+    if not accept:
+        return None
+    offered = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+    for media_type in offered:
+        if media_type in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return media_type
+        if media_type == COLUMNAR_MEDIA_TYPE:
+            return media_type
+        if media_type in ("application/json", "*/*"):
+            return None
+    return None
+
+
+def compact_result(result: Any, binary: bool = False) -> Dict[str, Any]:
+    """ExtractionResponse-like model as a dict with columnar elements"""
+    body = result.model_dump(mode="json", exclude={"elements"})
+    body["elements"] = ElementColumns.from_elements(result.elements).to_dict(binary=binary)
+    return body
+
+
+def encode_compact(payload: Any, media_type: str) -> bytes:
+    """
+    Encode an extraction or comparison response in a compact media type
+
+    Args:
+        payload: ExtractionResponse (or subclass) or ComparisonResponse
+        media_type: Result of negotiate
+
+    Returns:
+        Encoded body
+    """
+    binary = media_type in MSGPACK_MEDIA_TYPES
+    if hasattr(payload, "elements"):
+        body = compact_result(payload, binary=binary)
+    else:
+        body = payload.model_dump(mode="json", exclude={"results"})
+        body["results"] = {
+            name: compact_result(result, binary=binary)
+            for name, result in payload.results.items()
+        }
+
+    if binary:
+        return msgpack.packb(body, use_bin_type=True)
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,322 @@
+"""
+Model Consensus
+Matches elements across model results by bbox IoU and measures agreement
+"""
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.models.schemas import DocumentElement
+from app.services.columnar import ElementColumns
+
+
+# Upper bound on grid cells per axis, so page-sized boxes stay cheap to index
+MAX_GRID_CELLS = 64
+
+Match = Tuple[int, int, float]  # (index in a, index in b, IoU)
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise IoU of x0/y0/x1/y1 boxes (arrays of shape (n, 4) or (4,))"""
+    ix0 = np.maximum(a[..., 0], b[..., 0])
+    iy0 = np.maximum(a[..., 1], b[..., 1])
+    ix1 = np.minimum(a[..., 2], b[..., 2])
+    iy1 = np.minimum(a[..., 3], b[..., 3])
+    inter = np.clip(ix1 - ix0, 0, None) * np.clip(iy1 - iy0, 0, None)
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+class GridIndex:
+    """
+    Uniform grid over the boxes of one page
+
+    The cell size follows the typical element size (so a query touches a
+    handful of cells) and coordinates may be in points or normalised units.
+    """
+
+    def __init__(self, boxes: np.ndarray):
+        self.boxes = boxes
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        if not len(boxes):
+            self.cell = 1.0
+            return
+
+        sizes = np.concatenate([boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]])
+        sizes = sizes[sizes > 0]
+        extent = float(np.max(boxes[:, 2:]) - min(0.0, float(np.min(boxes[:, :2]))))
+        cell = float(np.median(sizes)) if sizes.size else 1.0
+        self.cell = max(cell, extent / MAX_GRID_CELLS, 1e-9)
+
+        for i, (x0, y0, x1, y1) in enumerate(self._cell_ranges(boxes)):
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    self.cells[(cx, cy)].append(i)
+
+    def _cell_ranges(self, boxes: np.ndarray) -> List[List[int]]:
+        """First and last grid cell (x0, y0, x1, y1) covered by each box"""
+        return np.floor(boxes / self.cell).astype(np.int64).tolist()
+
+    def candidate_pairs(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs of (query box, indexed box) that share at least one grid cell
+
+        Returns:
+            Two index arrays of equal length, without duplicate pairs
+        """
+        queries: List[int] = []
+        hits: List[int] = []
+        for i, (x0, y0, x1, y1) in enumerate(self._cell_ranges(boxes)):
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cell = self.cells.get((cx, cy))
+                    if cell:
+                        queries.extend([i] * len(cell))
+                        hits.extend(cell)
+
+        if not queries:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        pairs = np.unique(
+            np.array(queries, dtype=np.int64) * len(self.boxes) + np.array(hits, dtype=np.int64)
+        )
+        return pairs // len(self.boxes), pairs % len(self.boxes)
+
+
+def _page_groups(columns: ElementColumns) -> Dict[int, np.ndarray]:
+    """Indices of located elements (with a bbox) per page"""
+    located = np.flatnonzero(~np.isnan(columns.bboxes).any(axis=1))
+    pages = columns.pages[located]
+    order = np.argsort(pages, kind="stable")
+    located, pages = located[order], pages[order]
+    boundaries = np.flatnonzero(np.diff(pages)) + 1
+    return {
+        int(group_pages[0]): group
+        for group, group_pages in zip(np.split(located, boundaries), np.split(pages, boundaries))
+        if group.size
+    }
+
+
+def match_elements(
+    a: ElementColumns,
+    b: ElementColumns,
+    threshold: float,
+) -> List[Match]:
+    """
+    One-to-one matching of two models' elements by bbox IoU, page by page
+
+    Candidates come from a grid index over b, so dense pages are not
+    compared all-pairs. Pairs at or above the threshold are assigned
+    greedily from the highest IoU down.
+    """
+    groups_a, groups_b = _page_groups(a), _page_groups(b)
+    matches: List[Match] = []
+
+    for page, indices_a in groups_a.items():
+        indices_b = groups_b.get(page)
+        if indices_b is None:
+            continue
+        index = GridIndex(b.bboxes[indices_b])
+        rows_a, rows_b = index.candidate_pairs(a.bboxes[indices_a])
+        if not rows_a.size:
+            continue
+
+        scores = iou(a.bboxes[indices_a[rows_a]], b.bboxes[indices_b[rows_b]])
+        keep = np.flatnonzero(scores >= threshold)
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+
+        used_a, used_b = set(), set()
+        for i, j, score in zip(
+            indices_a[rows_a[keep]].tolist(),
+            indices_b[rows_b[keep]].tolist(),
+            scores[keep].tolist(),
+        ):
+            if i not in used_a and j not in used_b:
+                used_a.add(i)
+                used_b.add(j)
+                matches.append((i, j, score))
+
+    return matches
+
+
+def _type_names(columns: ElementColumns) -> np.ndarray:
+    """Type name of every element"""
+    return np.array(columns.type_table, dtype=object)[columns.types]
+
+
+def pair_report(
+    a: ElementColumns,
+    b: ElementColumns,
+    matches: List[Match],
+) -> Dict[str, Any]:
+    """
+    Agreement between two models' elements
+
+    Precision and recall are per element type, measuring b against a as the
+    reference: a match counts for a type when both elements have that type.
+    """
+    located_a = int((~np.isnan(a.bboxes).any(axis=1)).sum())
+    located_b = int((~np.isnan(b.bboxes).any(axis=1)).sum())
+    types_a, types_b = _type_names(a), _type_names(b)
+
+    same_type = Counter()
+    for i, j, _ in matches:
+        if types_a[i] == types_b[j]:
+            same_type[types_a[i]] += 1
+    counts_a, counts_b = Counter(types_a.tolist()), Counter(types_b.tolist())
+
+    # Pages where the two models mostly found different regions
+    matched_per_page = Counter(int(a.pages[i]) for i, _, _ in matches)
+    per_page_a, per_page_b = Counter(a.pages.tolist()), Counter(b.pages.tolist())
+    low_agreement_pages = sorted(
+        page for page in set(per_page_a) | set(per_page_b)
+        if 2 * matched_per_page[page] / (per_page_a[page] + per_page_b[page]) < 0.5
+    )
+
+    return {
+        "matched": len(matches),
+        "unmatched": {"reference": located_a - len(matches), "candidate": located_b - len(matches)},
+        "agreement": 2 * len(matches) / (located_a + located_b) if located_a + located_b else 1.0,
+        "mean_iou": float(np.mean([score for _, _, score in matches])) if matches else 0.0,
+        "type_agreement": sum(same_type.values()) / len(matches) if matches else 0.0,
+        "per_type": {
+            name: {
+                "precision": same_type[name] / counts_b[name] if counts_b[name] else 0.0,
+                "recall": same_type[name] / counts_a[name] if counts_a[name] else 0.0,
+            }
+            for name in sorted(set(counts_a) | set(counts_b))
+        },
+        "low_agreement_pages": low_agreement_pages,
+    }
+
+
+def consensus_elements(
+    columns: Dict[str, ElementColumns],
+    matches: Dict[Tuple[str, str], List[Match]],
+    min_votes: int,
+) -> List[DocumentElement]:
+    """
+    Elements found by at least min_votes models
+
+    Matched elements are clustered across every model pair. Each cluster
+    becomes one element with the median bbox, the majority type (ties go to
+    the earlier model), the content of its most confident member and a
+    confidence equal to the share of models that found it.
+    """
+    models = list(columns)
+    parent: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def find(node: Tuple[int, int]) -> Tuple[int, int]:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for (name_a, name_b), pairs in matches.items():
+        ma, mb = models.index(name_a), models.index(name_b)
+        for i, j, _ in pairs:
+            parent[find((ma, i))] = find((mb, j))
+
+    clusters: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
+    for node in list(parent):
+        clusters[find(node)].append(node)
+
+    # Plain lists are much cheaper than numpy scalars for small clusters
+    boxes = [columns[name].bboxes.tolist() for name in models]
+    scores = [np.nan_to_num(columns[name].confidence, nan=0.0).tolist() for name in models]
+    types = [_type_names(columns[name]).tolist() for name in models]
+
+    elements = []
+    for members in clusters.values():
+        votes = len({model for model, _ in members})
+        if votes < min_votes:
+            continue
+        members.sort()
+        type_votes = Counter(types[m][i] for m, i in members)
+        best_type = max(type_votes, key=lambda name: type_votes[name])  # first wins ties
+        best_m, best_i = max(
+            members,
+            key=lambda member: (
+                scores[member[0]][member[1]],
+                len(columns[models[member[0]]].content[member[1]]),
+            ),
+        )
+        x0, y0, x1, y1 = (median(values) for values in zip(*(boxes[m][i] for m, i in members)))
+        best = columns[models[best_m]]
+        elements.append(
+            DocumentElement(
+                type=best_type,
+                content=best.content[best_i],
+                bbox={"x0": x0, "y0": y0, "x1": x1, "y1": y1},
+                page=int(best.pages[best_i]),
+                confidence=votes / len(models),
+            )
+        )
+
+    elements.sort(key=lambda element: (element.page, element.bbox.y0, element.bbox.x0))
+    return elements
+
+
+def compare_elements(
+    results: Dict[str, Any],
+    include_consensus: bool = False,
+    threshold: Optional[float] = None,
+    min_votes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Element-level agreement between model results
+
+    Args:
+        results: Model name -> ExtractionResponse
+        include_consensus: Also build the consensus element set
+        threshold: IoU needed for two elements to match (default:
+            CONSENSUS_IOU_THRESHOLD)
+        min_votes: Models that must agree for a consensus element (default:
+            CONSENSUS_MIN_VOTES, or a strict majority; at least 2)
+
+    Returns:
+        Dict with the settings used, a report per model pair and optionally
+        the consensus elements
+    """
+    start_time = time.perf_counter()
+    threshold = threshold if threshold is not None else settings.CONSENSUS_IOU_THRESHOLD
+    columns = {
+        name: ElementColumns.from_elements(result.elements)
+        for name, result in results.items()
+    }
+
+    matches = {
+        (name_a, name_b): match_elements(columns[name_a], columns[name_b], threshold)
+        for name_a, name_b in combinations(columns, 2)
+    }
+    report: Dict[str, Any] = {
+        "iou_threshold": threshold,
+        "pairs": {
+            f"{name_a}_vs_{name_b}": {
+                "reference": name_a,
+                "candidate": name_b,
+                **pair_report(columns[name_a], columns[name_b], pairs),
+            }
+            for (name_a, name_b), pairs in matches.items()
+        },
+    }
+
+    if include_consensus:
+        min_votes = max(2, min_votes or settings.CONSENSUS_MIN_VOTES or len(columns) // 2 + 1)
+        consensus = consensus_elements(columns, matches, min_votes)
+        report["consensus"] = {
+            "min_votes": min_votes,
+            "num_elements": len(consensus),
+            "elements": [element.model_dump(mode="json") for element in consensus],
+        }
+
+    report["elapsed"] = time.perf_counter() - start_time
+    return report
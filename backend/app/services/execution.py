@@ -0,0 +1,175 @@
+"""
+Execution Profiles
+Hardware detection, torch thread tuning and int8 quantization of model services
+"""
+import multiprocessing
+import os
+import sys
+from typing import Any, Optional
+from loguru import logger
+
+from app.config import settings
+from app.models.pipeline import ExecutionProfile
+
+
+PROFILES = ("auto", "gpu", "cpu")
+
+# torch's own thread count, captured before the first profile changes it
+_default_threads: Optional[int] = None
+
+
+def cuda_available() -> bool:
+    """Whether torch is installed and can see a CUDA device"""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def gpu_visible() -> bool:
+    """
+    Whether a CUDA device is visible, without importing torch
+
+    Asks torch once it is loaded; before that, looks for the NVIDIA driver's
+    device node so health checks stay cheap on a cold start.
+    """
+    if "torch" in sys.modules:
+        return cuda_available()
+    if os.environ.get("CUDA_VISIBLE_DEVICES") in ("", "-1"):
+        return False
+    return os.path.exists("/dev/nvidiactl")
+
+
+def worker_processes() -> int:
+    """Processes sharing this machine's cores for model inference"""
+    if multiprocessing.parent_process() is not None:
+        # A shard worker: SHARD_WORKERS of these run side by side
+        return max(1, settings.SHARD_WORKERS)
+    return 1
+
+
+def resolve_profile(name: Optional[str] = None) -> ExecutionProfile:
+    """
+    Build the execution profile for this process
+
+    Args:
+        name: "auto", "gpu" or "cpu" (default: EXECUTION_PROFILE). "auto"
+            picks gpu when a CUDA device is visible and cpu otherwise.
+
+    Returns:
+        ExecutionProfile with thread counts and quantization settings
+    """
+    name = (name or settings.EXECUTION_PROFILE).lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown execution profile: {name} (expected one of {', '.join(PROFILES)})")
+
+    if name == "auto":
+        name = "gpu" if cuda_available() else "cpu"
+
+    if name == "gpu":
+        return ExecutionProfile(name="gpu", device="cuda")
+
+    cores = os.cpu_count() or 1
+    return ExecutionProfile(
+        name="cpu",
+        device="cpu",
+        intra_op_threads=settings.CPU_INTRA_OP_THREADS or max(1, cores // worker_processes()),
+        inter_op_threads=settings.CPU_INTER_OP_THREADS,
+        quantize=settings.CPU_QUANTIZE,
+    )
+
+
+def default_profile() -> ExecutionProfile:
+    """Library defaults on the detected device: no thread tuning, no quantization"""
+    return ExecutionProfile(name="default", device="cuda" if cuda_available() else "cpu")
+
+
+def apply_profile(profile: ExecutionProfile) -> None:
+    """
+    Apply a profile's thread settings to this process
+
+    Thread pools are process-wide in torch, so this affects every model
+    loaded in the process. A forced cpu profile also hides CUDA devices
+    from libraries that have not initialised CUDA yet.
+    """
+    global _default_threads
+
+    if profile.device == "cpu" and settings.EXECUTION_PROFILE == "cpu":
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    if profile.intra_op_threads:
+        # Read by OpenMP/MKL if they have not started yet
+        os.environ.setdefault("OMP_NUM_THREADS", str(profile.intra_op_threads))
+        os.environ.setdefault("MKL_NUM_THREADS", str(profile.intra_op_threads))
+
+    try:
+        import torch
+    except ImportError:
+        return
+
+    if _default_threads is None:
+        _default_threads = torch.get_num_threads()
+    torch.set_num_threads(profile.intra_op_threads or _default_threads)
+    if profile.inter_op_threads:
+        try:
+            torch.set_num_interop_threads(profile.inter_op_threads)
+        except RuntimeError:
+            # Only settable before the first inter-op parallel work
+            logger.debug("Inter-op thread count already fixed for this process")
+
+    logger.info(
+        f"Execution profile {profile.name}: device={profile.device}, "
+        f"threads={torch.get_num_threads()}, quantize={profile.quantize}"
+    )
+
+
+def quantize_service(service: Any) -> int:
+    """
+    Dynamically quantize a service's torch models to int8 where possible
+
+    Every torch.nn.Module held directly by the service (or in a dict or
+    list attribute) has its Linear layers replaced by int8 dynamic
+    quantized ones. Modules on a GPU or that fail to quantize are left as
+    they are.
+
+    Args:
+        service: Loaded model service
+
+    Returns:
+        Number of modules quantized
+    """
+    try:
+        import torch
+    except ImportError:
+        return 0
+
+    try:
+        from torch.ao.quantization import quantize_dynamic
+    except ImportError:
+        from torch.quantization import quantize_dynamic
+
+    def quantize(module: Any) -> Any:
+        if not isinstance(module, torch.nn.Module):
+            return module
+        parameter = next(module.parameters(), None)
+        if parameter is not None and parameter.device.type != "cpu":
+            return module
+        try:
+            quantized = quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            logger.warning(f"Could not quantize {type(module).__name__}: {str(e)}")
+            return module
+        quantized_count[0] += 1
+        return quantized
+
+    quantized_count = [0]
+    for attribute, value in list(vars(service).items()):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                value[key] = quantize(item)
+        elif isinstance(value, list):
+            value[:] = [quantize(item) for item in value]
+        else:
+            setattr(service, attribute, quantize(value))
+
+    return quantized_count[0]
@@ -0,0 +1,309 @@
+"""
+Model Executors
+Runs blocking model inference off the event loop with bounded admission per model
+"""
+import asyncio
+import functools
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.services.sharding import extract_shard
+
+
+MODES = ("thread", "process")
+
+# Retry-After (seconds) before any request has finished, and bounds on the estimate
+DEFAULT_RETRY_AFTER = 5
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 300
+
+
+class ExecutorBusyError(Exception):
+    """Raised when a model executor cannot admit more requests"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _run_service(service: Any, method: str, *args: Any, **kwargs: Any) -> Any:
+    """Run an async service method to completion on a worker thread's own loop"""
+    return asyncio.run(getattr(service, method)(*args, **kwargs))
+
+
+class ModelExecutor:
+    """
+    Worker pool and admission counter for one model
+
+    In thread mode the process-wide service runs on dedicated threads, each
+    call on its own event loop, so a blocking model never stalls the API
+    loop. In process mode calls go to spawned worker processes that load
+    their own copy of the model, which also sidesteps the GIL for models
+    doing heavy Python work.
+
+    Admission is per request: at most workers + queue_size requests may
+    hold a slot, and the rest are refused with a Retry-After estimate.
+    """
+
+    def __init__(self, model: ModelType, mode: str, workers: int, queue_size: int):
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode for {model.value}: {mode}")
+        self.model = model
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+        self._admitted = 0
+        self._calls = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._completed = 0
+        self._request_seconds: Optional[float] = None  # moving average
+
+    @property
+    def in_process(self) -> bool:
+        """Whether the model runs in this process (and needs its service loaded here)"""
+        return self.mode == "thread"
+
+    async def extract(
+        self,
+        service: Any,
+        file_path: str,
+        task_id: str,
+        generate_annotations: bool,
+    ) -> Dict[str, Any]:
+        """
+        Run service.extract on the pool
+
+        Args:
+            service: The model's service (unused in process mode)
+            file_path: PDF to extract
+            task_id: Task identifier passed to the service
+            generate_annotations: Whether the service draws annotations
+
+        Returns:
+            Service result dict
+
+        Cancelling the awaiting task drops the call if it has not started;
+        a call already running finishes and its result is discarded.
+        """
+        loop = asyncio.get_running_loop()
+        if self.in_process:
+            future = loop.run_in_executor(
+                self._get_pool(),
+                functools.partial(
+                    _run_service,
+                    service,
+                    "extract",
+                    file_path=file_path,
+                    task_id=task_id,
+                    generate_annotations=generate_annotations,
+                ),
+            )
+        else:
+            future = loop.run_in_executor(
+                self._get_pool(),
+                extract_shard,
+                self.model.value,
+                file_path,
+                task_id,
+                generate_annotations,
+            )
+        return await self._track(future)
+
+    async def extract_batch(
+        self,
+        service: Any,
+        file_paths: List[str],
+        task_ids: List[str],
+    ) -> List[Dict[str, Any]]:
+        """Run service.extract_batch on the pool (thread mode only)"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_pool(),
+            _run_service,
+            service,
+            "extract_batch",
+            file_paths,
+            task_ids,
+        )
+        return await self._track(future)
+
+    def acquire(self) -> None:
+        """
+        Take a request slot
+
+        Raises:
+            ExecutorBusyError: If all slots are taken
+        """
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._rejected += 1
+                raise ExecutorBusyError(
+                    f"{self.model.value} is at capacity, try again later",
+                    self._retry_after(),
+                )
+            self._admitted += 1
+
+    def release(self, held_seconds: float) -> None:
+        """Give a request slot back, recording how long it was held"""
+        with self._lock:
+            self._admitted -= 1
+            if self._request_seconds is None:
+                self._request_seconds = held_seconds
+            else:
+                self._request_seconds = 0.8 * self._request_seconds + 0.2 * held_seconds
+
+    def stats(self) -> Dict[str, float]:
+        """Admission and pool counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "admitted": self._admitted,
+                "calls_in_flight": self._calls,
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the pool, dropping calls that have not started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to free up (lock held)"""
+        if self._request_seconds is None:
+            return DEFAULT_RETRY_AFTER
+        waiting = max(1, self._admitted - self.workers + 1)
+        estimate = math.ceil(self._request_seconds * waiting / self.workers)
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, estimate))
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.in_process:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix=f"model-{self.model.value}",
+                    )
+                else:
+                    # Spawned workers avoid inheriting CUDA state from the API process
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                logger.info(
+                    f"Started {self.workers} {self.mode} worker(s) for {self.model.value}"
+                )
+            return self._pool
+
+    async def _track(self, future: "asyncio.Future[Any]") -> Any:
+        """Await a pool call, counting it as in flight until it settles"""
+        with self._lock:
+            self._calls += 1
+        try:
+            result = await future
+        except asyncio.CancelledError:
+            with self._lock:
+                self._cancelled += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls -= 1
+        with self._lock:
+            self._completed += 1
+        return result
+
+
+class Admission:
+    """Request slots held on one or more model executors"""
+
+    def __init__(self, executors: List[ModelExecutor]):
+        self._executors: List[ModelExecutor] = []
+        self._start = time.monotonic()
+        try:
+            for executor in executors:
+                executor.acquire()
+                self._executors.append(executor)
+        except ExecutorBusyError:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """Give the slots back; safe to call more than once"""
+        held = time.monotonic() - self._start
+        while self._executors:
+            self._executors.pop().release(held)
+
+    def __enter__(self) -> "Admission":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class ModelExecutors:
+    """Executors for every model, created on first use"""
+
+    def __init__(self):
+        self._executors: Dict[ModelType, ModelExecutor] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: ModelType) -> ModelExecutor:
+        """The executor for a model"""
+        executor = self._executors.get(model)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(model)
+                if executor is None:
+                    executor = ModelExecutor(
+                        model=model,
+                        mode=settings.MODEL_EXECUTOR_MODE_OVERRIDES.get(
+                            model.value, settings.MODEL_EXECUTOR_MODE
+                        ),
+                        workers=settings.MODEL_EXECUTOR_WORKER_OVERRIDES.get(
+                            model.value, settings.MODEL_EXECUTOR_WORKERS
+                        ),
+                        queue_size=settings.MODEL_EXECUTOR_QUEUE_SIZE,
+                    )
+                    self._executors[model] = executor
+        return executor
+
+    def admit(self, models: Iterable[ModelType]) -> Admission:
+        """
+        Reserve a request slot on each model's executor
+
+        Raises:
+            ExecutorBusyError: If any of the models is at capacity (no slot
+                is kept in that case)
+        """
+        return Admission([self.get(model) for model in models])
+
+    def stats(self) -> Dict[str, float]:
+        """Counters of every executor in use, keyed model.counter"""
+        return {
+            f"{model.value}.{name}": value
+            for model, executor in list(self._executors.items())
+            for name, value in executor.stats().items()
+        }
+
+    def shutdown(self) -> None:
+        """Stop every pool"""
+        for executor in list(self._executors.values()):
+            executor.shutdown()
+
+
+# Shared model executors
+model_executors = ModelExecutors()
@@ -0,0 +1,375 @@
+"""
+Background Job Queue
+Runs extraction work outside the HTTP request and tracks its status
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from loguru import logger
+from pydantic import BaseModel
+
+from app.config import settings
+from app.models.pipeline import JobStatus
+from app.services.memory_budget import memory_budget
+from app.services.scheduler import BULK, extraction_scheduler
+
+
+# Scheduler pool of background jobs
+POOL = "jobs"
+
+
+@dataclass
+class Job:
+    """A unit of background extraction work"""
+    task_id: str
+    kind: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[str] = None  # JSON-serialised response
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept more work"""
+
+
+class JobStore(ABC):
+    """Persistence interface for job records"""
+
+    @abstractmethod
+    def create(self, job: Job) -> None:
+        """Store a new job"""
+
+    @abstractmethod
+    def update(self, task_id: str, **fields: Any) -> None:
+        """Update fields of an existing job"""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Job]:
+        """Fetch a job by task ID"""
+
+    def recover(self) -> int:
+        """Mark jobs left unfinished by a previous process as failed"""
+        return 0
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Job store kept in process memory
+
+    Finished jobs are dropped ttl seconds after they finish, and the oldest
+    finished jobs make way once max_jobs are stored.
+    """
+
+    def __init__(self, ttl: int = 0, max_jobs: int = 0):
+        """
+        Args:
+            ttl: Seconds a finished job is kept (0: no expiry)
+            max_jobs: Most jobs kept (0: no limit)
+        """
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Job) -> None:
+        with self._lock:
+            self._prune()
+            self._jobs[job.task_id] = job
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs[task_id]
+            for key, value in fields.items():
+                setattr(job, key, value)
+
+    def get(self, task_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(task_id)
+            return Job(**asdict(job)) if job else None
+
+    def _prune(self) -> None:
+        """Drop expired finished jobs, then the oldest beyond max_jobs"""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at,
+        )
+        if self.ttl:
+            cutoff = time.time() - self.ttl
+            while finished and finished[0].finished_at < cutoff:
+                del self._jobs[finished.pop(0).task_id]
+        if self.max_jobs:
+            while finished and len(self._jobs) >= self.max_jobs:
+                del self._jobs[finished.pop(0).task_id]
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by a local SQLite database"""
+
+    COLUMNS = [
+        "task_id", "kind", "status", "created_at", "started_at",
+        "finished_at", "error", "result", "metadata",
+    ]
+
+    def __init__(self, path: str, ttl: int = 0):
+        """
+        Args:
+            path: Database file
+            ttl: Seconds a finished job is kept (0: no expiry)
+        """
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    task_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    error TEXT,
+                    result TEXT,
+                    metadata TEXT
+                )
+                """
+            )
+
+    def create(self, job: Job) -> None:
+        row = asdict(job)
+        row["status"] = job.status.value
+        row["metadata"] = json.dumps(job.metadata)
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self._conn:
+            if self.ttl:
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE finished_at < ?",
+                    (time.time() - self.ttl,),
+                )
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [row[column] for column in self.COLUMNS],
+            )
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        if "status" in fields:
+            fields["status"] = JobStatus(fields["status"]).value
+        if "metadata" in fields:
+            fields["metadata"] = json.dumps(fields["metadata"])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE task_id = ?",
+                [*fields.values(), task_id],
+            )
+
+    def get(self, task_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        data = dict(zip(self.COLUMNS, row))
+        data["status"] = JobStatus(data["status"])
+        data["metadata"] = json.loads(data["metadata"] or "{}")
+        return Job(**data)
+
+    def recover(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status IN (?, ?)",
+                (
+                    JobStatus.FAILED.value,
+                    "Interrupted by server restart",
+                    time.time(),
+                    JobStatus.QUEUED.value,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+        return cursor.rowcount
+
+
+def create_job_store() -> JobStore:
+    """Build the job store selected by JOB_STORE_BACKEND"""
+    backend = settings.JOB_STORE_BACKEND.lower()
+    # Job records expire with the task results they point to
+    if backend == "memory":
+        return InMemoryJobStore(settings.RESULT_TTL_SECONDS, settings.JOB_STORE_MAX_JOBS)
+    if backend == "sqlite":
+        return SQLiteJobStore(settings.JOB_STORE_PATH, settings.RESULT_TTL_SECONDS)
+    raise ValueError(f"Unknown job store backend: {settings.JOB_STORE_BACKEND}")
+
+
+JobRunner = Callable[[], Awaitable[BaseModel]]
+
+
+class JobQueue:
+    """
+    Bounded queue of extraction jobs run in the background
+
+    Jobs start in the extraction scheduler's fair order as bulk work, at
+    most `workers` at a time.
+    """
+
+    def __init__(self, store: JobStore, max_size: int, workers: int):
+        self.store = store
+        self.max_size = max_size
+        self.workers = max(1, workers)
+        self._queued: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        extraction_scheduler.limit_pool(POOL, self.workers)
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to start"""
+        return len(self._queued)
+
+    async def start(self) -> None:
+        """Start accepting jobs"""
+        if self._executor:
+            return
+
+        recovered = self.store.recover()
+        if recovered:
+            logger.warning(f"Marked {recovered} interrupted jobs as failed")
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="job",
+        )
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Cancel outstanding jobs and stop accepting new ones"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(
+        self,
+        task_id: str,
+        kind: str,
+        runner: JobRunner,
+        metadata: Optional[Dict[str, Any]] = None,
+        client: str = "",
+        cost: float = 1.0,
+        discard: Optional[Callable[[], None]] = None,
+    ) -> Job:
+        """
+        Queue a job without waiting for it to run
+
+        Args:
+            task_id: Unique task identifier
+            kind: Job type, e.g. "single" or "compare"
+            runner: Coroutine factory producing the job's response model
+            metadata: Job parameters reported with the status
+            client: Client the job is scheduled for
+            cost: Estimated cost (pages times models)
+            discard: Called if the job ends without its runner starting
+                (cancelled or failed while queued), to free what the
+                runner would have
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the queue is full or not running
+        """
+        if self._executor is None:
+            raise QueueFullError("Job queue is not running")
+        if self.depth >= self.max_size:
+            raise QueueFullError("Job queue is full, try again later")
+
+        job = Job(task_id=task_id, kind=kind, metadata=metadata or {})
+        self.store.create(job)
+        self._queued.add(task_id)
+        task = asyncio.create_task(self._run(task_id, runner, client, cost, discard))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, task_id: str) -> Optional[Job]:
+        """Fetch a job by task ID"""
+        return self.store.get(task_id)
+
+    def position(self, task_id: str) -> Optional[int]:
+        """Place of a queued job in the extraction scheduler's queue"""
+        return extraction_scheduler.position(task_id)
+
+    async def _run(
+        self,
+        task_id: str,
+        runner: JobRunner,
+        client: str,
+        cost: float,
+        discard: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Wait for the job's turn, then run it"""
+        loop = asyncio.get_running_loop()
+        started = threading.Event()
+
+        def run() -> BaseModel:
+            started.set()
+            return asyncio.run(runner())
+
+        try:
+            async with extraction_scheduler.slot(task_id, client, BULK, cost, pool=POOL):
+                self._queued.discard(task_id)
+                # Jobs stay queued while memory is near the ceiling
+                await memory_budget.wait()
+                self.store.update(
+                    task_id,
+                    status=JobStatus.RUNNING,
+                    started_at=time.time(),
+                )
+                # Each job gets its own event loop on an executor thread so
+                # model inference never blocks the API loop
+                result = await loop.run_in_executor(self._executor, run)
+            self.store.update(
+                task_id,
+                status=JobStatus.COMPLETED,
+                finished_at=time.time(),
+                result=result.model_dump_json(),
+            )
+            logger.info(f"Job {task_id} completed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {task_id} failed: {str(e)}", exc_info=True)
+            self.store.update(
+                task_id,
+                status=JobStatus.FAILED,
+                finished_at=time.time(),
+                error=str(e),
+            )
+        finally:
+            self._queued.discard(task_id)
+            if discard is not None and not started.is_set():
+                discard()
+
+
+# Shared job queue
+job_queue = JobQueue(
+    store=create_job_store(),
+    max_size=settings.JOB_QUEUE_MAX_SIZE,
+    workers=settings.JOB_WORKERS,
+)
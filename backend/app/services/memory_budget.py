@@ -0,0 +1,185 @@
+"""
+Memory Budget
+Per-task peak RSS tracking and admission against a process memory ceiling
+"""
+import asyncio
+import gc
+import threading
+import time
+from typing import Dict, Optional, Set
+from loguru import logger
+
+from app.config import settings
+from app.utils.memory import current_rss
+
+
+# Seconds between RSS samples while tasks are being tracked
+SAMPLE_INTERVAL = 0.05
+
+# Seconds between memory checks while work waits for headroom
+WAIT_POLL_INTERVAL = 0.25
+
+# Retry-After (seconds) for work refused for lack of memory
+RETRY_AFTER = 10
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when memory use stays too close to the ceiling to admit work"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TaskMemory:
+    """Process RSS observed while one task was running"""
+
+    def __init__(self, task_id: str, start_bytes: int):
+        self.task_id = task_id
+        self.start_bytes = start_bytes
+        self.peak_bytes = start_bytes
+
+    @property
+    def delta_bytes(self) -> int:
+        """Peak growth over the RSS when the task started"""
+        return max(0, self.peak_bytes - self.start_bytes)
+
+
+class MemoryBudget:
+    """
+    Watches process RSS against MEMORY_CEILING_BYTES
+
+    New work waits while RSS is above the high-water mark (a share of the
+    ceiling) and is refused if it is still there after the queue timeout.
+    Running tasks are sampled by one shared thread, so each task records
+    the peak RSS of the process while it ran; tasks running side by side
+    see each other's memory in that figure.
+    """
+
+    def __init__(self, ceiling_bytes: int, high_water: float, queue_timeout: float):
+        self.ceiling_bytes = ceiling_bytes
+        self.high_water = high_water
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._tasks: Set[TaskMemory] = set()
+        self._sampler: Optional[threading.Thread] = None
+        self._stats: Dict[str, int] = {
+            "waiting": 0,
+            "queued": 0,
+            "refused": 0,
+            "peak_rss_bytes": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a ceiling is configured"""
+        return self.ceiling_bytes > 0
+
+    @property
+    def threshold_bytes(self) -> int:
+        """RSS above which new work waits"""
+        return int(self.ceiling_bytes * self.high_water)
+
+    def has_headroom(self) -> bool:
+        """Whether RSS is below the high-water mark (always true without a ceiling)"""
+        return not self.enabled or current_rss() < self.threshold_bytes
+
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait until there is memory headroom for new work
+
+        Args:
+            timeout: Seconds to wait before giving up (None: wait as long
+                as it takes, as background jobs do)
+
+        Raises:
+            MemoryBudgetExceeded: If RSS is still above the high-water mark
+                after the timeout
+        """
+        if self.has_headroom():
+            return
+
+        # Garbage from finished work may be all that is in the way
+        gc.collect()
+        if self.has_headroom():
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        self._count(waiting=1, queued=1)
+        try:
+            while not self.has_headroom():
+                if deadline is not None and loop.time() >= deadline:
+                    self._count(refused=1)
+                    raise MemoryBudgetExceeded(
+                        f"Memory use is near the {self.ceiling_bytes // (1024 * 1024)}MB "
+                        f"ceiling, try again later",
+                        RETRY_AFTER,
+                    )
+                await asyncio.sleep(WAIT_POLL_INTERVAL)
+        finally:
+            self._count(waiting=-1)
+
+    def track(self, task_id: str) -> TaskMemory:
+        """Start recording the peak RSS for a task; pair with untrack"""
+        memory = TaskMemory(task_id, current_rss())
+        with self._lock:
+            self._tasks.add(memory)
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample, name="memory-sampler", daemon=True
+                )
+                self._sampler.start()
+        return memory
+
+    def untrack(self, memory: TaskMemory) -> None:
+        """Stop recording a task, taking a final sample"""
+        memory.peak_bytes = max(memory.peak_bytes, current_rss())
+        with self._lock:
+            self._tasks.discard(memory)
+        if self.enabled and memory.peak_bytes >= self.ceiling_bytes:
+            logger.warning(
+                f"Task {memory.task_id} reached {memory.peak_bytes // (1024 * 1024)}MB RSS, "
+                f"over the {self.ceiling_bytes // (1024 * 1024)}MB ceiling"
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Current RSS, the ceiling and admission counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["tasks_tracked"] = len(self._tasks)
+        stats.update(
+            rss_bytes=current_rss(),
+            ceiling_bytes=self.ceiling_bytes,
+            threshold_bytes=self.threshold_bytes,
+        )
+        return stats
+
+    def _sample(self) -> None:
+        """Sampler thread: update every tracked task's peak until none is left"""
+        while True:
+            with self._lock:
+                if not self._tasks:
+                    self._sampler = None
+                    return
+                tasks = list(self._tasks)
+            rss = current_rss()
+            for memory in tasks:
+                memory.peak_bytes = max(memory.peak_bytes, rss)
+            with self._lock:
+                self._stats["peak_rss_bytes"] = max(self._stats["peak_rss_bytes"], rss)
+            time.sleep(SAMPLE_INTERVAL)
+
+    def _count(self, **amounts: int) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+
+# Shared memory budget
+memory_budget = MemoryBudget(
+    ceiling_bytes=settings.MEMORY_CEILING_BYTES,
+    high_water=settings.MEMORY_HIGH_WATER,
+    queue_timeout=settings.MEMORY_QUEUE_TIMEOUT,
+)
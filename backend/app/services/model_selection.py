@@ -0,0 +1,283 @@
+"""
+Model Selection
+Picks the fastest model expected to extract a document well enough (model=auto)
+"""
+import functools
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.models.pipeline import DocumentAnalysis, ModelCandidate, ModelSelection
+from app.benchmarks.results import measured_throughput
+from app.services.registry import supported_models
+from app.services.text_layer import classify_page
+
+
+AUTO = "auto"
+
+# Expected quality (0-1) of each model on pages with each feature, from the
+# models' documented strengths and limitations; a page with several
+# features counts at the model's weakest. Override with AUTO_MODEL_QUALITY.
+QUALITY_PRIORS: Dict[ModelType, Dict[str, float]] = {
+    ModelType.DOCLING: {"text": 0.9, "table": 0.9, "equation": 0.8, "scanned": 0.75, "non_latin": 0.6},
+    ModelType.MINERU: {"text": 0.85, "table": 0.65, "equation": 0.9, "scanned": 0.7, "non_latin": 0.55},
+    ModelType.SURYA: {"text": 0.85, "table": 0.45, "equation": 0.3, "scanned": 0.85, "non_latin": 0.9},
+}
+
+# Model seconds per page assumed until the benchmark report measures them
+# (midpoints of the per-page estimates in the model information)
+DEFAULT_SECONDS_PER_PAGE: Dict[ModelType, float] = {
+    ModelType.DOCLING: 7.5,
+    ModelType.MINERU: 5.0,
+    ModelType.SURYA: 3.5,
+}
+
+# Font name fragments of TeX and other math fonts
+MATH_FONTS = ("CMMI", "CMSY", "CMEX", "MSAM", "MSBM", "Math", "STIX")
+
+# Image coverage above which a page without a text layer counts as scanned
+SCANNED_IMAGE_COVERAGE = 0.5
+
+
+@dataclass
+class PageFeatures:
+    """Features of one sampled page that bear on model quality"""
+    page: int  # 1-indexed
+    text_native: bool  # the text-layer fast path can take it
+    features: FrozenSet[str]  # table, equation, scanned, non_latin
+    scripts: Dict[str, int]  # letters per Unicode script
+
+
+@functools.lru_cache(maxsize=4096)
+def _script(char: str) -> str:
+    """Unicode script of a letter, from its character name"""
+    return unicodedata.name(char, "UNKNOWN").split(" ")[0].lower()
+
+
+def _is_math_symbol(char: str) -> bool:
+    return (ord(char) > 127 and unicodedata.category(char) == "Sm") or _script(char) == "mathematical"
+
+
+def analyse_page(page: Any) -> PageFeatures:
+    """Profile a PyMuPDF page: text layer, tables, equations and scripts"""
+    profile = classify_page(page)
+    scripts: Dict[str, int] = {}
+    math_symbols = 0
+
+    # flags=0: text only, so image blocks are not decoded
+    for block in page.get_text("dict", flags=0)["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            for span in line["spans"]:
+                text = span["text"]
+                if any(fragment in span["font"] for fragment in MATH_FONTS):
+                    math_symbols += len(text.strip())
+                    continue
+                for char in text:
+                    if _is_math_symbol(char):
+                        math_symbols += 1
+                    elif char.isalpha():
+                        script = _script(char)
+                        scripts[script] = scripts.get(script, 0) + 1
+
+    features = set()
+    if profile.ruled_table:
+        features.add("table")
+    if math_symbols >= settings.AUTO_MODEL_EQUATION_SYMBOLS:
+        features.add("equation")
+    if profile.chars < settings.TEXT_LAYER_MIN_CHARS and profile.image_coverage >= SCANNED_IMAGE_COVERAGE:
+        features.add("scanned")
+    letters = sum(scripts.values())
+    if letters and scripts.get("latin", 0) < letters / 2:
+        features.add("non_latin")
+
+    return PageFeatures(
+        page=profile.page,
+        text_native=profile.text_native,
+        features=frozenset(features),
+        scripts=scripts,
+    )
+
+
+def _sample(num_pages: int, count: int) -> List[int]:
+    """Up to count 0-indexed page numbers spread evenly over the document"""
+    if num_pages <= count:
+        return list(range(num_pages))
+    if count <= 1:
+        return [0]
+    return sorted({round(i * (num_pages - 1) / (count - 1)) for i in range(count)})
+
+
+def analyse_document(file_path: str) -> Tuple[DocumentAnalysis, List[PageFeatures]]:
+    """
+    Profile a sample of a PDF's pages (AUTO_MODEL_SAMPLE_PAGES)
+
+    Returns:
+        The document summary and the features of each sampled page
+    """
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        num_pages = doc.page_count
+        pages = [analyse_page(doc[n]) for n in _sample(num_pages, settings.AUTO_MODEL_SAMPLE_PAGES)]
+
+    scripts: Dict[str, int] = {}
+    for page in pages:
+        for script, count in page.scripts.items():
+            scripts[script] = scripts.get(script, 0) + count
+    letters = sum(scripts.values())
+
+    def with_feature(name: str) -> int:
+        return sum(1 for page in pages if name in page.features)
+
+    analysis = DocumentAnalysis(
+        pages=num_pages,
+        sampled_pages=len(pages),
+        text_native_pages=sum(1 for page in pages if page.text_native),
+        scanned_pages=with_feature("scanned"),
+        table_pages=with_feature("table"),
+        equation_pages=with_feature("equation"),
+        non_latin_pages=with_feature("non_latin"),
+        scripts={
+            script: round(count / letters, 3)
+            for script, count in sorted(scripts.items(), key=lambda item: -item[1])
+        },
+    )
+    return analysis, pages
+
+
+def _quality_priors(model: ModelType) -> Dict[str, float]:
+    return {**QUALITY_PRIORS.get(model, {}), **settings.AUTO_MODEL_QUALITY.get(model.value, {})}
+
+
+def _seconds_per_page(model: ModelType) -> Tuple[float, bool]:
+    """
+    Model time per page, measured when the benchmark report has it
+
+    Only the raw service figures are used: score_model scales by the share
+    of pages the model gets, which must not already be averaged in.
+    """
+    measured = measured_throughput(model, sections=("services",))
+    if measured and measured.get("seconds_per_page"):
+        return float(measured["seconds_per_page"]), True
+    return DEFAULT_SECONDS_PER_PAGE.get(model, max(DEFAULT_SECONDS_PER_PAGE.values())), False
+
+
+def score_model(model: ModelType, analysis: DocumentAnalysis, pages: List[PageFeatures]) -> ModelCandidate:
+    """
+    Expected quality and model time of one model on a profiled document
+
+    Pages the text-layer fast path takes are extracted the same way by
+    every model, so only the rest count toward quality and time.
+    """
+    priors = _quality_priors(model)
+    base = priors.get("text", 1.0)
+    model_pages = [
+        page for page in pages
+        if not (settings.TEXT_FAST_PATH_ENABLED and page.text_native)
+    ]
+    if model_pages:
+        quality = sum(
+            min((priors.get(name, base) for name in page.features), default=base)
+            for page in model_pages
+        ) / len(model_pages)
+    else:
+        quality = 1.0
+
+    seconds_per_page, measured = _seconds_per_page(model)
+    share = len(model_pages) / len(pages) if pages else 1.0
+    return ModelCandidate(
+        model=model,
+        expected_quality=round(quality, 3),
+        estimated_seconds=round(analysis.pages * share * seconds_per_page, 2),
+        seconds_per_page=seconds_per_page,
+        measured=measured,
+        meets_threshold=quality >= settings.AUTO_MODEL_QUALITY_THRESHOLD,
+    )
+
+
+def _describe(analysis: DocumentAnalysis) -> str:
+    """Short summary of a document profile for the selection reason"""
+    counts = [
+        f"{count} {label}"
+        for count, label in (
+            (analysis.table_pages, "with tables"),
+            (analysis.equation_pages, "with equations"),
+            (analysis.scanned_pages, "scanned"),
+            (analysis.non_latin_pages, "non-Latin"),
+        )
+        if count
+    ]
+    summary = f"{analysis.pages} pages ({analysis.sampled_pages} sampled"
+    summary += f": {', '.join(counts)})" if counts else ", plain text)"
+    if analysis.scripts:
+        summary += f", mostly {next(iter(analysis.scripts))} script"
+    return summary
+
+
+def select_model(file_path: str, models: Optional[List[ModelType]] = None) -> ModelSelection:
+    """
+    Choose the fastest model expected to reach AUTO_MODEL_QUALITY_THRESHOLD
+
+    Args:
+        file_path: Source PDF
+        models: Models to choose from (default: SUPPORTED_MODELS)
+
+    Returns:
+        The chosen model with the analysis and every candidate's scores;
+        if no model is expected to reach the threshold, the one expected to
+        do best is chosen
+
+    Raises:
+        ValueError: If there are no models to choose from
+    """
+    models = models if models is not None else supported_models()
+    if not models:
+        raise ValueError("No models are available for automatic selection")
+
+    threshold = settings.AUTO_MODEL_QUALITY_THRESHOLD
+    analysis, pages = analyse_document(file_path)
+    candidates = sorted(
+        (score_model(model, analysis, pages) for model in models),
+        key=lambda c: (c.estimated_seconds, c.seconds_per_page, -c.expected_quality),
+    )
+    description = _describe(analysis)
+
+    passing = [c for c in candidates if c.meets_threshold]
+    if passing:
+        chosen = passing[0]
+        if not analysis.sampled_pages or (
+            settings.TEXT_FAST_PATH_ENABLED and analysis.text_native_pages == analysis.sampled_pages
+        ):
+            reason = (
+                f"{chosen.model.value} is the fastest model; every sampled page takes the "
+                f"text-layer fast path ({description})"
+            )
+        else:
+            reason = (
+                f"{chosen.model.value} is the fastest model expected to reach quality "
+                f"{threshold:.2f} (expected {chosen.expected_quality:.2f}, "
+                f"~{chosen.estimated_seconds:.1f}s of model time) for {description}"
+            )
+            faster = candidates[:candidates.index(chosen)]
+            if faster:
+                reason += "; faster " + ", ".join(
+                    f"{c.model.value} ({c.expected_quality:.2f})" for c in faster
+                ) + " fell short"
+    else:
+        chosen = max(candidates, key=lambda c: (c.expected_quality, -c.estimated_seconds))
+        reason = (
+            f"No model is expected to reach quality {threshold:.2f} for {description}; "
+            f"{chosen.model.value} is expected to do best ({chosen.expected_quality:.2f})"
+        )
+
+    return ModelSelection(
+        model=chosen.model,
+        reason=reason,
+        quality_threshold=threshold,
+        analysis=analysis,
+        candidates=candidates,
+    )
@@ -0,0 +1,218 @@
+"""
+Page Cache
+Per-page extraction results keyed by page content fingerprints
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import DocumentElement
+from app.services.annotations import element_dict
+from app.services.sharding import shift_page
+
+
+@dataclass
+class PagePlan:
+    """How one page of a document will be extracted"""
+    page: int  # 1-indexed
+    route: str  # "text_layer" or a model name
+    cache_key: Optional[str] = None  # page cache key (per-page reuse enabled)
+    cached: Optional[Dict[str, Any]] = None  # reusable result from the page cache
+
+
+def fingerprint_pages(file_path: str) -> List[str]:
+    """
+    Content fingerprint of every page of a PDF
+
+    Hashes each page's geometry, content stream, the raw streams of the
+    images and form XObjects it draws and the fonts it uses. Pages whose
+    fingerprint is unchanged between two revisions of a document render
+    identically, whatever else changed in the file.
+    """
+    import fitz
+
+    fingerprints = []
+    stream_digests: Dict[int, bytes] = {}
+
+    with fitz.open(file_path) as doc:
+
+        def stream_digest(xref: int) -> bytes:
+            if xref not in stream_digests:
+                stream_digests[xref] = hashlib.sha256(doc.xref_stream_raw(xref) or b"").digest()
+            return stream_digests[xref]
+
+        for page in doc:
+            digest = hashlib.sha256()
+            digest.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+            digest.update(page.read_contents())
+            for image in page.get_images(full=True):
+                digest.update(stream_digest(image[0]))
+            for xobject in page.get_xobjects():
+                digest.update(stream_digest(xobject[0]))
+            for font in page.get_fonts(full=True):
+                digest.update(repr(font[1:5]).encode())
+            fingerprints.append(digest.hexdigest())
+
+    return fingerprints
+
+
+class PageCache:
+    """
+    Size-bounded LRU store of single-page extraction results
+
+    An entry holds the elements (with page numbers rebased to 1) and
+    markdown extracted from one page by one route, so a later revision of a
+    document only has to re-extract the pages that changed.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(fingerprint: str, route: str) -> str:
+        """Build the cache key for a page fingerprint and extraction route"""
+        return hashlib.sha256(f"{fingerprint}:{route}".encode()).hexdigest()
+
+    def get(self, key: str, page: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached page result
+
+        Args:
+            key: Cache key from make_key
+            page: Page number the result should be placed on
+
+        Returns:
+            Dict with elements and markdown_content, or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            path = self._path(key)
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping unreadable page cache entry {key}: {str(e)}")
+                self._remove(key)
+                self.hits -= 1
+                self.misses += 1
+                return None
+
+        return {
+            "elements": [
+                shift_page(DocumentElement.model_validate(element), page - 1)
+                for element in data["elements"]
+            ],
+            "markdown_content": data["markdown_content"],
+        }
+
+    def put(self, key: str, page: int, elements: List[Any], markdown_content: str) -> None:
+        """
+        Store the result of one page
+
+        Args:
+            key: Cache key from make_key
+            page: Page number the elements are currently on
+            elements: Elements of that page
+            markdown_content: Markdown of that page
+        """
+        data = {
+            "elements": [
+                element_dict(shift_page(element, 1 - page)) for element in elements
+            ],
+            "markdown_content": markdown_content,
+        }
+        path = self._path(key)
+        staging = path.with_name(f".{key}.{uuid.uuid4().hex}")
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            staging.write_text(json.dumps(data), encoding="utf-8")
+            size = staging.stat().st_size
+
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                os.replace(staging, path)
+                self._entries[key] = size
+                self._total_bytes += size
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Could not cache page result {key}: {str(e)}")
+        finally:
+            if staging.exists():
+                staging.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from entries already on disk"""
+        entries = []
+        for path in self.root.glob("*/*"):
+            if path.name.startswith("."):
+                path.unlink(missing_ok=True)
+            else:
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under the size limit"""
+        while self._entries and self._total_bytes > self.max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry from disk and the index"""
+        self._total_bytes -= self._entries.pop(key, 0)
+        self._path(key).unlink(missing_ok=True)
+
+
+# Shared page cache
+page_cache = PageCache(
+    root=Path(settings.RESULTS_DIR) / "_pages",
+    max_bytes=settings.PAGE_CACHE_MAX_BYTES,
+)
@@ -3,8 +3,14 @@ PDF Processing Service
 Coordinates different extraction models
 """
 import os
+import gc
+import asyncio
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Optional, AsyncIterator, Union
 from loguru import logger
 import time
 
@@ -15,22 +21,43 @@ from app.models.schemas import (
     ExtractionMetrics,
     DocumentElement,
 )
-from app.services.models.docling_service import DoclingService
-from app.services.models.mineru_service import MinerUService
-from app.services.models.surya_service import SuryaService
+from app.models.pipeline import (
+    PageResult,
+    StreamComplete,
+    ExtractionResult,
+    ProcessingDetails,
+)
+from app.services.registry import ModelRegistry, model_registry
+from app.services.result_cache import result_cache
+from app.services import sharding, annotations, text_layer
+from app.services.page_cache import PagePlan, page_cache, fingerprint_pages
+from app.services.telemetry import StageTimer, metrics
+from app.services.batching import inference_batcher
+from app.services.executors import model_executors
+from app.services.raster import page_images
+from app.services.memory_budget import memory_budget
+from app.services.spill import PageSpill
+from app.utils.file_utils import compute_file_hash
 
 
 class PDFProcessor:
     """Main PDF processing orchestrator"""
     
-    def __init__(self):
-        """Initialize all model services"""
-        self.services = {
-            ModelType.DOCLING: DoclingService(),
-            ModelType.MINERU: MinerUService(),
-            ModelType.SURYA: SuryaService(),
-        }
-        logger.info("PDF Processor initialized with Docling and MinerU models")
+    def __init__(self, registry: ModelRegistry = model_registry):
+        """
+        Initialize processor
+        
+        Args:
+            registry: Model registry; services load on first use and are
+                shared by every processor using the same registry
+        """
+        self.services = registry
+        self._compare_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.COMPARE_MAX_CONCURRENCY),
+            thread_name_prefix="compare",
+        )
+        self._shard_pool: Optional[ProcessPoolExecutor] = None
+        logger.info("PDF Processor initialized")
     
     async def process_pdf(
         self,
@@ -38,7 +65,11 @@ class PDFProcessor:
         model: ModelType,
         task_id: str,
         generate_annotations: bool = True,
-    ) -> ExtractionResponse:
+        file_hash: Optional[str] = None,
+        timer: Optional[StageTimer] = None,
+        text_fast_path: Optional[bool] = None,
+        spill: Optional[bool] = None,
+    ) -> ExtractionResult:
         """
         Process PDF with specified model
         
@@ -47,34 +78,150 @@ class PDFProcessor:
             model: Model to use
             task_id: Unique task identifier
             generate_annotations: Whether to generate visual annotations
+            file_hash: SHA-256 of the file, computed here if not given
+            timer: Stage timer to continue (e.g. one that already timed the upload)
+            text_fast_path: Extract text-native pages from the PDF text layer
+                and only send the rest to the model (default:
+                TEXT_FAST_PATH_ENABLED)
+            spill: Extract one page at a time and write each page's results
+                to disk instead of collecting them (default:
+                MEMORY_BUDGET_MODE). The returned result then has empty
+                elements and markdown, and processing.spilled set; the
+                content is read back from the task directory (see
+                app.services.spill). The result cache is not used.
             
         Returns:
-            ExtractionResponse with results
+            ExtractionResult with results and per-stage timings
         """
         start_time = time.time()
+        timer = timer or StageTimer()
+        if text_fast_path is None:
+            text_fast_path = settings.TEXT_FAST_PATH_ENABLED
+        if spill is None:
+            spill = settings.MEMORY_BUDGET_MODE
+        task_memory = memory_budget.track(task_id)
         
         try:
-            # Get appropriate service
-            service = self.services[model]
+            # Serve repeated uploads from the result cache
+            cache_key = None
+            if settings.RESULT_CACHE_ENABLED and not spill:
+                with timer.stage("cache_lookup"):
+                    file_hash = file_hash or await asyncio.to_thread(
+                        compute_file_hash, file_path
+                    )
+                    cache_key = result_cache.make_key(
+                        file_hash, model, generate_annotations, text_fast_path
+                    )
+                    cached = result_cache.get(cache_key, task_id)
+                if cached is not None:
+                    logger.info(f"Result cache hit for {model.value} ({cache_key[:12]})")
+                    cached.processing = ProcessingDetails(
+                        stage_timings=timer.timings,
+                        cache_hit=True,
+                    )
+                    timer.record(model)
+                    return cached
             
-            # Extract content
-            logger.info(f"Starting extraction with {model.value}")
-            result = await service.extract(
-                file_path=file_path,
-                task_id=task_id,
-                generate_annotations=generate_annotations,
+            # Decide per page: reuse a cached page, read the text layer or run the model
+            plans = None
+            if text_fast_path or settings.PAGE_REUSE_ENABLED:
+                with timer.stage("page_plan"):
+                    plans = await asyncio.to_thread(
+                        self._plan_pages, file_path, model, text_fast_path
+                    )
+            if spill and plans is None:
+                num_pages = await asyncio.to_thread(sharding.count_pages, file_path)
+                plans = [PagePlan(page=n, route=model.value) for n in range(1, num_pages + 1)]
+            reused_pages = [p.page for p in plans or [] if p.cached is not None]
+            text_layer_pages = [
+                p.page for p in plans or []
+                if p.cached is None and p.route == "text_layer"
+            ]
+            
+            # Get appropriate service (not needed when no page goes to the model)
+            model_pages = None if plans is None else [
+                p.page for p in plans
+                if p.cached is None and p.route == model.value
+            ]
+            service = None
+            page_dpi = {}
+            if model_pages is None or model_pages:
+                with timer.stage("model_load"):
+                    service = await asyncio.to_thread(self._service, model)
+                if settings.RASTER_PRERENDER:
+                    # Services otherwise render at DEFAULT_DPI themselves, so
+                    # per-page DPIs are only chosen for pages rendered here
+                    if settings.DPI_POLICY != "fixed":
+                        with timer.stage("dpi_select"):
+                            dpis = await asyncio.to_thread(page_images.page_dpis, file_path)
+                        page_dpi = {
+                            page: dpis[page - 1]
+                            for page in model_pages or range(1, len(dpis) + 1)
+                        }
+                    # Render the model's pages once into the shared page image cache
+                    with timer.stage("rasterise"):
+                        await asyncio.to_thread(
+                            page_images.render, file_path, None, model_pages
+                        )
+            
+            # Extract content (annotations are drawn later, on request, in lazy
+            # mode; page-routed results are always indexed that way)
+            lazy_annotations = generate_annotations and (
+                settings.LAZY_ANNOTATIONS or plans is not None
             )
+            logger.info(f"Starting extraction with {model.value}")
+            if spill:
+                page_spill = await self._extract_spilled(
+                    service=service,
+                    model=model,
+                    file_path=file_path,
+                    task_id=task_id,
+                    plans=plans,
+                    timer=timer,
+                    index_annotations=lazy_annotations,
+                )
+                result = {"elements": [], "markdown_content": "", "annotations_url": None}
+            elif plans is None:
+                with timer.stage("inference"):
+                    result = await self._extract(
+                        service=service,
+                        model=model,
+                        file_path=file_path,
+                        task_id=task_id,
+                        generate_annotations=generate_annotations and not lazy_annotations,
+                    )
+            else:
+                result = await self._extract_routed(
+                    service=service,
+                    model=model,
+                    file_path=file_path,
+                    task_id=task_id,
+                    plans=plans,
+                    timer=timer,
+                )
+            
+            if lazy_annotations:
+                if not spill:  # spilled pages are indexed as they finish
+                    with timer.stage("annotation_index"):
+                        annotations.store_page_index(task_id, file_path, result["elements"])
+                result["annotations_url"] = (
+                    f"{settings.API_V1_PREFIX}/extract/annotations/{task_id}"
+                )
             
             # Calculate metrics
-            extraction_time = time.time() - start_time
-            metrics = self._calculate_metrics(
-                result["elements"],
-                result["markdown_content"],
-                extraction_time,
-            )
+            with timer.stage("metrics"):
+                extraction_time = time.time() - start_time
+                if spill:
+                    metrics = page_spill.metrics(extraction_time)
+                else:
+                    metrics = self._calculate_metrics(
+                        result["elements"],
+                        result["markdown_content"],
+                        extraction_time,
+                    )
             
             # Prepare response
-            response = ExtractionResponse(
+            response = ExtractionResult(
                 task_id=task_id,
                 model=model,
                 status="completed",
@@ -84,12 +231,29 @@ class PDFProcessor:
                 annotations_url=result.get("annotations_url"),
             )
             
-            # Save markdown
-            await self._save_markdown(task_id, result["markdown_content"])
+            # Save markdown (already on disk when spilled)
+            if not spill:
+                with timer.stage("save_markdown"):
+                    await self._save_markdown(task_id, result["markdown_content"])
+            
+            if cache_key:
+                with timer.stage("cache_store"):
+                    result_cache.put(cache_key, response)
+            
+            memory_budget.untrack(task_memory)
+            response.processing = ProcessingDetails(
+                stage_timings=timer.timings,
+                text_layer_pages=text_layer_pages,
+                reused_pages=reused_pages,
+                page_dpi=page_dpi,
+                peak_rss_bytes=task_memory.peak_bytes,
+                spilled=spill,
+            )
+            timer.record(model)
             
             logger.info(
                 f"Extraction completed in {extraction_time:.2f}s, "
-                f"found {len(result['elements'])} elements"
+                f"found {metrics.num_elements} elements"
             )
             
             return response
@@ -97,6 +261,642 @@ class PDFProcessor:
         except Exception as e:
             logger.error(f"Error in PDF processing: {str(e)}", exc_info=True)
             raise
+        finally:
+            memory_budget.untrack(task_memory)
+            sharding.remove_shards(file_path, task_id)
+    
+    async def stream_pages(
+        self,
+        file_path: str,
+        model: ModelType,
+        task_id: str,
+        generate_annotations: bool = True,
+    ) -> AsyncIterator[Union[PageResult, StreamComplete]]:
+        """
+        Process PDF page by page, yielding each page as soon as it is done
+        
+        Every page is split into its own single-page PDF and run through the
+        model in order, so the first result arrives after one page rather
+        than the whole document. The final event carries the document
+        metrics; the combined markdown is saved as for process_pdf.
+        
+        Args:
+            file_path: Path to PDF file
+            model: Model to use
+            task_id: Unique task identifier
+            generate_annotations: Whether to generate visual annotations
+            
+        Yields:
+            PageResult per page, then StreamComplete
+        """
+        try:
+            start_time = time.time()
+            service = await asyncio.to_thread(self._service, model)
+            
+            num_pages = await asyncio.to_thread(sharding.count_pages, file_path)
+            plans = await asyncio.to_thread(
+                self._plan_pages, file_path, model, settings.TEXT_FAST_PATH_ENABLED
+            )
+            if plans is None:
+                plans = [PagePlan(page=n, route=model.value) for n in range(1, num_pages + 1)]
+            model_pages = [
+                plan.page for plan in plans
+                if plan.cached is None and plan.route == model.value
+            ]
+            shards = {
+                shard.first_page: shard
+                for shard in await asyncio.to_thread(
+                    sharding.split_pdf, file_path, [(n, n) for n in model_pages], task_id
+                )
+            } if model_pages else {}
+            logger.info(f"Streaming {num_pages} pages with {model.value}")
+            
+            lazy_annotations = generate_annotations and (
+                settings.LAZY_ANNOTATIONS or len(model_pages) < num_pages
+            )
+            # In memory budget mode pages go to disk as they are sent instead of
+            # being collected for the final metrics and markdown
+            page_spill = PageSpill(task_id) if settings.MEMORY_BUDGET_MODE else None
+            elements = []
+            markdown_parts = []
+            for plan in plans:
+                if plan.cached is not None:
+                    page = plan.cached
+                elif plan.route == "text_layer":
+                    page = await asyncio.to_thread(
+                        text_layer.extract_pages, file_path, [plan.page]
+                    )
+                    self._store_page(plan, page["elements"], page["markdown_content"])
+                else:
+                    shard = shards[plan.page]
+                    result = await self._extract(
+                        service=service,
+                        model=model,
+                        file_path=shard.path,
+                        task_id=shard.task_id,
+                        generate_annotations=generate_annotations and not lazy_annotations,
+                    )
+                    page = sharding.merge_shard_results([shard], [result], task_id)
+                    self._store_page(plan, page["elements"], page["markdown_content"])
+            
+                annotation_url = None
+                annotation_path = (
+                    Path(settings.RESULTS_DIR) / task_id / "annotations"
+                    / f"page_{plan.page}.png"
+                )
+                if lazy_annotations:
+                    annotations.store_page_index(task_id, file_path, page["elements"])
+                if lazy_annotations or annotation_path.exists():
+                    annotation_url = (
+                        f"{settings.API_V1_PREFIX}/extract/annotations/{task_id}"
+                        f"?page={plan.page}"
+                    )
+            
+                if page_spill is not None:
+                    await asyncio.to_thread(
+                        page_spill.add_page, page["elements"], page["markdown_content"]
+                    )
+                else:
+                    elements.extend(page["elements"])
+                    if page["markdown_content"]:
+                        markdown_parts.append(page["markdown_content"])
+            
+                yield PageResult(
+                    task_id=task_id,
+                    page=plan.page,
+                    total_pages=num_pages,
+                    elements=page["elements"],
+                    markdown=page["markdown_content"],
+                    annotation_url=annotation_url,
+                )
+            
+            if page_spill is not None:
+                page_spill.close()
+                document_metrics = page_spill.metrics(time.time() - start_time)
+            else:
+                markdown_content = "\n\n".join(markdown_parts)
+                await self._save_markdown(task_id, markdown_content)
+                document_metrics = self._calculate_metrics(
+                    elements,
+                    markdown_content,
+                    time.time() - start_time,
+                )
+            
+            yield StreamComplete(
+                task_id=task_id,
+                model=model,
+                metrics=document_metrics,
+            )
+        finally:
+            sharding.remove_shards(file_path, task_id)
+    
+    async def compare_models(
+        self,
+        file_path: str,
+        models: List[ModelType],
+        task_id: str,
+        generate_annotations: bool = True,
+        parallel: bool = True,
+        file_hash: Optional[str] = None,
+    ) -> Tuple[Dict[str, ExtractionResponse], Dict[str, str], List[str]]:
+        """
+        Process PDF with several models for comparison
+        
+        In parallel mode each model runs on its own worker thread, at most
+        COMPARE_MAX_CONCURRENCY at a time. Every model is limited to
+        COMPARE_MODEL_TIMEOUT seconds from when a worker picks it up, and
+        may wait as long again for a free worker; a model that fails or
+        times out is reported in the errors instead of failing the whole
+        comparison. A thread cannot be stopped, so a model that timed out
+        keeps its worker until it finishes and is also listed as still
+        running. With RASTER_PRERENDER on, pages are
+        rendered once into the shared page image cache beforehand.
+        
+        Args:
+            file_path: Path to PDF file
+            models: Models to run
+            task_id: Unique task identifier
+            generate_annotations: Whether to generate visual annotations
+            parallel: Run models concurrently instead of one after another
+            file_hash: SHA-256 of the file, computed here if not given
+            
+        Returns:
+            Tuple of (model name -> ExtractionResponse, model name -> error,
+            names of timed-out models still running)
+        """
+        loop = asyncio.get_running_loop()
+        if settings.RESULT_CACHE_ENABLED and file_hash is None:
+            file_hash = await asyncio.to_thread(compute_file_hash, file_path)
+        if settings.RASTER_PRERENDER:
+            # Render every page once up front; each model then reads it from the cache
+            await asyncio.to_thread(page_images.render, file_path)
+        semaphore = asyncio.Semaphore(
+            max(1, settings.COMPARE_MAX_CONCURRENCY) if parallel else 1
+        )
+        still_running: List[str] = []
+        
+        async def run_model(model: ModelType) -> ExtractionResponse:
+            async with semaphore:
+                started = asyncio.Event()
+                claim = threading.Lock()
+                state = {"running": False, "abandoned": False}
+                
+                def job() -> Optional[ExtractionResult]:
+                    with claim:
+                        if state["abandoned"]:
+                            return None
+                        state["running"] = True
+                    loop.call_soon_threadsafe(started.set)
+                    # A fresh event loop per worker thread keeps a blocking model
+                    # from stalling the others (or the API loop)
+                    # Every page goes to the model, or there would be nothing to compare
+                    return asyncio.run(self.process_pdf(
+                        file_path=file_path,
+                        model=model,
+                        task_id=f"{task_id}_{model.value}",
+                        generate_annotations=generate_annotations,
+                        file_hash=file_hash,
+                        text_fast_path=False,
+                        # Comparing needs every model's elements in memory
+                        spill=False,
+                    ))
+                
+                future = loop.run_in_executor(self._compare_pool, job)
+                try:
+                    # The clock starts once a worker has the model, not while it
+                    # queues behind a timed-out model still holding a worker;
+                    # that queueing is bounded separately
+                    try:
+                        await asyncio.wait_for(started.wait(), settings.COMPARE_MODEL_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        with claim:
+                            state["abandoned"] = not state["running"]
+                        if state["abandoned"]:
+                            future.cancel()
+                            raise
+                    return await asyncio.wait_for(
+                        asyncio.shield(future),
+                        timeout=settings.COMPARE_MODEL_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    if state["abandoned"]:
+                        raise  # never started
+                    still_running.append(model.value)
+                    timed_out_at = time.time()
+                    
+                    def finished(done: asyncio.Future) -> None:
+                        error = None if done.cancelled() else done.exception()
+                        logger.info(
+                            f"{model.value} finished {time.time() - timed_out_at:.0f}s "
+                            f"after its comparison timeout"
+                            + (f": {error}" if error else "")
+                        )
+                    
+                    future.add_done_callback(finished)
+                    raise
+                except asyncio.CancelledError:
+                    future.cancel()  # only stops it if no worker has it yet
+                    raise
+        
+        outcomes = await asyncio.gather(
+            *(run_model(model) for model in models),
+            return_exceptions=True,
+        )
+        
+        results: Dict[str, ExtractionResponse] = {}
+        errors: Dict[str, str] = {}
+        for model, outcome in zip(models, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError) and model.value in still_running:
+                errors[model.value] = (
+                    f"Timed out after {settings.COMPARE_MODEL_TIMEOUT}s "
+                    f"(still running in the background)"
+                )
+                logger.warning(f"{model.value} timed out during comparison")
+            elif isinstance(outcome, asyncio.TimeoutError):
+                errors[model.value] = (
+                    f"Timed out after {settings.COMPARE_MODEL_TIMEOUT}s waiting for a free worker"
+                )
+                logger.warning(f"{model.value} found no free worker during comparison")
+            elif isinstance(outcome, BaseException):
+                errors[model.value] = str(outcome) or type(outcome).__name__
+                logger.warning(f"{model.value} failed during comparison: {outcome}")
+            else:
+                results[model.value] = outcome
+        
+        return results, errors, still_running
+    
+    async def _extract(
+        self,
+        service: Any,
+        model: ModelType,
+        file_path: str,
+        task_id: str,
+        generate_annotations: bool,
+    ) -> Dict[str, Any]:
+        """
+        Run a service over the document
+        
+        Large documents are sharded across the process pool; otherwise the
+        model runs on its executor, off the event loop. With inference
+        batching on, the document first joins a batch with those of
+        concurrent requests (annotations are only drawn unbatched).
+        """
+        if settings.SHARDING_ENABLED:
+            num_pages = await asyncio.to_thread(sharding.count_pages, file_path)
+            if num_pages >= settings.SHARD_MIN_PAGES:
+                return await self._extract_sharded(
+                    model=model,
+                    file_path=file_path,
+                    task_id=task_id,
+                    num_pages=num_pages,
+                    generate_annotations=generate_annotations,
+                )
+        
+        if settings.INFERENCE_BATCHING_ENABLED and not generate_annotations:
+            return await inference_batcher.extract(model, service, file_path, task_id)
+        
+        return await model_executors.get(model).extract(
+            service, file_path, task_id, generate_annotations
+        )
+    
+    def _service(self, model: ModelType) -> Any:
+        """
+        The model's service in this process, loading it on first use
+        
+        Returns None when the model's executor runs it in worker processes,
+        which load their own copy.
+        """
+        if model_executors.get(model).in_process:
+            return self.services[model]
+        return None
+    
+    def _plan_pages(
+        self,
+        file_path: str,
+        model: ModelType,
+        text_fast_path: bool,
+    ) -> Optional[List[PagePlan]]:
+        """
+        Decide how each page of a document is extracted
+        
+        Text-native pages take the text layer when the fast path is on; the
+        rest go to the model. With per-page reuse on, every page is also
+        fingerprinted and looked up in the page cache.
+        
+        Returns:
+            One PagePlan per page, or None when the whole document simply
+            goes to the model
+        """
+        if text_fast_path:
+            routes = [
+                "text_layer" if profile.text_native else model.value
+                for profile in text_layer.classify_pages(file_path)
+            ]
+        else:
+            routes = [model.value] * sharding.count_pages(file_path)
+        
+        if not settings.PAGE_REUSE_ENABLED:
+            if "text_layer" not in routes:
+                return None
+            return [PagePlan(page=i + 1, route=route) for i, route in enumerate(routes)]
+        
+        plans = []
+        fingerprints = fingerprint_pages(file_path)
+        for i, (route, fingerprint) in enumerate(zip(routes, fingerprints)):
+            key = page_cache.make_key(fingerprint, route)
+            plans.append(
+                PagePlan(
+                    page=i + 1,
+                    route=route,
+                    cache_key=key,
+                    cached=page_cache.get(key, i + 1),
+                )
+            )
+        return plans
+    
+    async def _extract_routed(
+        self,
+        service: Any,
+        model: ModelType,
+        file_path: str,
+        task_id: str,
+        plans: List[PagePlan],
+        timer: StageTimer,
+    ) -> Dict[str, Any]:
+        """
+        Extract a document page range by page range according to its plan
+        
+        Consecutive pages with the same route are handled together: cached
+        pages are reused, text-native pages come from the text layer and
+        each run of model pages is split into its own PDF like a shard, so
+        a long run is still sharded across the process pool. Runs next to
+        reused pages (the edits of a revision) are split one PDF per page
+        instead, so each page's result is stored exactly. Results are
+        merged back in page order.
+        """
+        def route_of(plan: PagePlan) -> str:
+            return "reused" if plan.cached is not None else plan.route
+        
+        groups = [
+            (route, list(group))
+            for route, group in itertools.groupby(plans, key=route_of)
+        ]
+        reused = {plan.page for plan in plans if plan.cached is not None}
+        
+        model_ranges = []
+        for route, group in groups:
+            if route != model.value:
+                continue
+            first_page, last_page = group[0].page, group[-1].page
+            if first_page - 1 in reused or last_page + 1 in reused:
+                model_ranges.extend((plan.page, plan.page) for plan in group)
+            else:
+                model_ranges.append((first_page, last_page))
+        shards = {
+            shard.first_page: shard
+            for shard in (
+                await asyncio.to_thread(sharding.split_pdf, file_path, model_ranges, task_id)
+                if model_ranges else []
+            )
+        }
+        
+        elements = []
+        markdown_parts = []
+        for route, group in groups:
+            pages = [plan.page for plan in group]
+            if route == "reused":
+                parts = [plan.cached for plan in group]
+            elif route == "text_layer":
+                with timer.stage("text_layer"):
+                    part = await asyncio.to_thread(text_layer.extract_pages, file_path, pages)
+                for plan in group:
+                    self._store_page(
+                        plan,
+                        [e for e in part["elements"] if e.page == plan.page],
+                        part["page_markdown"][plan.page],
+                    )
+                parts = [part]
+            else:
+                group_shards = [shards[plan.page] for plan in group if plan.page in shards]
+                
+                def extract_shard(shard: sharding.Shard):
+                    return self._extract(
+                        service=service,
+                        model=model,
+                        file_path=shard.path,
+                        task_id=shard.task_id,
+                        generate_annotations=False,
+                    )
+                
+                with timer.stage("inference"):
+                    if settings.INFERENCE_BATCHING_ENABLED:
+                        # Submitted together so the pages can share batches
+                        results = await asyncio.gather(
+                            *(extract_shard(shard) for shard in group_shards)
+                        )
+                    else:
+                        results = [await extract_shard(shard) for shard in group_shards]
+                
+                parts = []
+                for shard, result in zip(group_shards, results):
+                    part = sharding.merge_shard_results([shard], [result], task_id)
+                    self._store_shard_pages(group, shard, result, part)
+                    parts.append(part)
+            
+            for part in parts:
+                elements.extend(part["elements"])
+                if part["markdown_content"]:
+                    markdown_parts.append(part["markdown_content"])
+            metrics.inc(
+                "pdf_pages_routed_total",
+                {"model": model.value, "route": "model" if route == model.value else route},
+                amount=len(pages),
+            )
+        
+        logger.info(
+            f"Page routing for {model.value}: "
+            + ", ".join(
+                f"{route}={sum(1 for plan in plans if route_of(plan) == route)}"
+                for route in sorted({route_of(plan) for plan in plans})
+            )
+        )
+        return {
+            "elements": elements,
+            "markdown_content": "\n\n".join(markdown_parts),
+            "annotations_url": None,
+        }
+    
+    async def _extract_spilled(
+        self,
+        service: Any,
+        model: ModelType,
+        file_path: str,
+        task_id: str,
+        plans: List[PagePlan],
+        timer: StageTimer,
+        index_annotations: bool,
+    ) -> PageSpill:
+        """
+        Extract a document one page at a time, writing each page to disk
+        
+        Every page is reused, read from the text layer or run through the
+        model as a single-page shard made just before and deleted just
+        after. Its results are then spilled and dropped before the next
+        page starts, so only one page's results (and model buffers) are
+        alive at a time. Above the memory high-water mark, garbage is
+        collected between pages.
+        """
+        page_spill = PageSpill(task_id)
+        text_pages: Dict[int, Dict[str, Any]] = {}
+        try:
+            for index, plan in enumerate(plans):
+                if plan.cached is not None:
+                    route = "reused"
+                    page, plan.cached = plan.cached, None
+                elif plan.route == "text_layer":
+                    route = "text_layer"
+                    if plan.page not in text_pages:
+                        # A run of text-native pages is read together, as in
+                        # _extract_routed, so headings are sized against the
+                        # same body text (text results are small)
+                        run = list(itertools.takewhile(
+                            lambda p: p.cached is None and p.route == "text_layer",
+                            plans[index:],
+                        ))
+                        with timer.stage("text_layer"):
+                            part = await asyncio.to_thread(
+                                text_layer.extract_pages, file_path, [p.page for p in run]
+                            )
+                        for p in run:
+                            text_pages[p.page] = {
+                                "elements": [e for e in part["elements"] if e.page == p.page],
+                                "markdown_content": part["page_markdown"][p.page],
+                            }
+                        del part
+                    page = text_pages.pop(plan.page)
+                    self._store_page(plan, page["elements"], page["markdown_content"])
+                else:
+                    route = "model"
+                    with timer.stage("inference"):
+                        shard = (await asyncio.to_thread(
+                            sharding.split_pdf, file_path, [(plan.page, plan.page)], task_id
+                        ))[0]
+                        try:
+                            result = await self._extract(
+                                service=service,
+                                model=model,
+                                file_path=shard.path,
+                                task_id=shard.task_id,
+                                generate_annotations=False,
+                            )
+                        finally:
+                            Path(shard.path).unlink(missing_ok=True)
+                    page = sharding.merge_shard_results([shard], [result], task_id)
+                    del result
+                    self._store_page(plan, page["elements"], page["markdown_content"])
+                
+                with timer.stage("spill"):
+                    await asyncio.to_thread(
+                        page_spill.add_page, page["elements"], page["markdown_content"]
+                    )
+                    if index_annotations:
+                        annotations.store_page_index(task_id, file_path, page["elements"])
+                del page
+                metrics.inc(
+                    "pdf_pages_routed_total",
+                    {"model": model.value, "route": route},
+                )
+                if not memory_budget.has_headroom():
+                    gc.collect()
+        finally:
+            page_spill.close()
+        
+        logger.info(f"Spilled {len(plans)} pages of {task_id} with {model.value}")
+        return page_spill
+    
+    @staticmethod
+    def _store_page(plan: PagePlan, elements: List[Any], markdown_content: str) -> None:
+        """Keep a freshly extracted page for reuse by later revisions"""
+        if plan.cache_key is not None:
+            page_cache.put(plan.cache_key, plan.page, elements, markdown_content)
+    
+    @classmethod
+    def _store_shard_pages(
+        cls,
+        plans: List[PagePlan],
+        shard: sharding.Shard,
+        result: Dict[str, Any],
+        part: Dict[str, Any],
+    ) -> None:
+        """
+        Keep each page of an extracted model shard for reuse
+        
+        Pages of a multi-page shard take their markdown from the service's
+        page_markdown (shard page -> markdown) when it reports one, and
+        otherwise have it rebuilt from their elements.
+        """
+        if shard.first_page == shard.last_page:
+            for plan in plans:
+                if plan.page == shard.first_page:
+                    cls._store_page(plan, part["elements"], part["markdown_content"])
+            return
+        
+        reported_markdown = {
+            int(page) + shard.page_offset: markdown
+            for page, markdown in (result.get("page_markdown") or {}).items()
+        }
+        for plan in plans:
+            if plan.cache_key is None or not shard.first_page <= plan.page <= shard.last_page:
+                continue
+            elements = [e for e in part["elements"] if sharding.element_page(e) == plan.page]
+            if reported_markdown:
+                markdown_content = reported_markdown.get(plan.page, "")
+            else:
+                markdown_content = sharding.page_markdown(elements)
+            cls._store_page(plan, elements, markdown_content)
+    
+    async def _extract_sharded(
+        self,
+        model: ModelType,
+        file_path: str,
+        task_id: str,
+        num_pages: int,
+        generate_annotations: bool,
+    ) -> Dict[str, Any]:
+        """
+        Split the PDF into page ranges and extract them in a process pool
+        
+        Results are merged back in page order with page numbers rebased onto
+        the full document.
+        """
+        ranges = sharding.plan_shards(num_pages, settings.SHARD_PAGE_SIZE)
+        shards = await asyncio.to_thread(sharding.split_pdf, file_path, ranges, task_id)
+        logger.info(
+            f"Sharding {num_pages} pages into {len(shards)} shards "
+            f"for {model.value}"
+        )
+        
+        if self._shard_pool is None:
+            # Spawned workers avoid inheriting CUDA state from the API process
+            self._shard_pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.SHARD_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                self._shard_pool,
+                sharding.extract_shard,
+                model.value,
+                shard.path,
+                shard.task_id,
+                generate_annotations,
+            )
+            for shard in shards
+        ))
+        
+        return sharding.merge_shard_results(shards, results, task_id)
     
     def _calculate_metrics(
         self,
@@ -139,15 +939,21 @@ class PDFProcessor:
         async with aiofiles.open(markdown_path, "w", encoding="utf-8") as f:
             await f.write(content)
     
-    def compare_results(self, results: Dict[str, ExtractionResponse]) -> Dict[str, Any]:
+    def compare_results(
+        self,
+        results: Dict[str, ExtractionResponse],
+        consensus: bool = False,
+    ) -> Dict[str, Any]:
         """
         Compare results from multiple models
         
         Args:
             results: Dictionary of model -> ExtractionResponse
+            consensus: Also build the consensus element set
             
         Returns:
-            Dictionary with comparison metrics
+            Dictionary with comparison metrics, including element-level
+            agreement (bbox IoU matching) under "agreement"
         """
         comparison = {
             "fastest_model": None,
@@ -187,4 +993,10 @@ class PDFProcessor:
                 longest_content = content_length
                 comparison["longest_content"] = model_name
         
+        # Do the models find the same regions?
+        if len(results) > 1:
+            from app.services.consensus import compare_elements
+            
+            comparison["agreement"] = compare_elements(results, include_consensus=consensus)
+        
         return comparison
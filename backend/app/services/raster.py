@@ -0,0 +1,338 @@
+"""
+Page Rasterisation
+Renders each PDF page once per DPI into a shared, memory-mapped image cache
+"""
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+import numpy as np
+
+from app.config import settings
+from app.services.page_cache import fingerprint_pages
+from app.services.resolution import page_resolutions
+
+# (file, page fingerprints or DPIs) pairs remembered
+FILE_MEMO_SIZE = 128
+
+
+def _entry_path(root: Path, key: str) -> Path:
+    return root / key[:2] / f"{key}.npy"
+
+
+def _render_array(doc, page: int, dpi: int) -> np.ndarray:
+    """Render one page of an open document as an RGB array"""
+    import fitz
+
+    pixmap = doc[page - 1].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+    return np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+        pixmap.height, pixmap.width, pixmap.n
+    )
+
+
+def render_pages(
+    file_path: str,
+    pages: List[int],
+    dpis: List[int],
+    keys: List[str],
+    root: str,
+) -> List[Tuple[str, int]]:
+    """
+    Render pages of a PDF into cache entries (also a process pool entry point)
+
+    Each page is written as an (height, width, 3) uint8 .npy array, through
+    a staging file so readers never see a partial image.
+
+    Args:
+        file_path: Source PDF
+        pages: 1-indexed pages to render
+        dpis: Render resolution of each page
+        keys: Cache key of each page
+        root: Cache directory
+
+    Returns:
+        (key, size in bytes) of every entry written
+    """
+    import fitz
+
+    written = []
+    with fitz.open(file_path) as doc:
+        for page, dpi, key in zip(pages, dpis, keys):
+            image = _render_array(doc, page, dpi)
+            path = _entry_path(Path(root), key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            staging = path.with_name(f".{key}.{uuid.uuid4().hex}")
+            try:
+                with open(staging, "wb") as f:
+                    np.save(f, image)
+                os.replace(staging, path)
+            finally:
+                staging.unlink(missing_ok=True)
+            written.append((key, path.stat().st_size))
+    return written
+
+
+class PageImageCache:
+    """
+    Size-bounded LRU store of rendered page images
+
+    Entries are keyed on the page's content fingerprint and DPI, so a page
+    is rendered once whichever file it arrives in (the upload, a single-page
+    shard of it or a later revision) and whoever asks for it: model
+    services, the annotator or another model of a comparison. Images are
+    .npy files opened as read-only memory maps, so every reader, in this
+    process or a worker process, shares the OS page cache instead of
+    holding its own copy. Unless the caller asks for a DPI, pages render
+    at the resolution DPI_POLICY picks for them.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, workers: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._file_memo: "OrderedDict[Tuple[str, int, int, str], List[Any]]" = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(fingerprint: str, dpi: int) -> str:
+        """Build the cache key for a page fingerprint and DPI"""
+        return f"{fingerprint}_{dpi}"
+
+    def get(self, file_path: str, page: int, dpi: Optional[int] = None) -> np.ndarray:
+        """
+        Image of one page, rendering it on a miss
+
+        Args:
+            file_path: PDF containing the page
+            page: Page number (1-indexed)
+            dpi: Render resolution (default: the page's DPI_POLICY resolution)
+
+        Returns:
+            Read-only (height, width, 3) uint8 RGB array backed by the cache file
+
+        Raises:
+            ValueError: If the page does not exist
+        """
+        fingerprints = self._page_fingerprints(file_path)
+        if page < 1 or page > len(fingerprints):
+            raise ValueError(f"Page {page} out of range (1-{len(fingerprints)})")
+        dpi = dpi or self.page_dpis(file_path)[page - 1]
+
+        key = self.make_key(fingerprints[page - 1], dpi)
+        image = self._open(key)
+        if image is None:
+            self._store(render_pages(file_path, [page], [dpi], [key], str(self.root)))
+            image = self._open(key, count=False)
+        if image is None:
+            # Larger than the whole cache, so evicted straight away
+            import fitz
+
+            with fitz.open(file_path) as doc:
+                image = _render_array(doc, page, dpi)
+        return image
+
+    def render(
+        self,
+        file_path: str,
+        dpi: Optional[int] = None,
+        pages: Optional[List[int]] = None,
+        parallel: Optional[bool] = None,
+    ) -> int:
+        """
+        Make sure pages are in the cache
+
+        Args:
+            file_path: Source PDF
+            dpi: Render resolution (default: each page's DPI_POLICY resolution)
+            pages: 1-indexed pages (default: all)
+            parallel: Split the missing pages across RASTER_WORKERS processes
+                (default: when RASTER_WORKERS > 1)
+
+        Returns:
+            Number of pages rendered (the rest were already cached)
+        """
+        fingerprints = self._page_fingerprints(file_path)
+        pages = pages or list(range(1, len(fingerprints) + 1))
+        dpis = [dpi] * len(fingerprints) if dpi else self.page_dpis(file_path)
+        wanted = [
+            (page, dpis[page - 1], self.make_key(fingerprints[page - 1], dpis[page - 1]))
+            for page in pages
+        ]
+
+        with self._lock:
+            missing = [item for item in wanted if item[2] not in self._entries]
+            self.hits += len(pages) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return 0
+
+        if parallel is None:
+            parallel = self.workers > 1
+        if parallel and len(missing) > 1:
+            chunks = [missing[i::self.workers] for i in range(self.workers)]
+            futures = [
+                self._get_pool().submit(
+                    render_pages,
+                    file_path,
+                    [page for page, _, _ in chunk],
+                    [page_dpi for _, page_dpi, _ in chunk],
+                    [key for _, _, key in chunk],
+                    str(self.root),
+                )
+                for chunk in chunks if chunk
+            ]
+            for future in futures:
+                self._store(future.result())
+        else:
+            self._store(
+                render_pages(
+                    file_path,
+                    [page for page, _, _ in missing],
+                    [page_dpi for _, page_dpi, _ in missing],
+                    [key for _, _, key in missing],
+                    str(self.root),
+                )
+            )
+
+        logger.debug(
+            f"Rendered {len(missing)} page(s) of {Path(file_path).name} at "
+            f"{sorted({page_dpi for _, page_dpi, _ in missing})} DPI"
+        )
+        return len(missing)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the render processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def page_dpis(self, file_path: str) -> List[int]:
+        """Render resolution of every page under DPI_POLICY, remembered per file"""
+        return self._memo(
+            file_path,
+            settings.DPI_POLICY,
+            lambda: [resolution.dpi for resolution in page_resolutions(file_path)],
+        )
+
+    def _page_fingerprints(self, file_path: str) -> List[str]:
+        """Page fingerprints of a file, remembered while it is unchanged"""
+        return self._memo(file_path, "fingerprints", lambda: fingerprint_pages(file_path))
+
+    def _memo(self, file_path: str, name: str, compute: Callable[[], List[Any]]) -> List[Any]:
+        """A per-page property of a file, computed once while the file is unchanged"""
+        stat = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, name)
+        with self._lock:
+            values = self._file_memo.get(memo_key)
+            if values is not None:
+                self._file_memo.move_to_end(memo_key)
+                return values
+
+        values = compute()
+        with self._lock:
+            self._file_memo[memo_key] = values
+            if len(self._file_memo) > FILE_MEMO_SIZE:
+                self._file_memo.popitem(last=False)
+        return values
+
+    def _open(self, key: str, count: bool = True) -> Optional[np.ndarray]:
+        """Memory-map a cached image, or None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            try:
+                # Mapped while locked so eviction cannot remove the file
+                # first; once mapped, the image outlives the file
+                return np.load(_entry_path(self.root, key), mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping unreadable page image {key}: {str(e)}")
+                self._remove(key)
+                return None
+
+    def _store(self, written: List[Tuple[str, int]]) -> None:
+        """Register freshly rendered entries and evict down to the size limit"""
+        with self._lock:
+            for key, size in written:
+                self._total_bytes += size - self._entries.get(key, 0)
+                self._entries[key] = size
+                self._entries.move_to_end(key)
+            self._evict()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from entries already on disk"""
+        entries = []
+        for path in self.root.glob("*/*"):
+            if path.name.startswith("."):
+                path.unlink(missing_ok=True)
+            else:
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._entries[key] = size
+                self._total_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under the size limit (lock held)"""
+        while self._entries and self._total_bytes > self.max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry from disk and the index (lock held)"""
+        self._total_bytes -= self._entries.pop(key, 0)
+        _entry_path(self.root, key).unlink(missing_ok=True)
+
+
+# Shared page image cache
+page_images = PageImageCache(
+    root=Path(settings.RESULTS_DIR) / "_raster",
+    max_bytes=settings.RASTER_CACHE_MAX_BYTES,
+    workers=settings.RASTER_WORKERS,
+)
@@ -0,0 +1,163 @@
+"""
+Model Registry
+Loads model services on first use and shares them across requests
+"""
+import asyncio
+import importlib
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.models.pipeline import ExecutionProfile, ModelLoadState, ModelStatus
+from app.services.execution import apply_profile, quantize_service, resolve_profile
+
+
+# Module and class implementing each model service
+SERVICE_FACTORIES: Dict[ModelType, Tuple[str, str]] = {
+    ModelType.DOCLING: ("app.services.models.docling_service", "DoclingService"),
+    ModelType.MINERU: ("app.services.models.mineru_service", "MinerUService"),
+    ModelType.SURYA: ("app.services.models.surya_service", "SuryaService"),
+}
+
+
+class ModelRegistry:
+    """
+    Lazily constructed, process-wide model services
+
+    Services are imported and instantiated the first time they are needed
+    (or by preload), then reused by every request in the process.
+    Supports ``registry[model]`` so it can stand in for a plain dict.
+
+    The execution profile (EXECUTION_PROFILE unless one is given) is applied
+    before the first model loads; on cpu profiles with quantization enabled
+    each service's models are quantized to int8 once loaded.
+    """
+
+    def __init__(
+        self,
+        factories: Dict[ModelType, Tuple[str, str]] = SERVICE_FACTORIES,
+        profile: Optional[ExecutionProfile] = None,
+    ):
+        self._factories = factories
+        self._profile = profile
+        self._profile_applied = False
+        self._services: Dict[ModelType, Any] = {}
+        self._status: Dict[ModelType, ModelStatus] = {
+            model: ModelStatus(state=ModelLoadState.NOT_LOADED)
+            for model in factories
+        }
+        self._locks = {model: threading.Lock() for model in factories}
+        self._profile_lock = threading.Lock()
+
+    def __getitem__(self, model: ModelType) -> Any:
+        return self.get(model)
+
+    def __contains__(self, model: ModelType) -> bool:
+        return model in self._factories
+
+    def get(self, model: ModelType) -> Any:
+        """
+        Get the service for a model, loading it on first use
+
+        Args:
+            model: Model to get
+
+        Returns:
+            The shared service instance
+        """
+        service = self._services.get(model)
+        if service is not None:
+            return service
+
+        if model not in self._factories:
+            raise KeyError(f"Unknown model: {model}")
+
+        # Only one thread loads a given model; others wait for it
+        with self._locks[model]:
+            service = self._services.get(model)
+            if service is None:
+                service = self._load(model)
+        return service
+
+    def preload(self, models: Iterable[ModelType]) -> None:
+        """Load the given models now, logging rather than raising failures"""
+        for model in models:
+            try:
+                self.get(model)
+            except Exception as e:
+                logger.error(f"Failed to preload {model.value}: {str(e)}")
+
+    async def warm_up(self, models: Iterable[ModelType]) -> None:
+        """Preload models on a worker thread without blocking the event loop"""
+        await asyncio.to_thread(self.preload, list(models))
+
+    def status(self) -> Dict[str, ModelStatus]:
+        """Load state of every registered model"""
+        return {model.value: status for model, status in self._status.items()}
+
+    def execution_profile(self) -> Optional[ExecutionProfile]:
+        """Profile in use, or None before any model has loaded"""
+        return self._profile if self._profile_applied else None
+
+    def loaded_models(self) -> List[str]:
+        """Names of models that are loaded and ready"""
+        return [model.value for model in self._services]
+
+    def _load(self, model: ModelType) -> Any:
+        """Import and instantiate a service, recording state and timing"""
+        module_name, class_name = self._factories[model]
+        self._status[model] = ModelStatus(state=ModelLoadState.LOADING)
+        logger.info(f"Loading {model.value} model")
+        start_time = time.time()
+
+        try:
+            self._apply_profile()
+            service_class = getattr(importlib.import_module(module_name), class_name)
+            service = service_class()
+            if self._profile.quantize:
+                quantized = quantize_service(service)
+                logger.info(f"Quantized {quantized} {model.value} module(s) to int8")
+        except Exception as e:
+            self._status[model] = ModelStatus(
+                state=ModelLoadState.FAILED,
+                error=str(e),
+            )
+            raise
+
+        load_time = time.time() - start_time
+        self._services[model] = service
+        self._status[model] = ModelStatus(
+            state=ModelLoadState.LOADED,
+            load_time=load_time,
+            loaded_at=time.time(),
+        )
+        logger.info(f"Loaded {model.value} model in {load_time:.2f}s")
+        return service
+
+    def _apply_profile(self) -> None:
+        """Resolve and apply the execution profile once, before the first load"""
+        with self._profile_lock:
+            if self._profile_applied:
+                return
+            if self._profile is None:
+                self._profile = resolve_profile()
+            apply_profile(self._profile)
+            self._profile_applied = True
+
+
+def supported_models() -> List[ModelType]:
+    """Models listed in SUPPORTED_MODELS, skipping unknown names"""
+    models = []
+    for name in settings.SUPPORTED_MODELS:
+        try:
+            models.append(ModelType(name))
+        except ValueError:
+            logger.warning(f"Ignoring unknown model in SUPPORTED_MODELS: {name}")
+    return models
+
+
+# Shared model registry
+model_registry = ModelRegistry()
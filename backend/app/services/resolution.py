@@ -0,0 +1,138 @@
+"""
+Page Resolution
+Picks the render DPI of each page from its text, size and image content
+"""
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+
+POLICIES = ("fixed", "adaptive")
+
+# Chosen DPIs are rounded to this step so similar pages share cache entries
+DPI_STEP = 25
+
+# Share of the text (by characters) allowed to be smaller than the size
+# the DPI is chosen for, so stray footnote markers do not drive it up
+SMALL_PRINT_QUANTILE = 0.1
+
+# Image coverage above which a page counts as a scan or picture page
+IMAGE_PAGE_COVERAGE = 0.5
+
+
+@dataclass
+class PageResolution:
+    """Render resolution chosen for one page and what decided it"""
+    page: int  # 1-indexed
+    dpi: int
+    reason: str  # fixed, text, image or default; "+pixel_cap" if limited by size
+
+
+def _small_print_size(page: Any) -> Optional[float]:
+    """Font size (points) of the page's small print, or None without a text layer"""
+    size_chars: Dict[float, int] = {}
+    # flags=0: text only, so image blocks are not decoded
+    for block in page.get_text("dict", flags=0)["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            for span in line["spans"]:
+                chars = len(span["text"].strip())
+                if chars and span["size"] > 0:
+                    size_chars[span["size"]] = size_chars.get(span["size"], 0) + chars
+
+    if not size_chars:
+        return None
+    threshold = sum(size_chars.values()) * SMALL_PRINT_QUANTILE
+    covered = 0
+    for size in sorted(size_chars):
+        covered += size_chars[size]
+        if covered > threshold:
+            return size
+    return max(size_chars)
+
+
+def _image_dpi(page: Any) -> Optional[float]:
+    """Native resolution of the page's images when they cover most of it"""
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    native = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        if x1 - x0 < 1 or y1 - y0 < 1:
+            continue
+        covered += abs(page.rect & info["bbox"])
+        native = max(
+            native,
+            info["width"] * 72 / (x1 - x0),
+            info["height"] * 72 / (y1 - y0),
+        )
+    if covered / page_area < IMAGE_PAGE_COVERAGE:
+        return None
+    return native
+
+
+def choose_dpi(page: Any) -> PageResolution:
+    """
+    Choose the render DPI of a PyMuPDF page under the adaptive policy
+
+    The page is rendered so its small print reaches ADAPTIVE_DPI_TEXT_PX
+    pixels per em; a page dominated by images (a scan) is rendered at
+    their native resolution, since more pixels add no detail. Pages with
+    neither fall back to DEFAULT_DPI. The result is kept within
+    ADAPTIVE_DPI_MIN..ADAPTIVE_DPI_MAX, and large pages are also held to
+    ADAPTIVE_DPI_MAX_PIXELS (but never below the minimum).
+    """
+    candidates = {}
+    size = _small_print_size(page)
+    if size is not None:
+        candidates["text"] = settings.ADAPTIVE_DPI_TEXT_PX * 72 / size
+    image_dpi = _image_dpi(page)
+    if image_dpi:
+        candidates["image"] = image_dpi
+
+    if candidates:
+        reason = max(candidates, key=candidates.get)
+        dpi = candidates[reason]
+    else:
+        reason, dpi = "default", float(settings.DEFAULT_DPI)
+
+    dpi = min(dpi, settings.ADAPTIVE_DPI_MAX)
+    width, height = page.rect.width, page.rect.height
+    if width > 0 and height > 0:
+        pixel_cap = 72 * math.sqrt(settings.ADAPTIVE_DPI_MAX_PIXELS / (width * height))
+        if dpi > pixel_cap:
+            reason, dpi = f"{reason}+pixel_cap", pixel_cap
+
+    dpi = int(round(dpi / DPI_STEP) * DPI_STEP)
+    dpi = min(settings.ADAPTIVE_DPI_MAX, max(settings.ADAPTIVE_DPI_MIN, dpi))
+    return PageResolution(page=page.number + 1, dpi=dpi, reason=reason)
+
+
+def page_resolutions(file_path: str, policy: Optional[str] = None) -> List[PageResolution]:
+    """
+    Render resolution of every page of a PDF
+
+    Args:
+        file_path: Source PDF
+        policy: "fixed" (DEFAULT_DPI everywhere) or "adaptive" (default:
+            DPI_POLICY)
+
+    Returns:
+        One PageResolution per page
+    """
+    import fitz
+
+    policy = (policy or settings.DPI_POLICY).lower()
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown DPI policy: {policy} (expected one of {', '.join(POLICIES)})")
+
+    with fitz.open(file_path) as doc:
+        if policy == "fixed":
+            return [
+                PageResolution(page=number, dpi=settings.DEFAULT_DPI, reason="fixed")
+                for number in range(1, len(doc) + 1)
+            ]
+        return [choose_dpi(page) for page in doc]
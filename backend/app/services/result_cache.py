@@ -0,0 +1,234 @@
+"""
+Result Cache
+Content-addressed store of finished extractions, keyed by PDF hash + options
+"""
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.models.pipeline import ExtractionResult
+from app.services.annotations import SOURCE_FILE
+
+
+RESPONSE_FILE = "response.json"
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of extraction results
+
+    Each entry is a directory holding the serialised ExtractionResult next
+    to a copy of the task's result files (markdown, annotations). A hit
+    copies those files into the new task's result directory so the markdown
+    and annotation endpoints keep working with the new task ID; the source
+    PDF is hard-linked rather than copied where possible. The copy
+    runs outside the lock, with the entry pinned so it cannot be evicted
+    or replaced meanwhile.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._pins: Dict[str, int] = {}  # key -> lookups copying the entry
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(
+        file_hash: str,
+        model: ModelType,
+        generate_annotations: bool,
+        text_fast_path: bool = False,
+    ) -> str:
+        """
+        Build the cache key for a PDF and extraction options
+
+        The current DPI_POLICY and PAGE_REUSE_ENABLED are part of the key, as
+        results produced under other settings may differ.
+        """
+        raw = f"{file_hash}:{model.value}:{int(generate_annotations)}"
+        if text_fast_path:
+            raw += ":text"
+        raw += f":dpi={settings.DPI_POLICY}"
+        if settings.PAGE_REUSE_ENABLED:
+            raw += ":reuse"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str, task_id: str) -> Optional[ExtractionResult]:
+        """
+        Look up a cached result and materialise it for a new task
+
+        Args:
+            key: Cache key from make_key
+            task_id: Task the result should be served under
+
+        Returns:
+            ExtractionResult rewritten for task_id, or None on a miss
+        """
+        entry_dir = self.root / key
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+        try:
+            cached = ExtractionResult.model_validate_json(
+                (entry_dir / RESPONSE_FILE).read_text(encoding="utf-8")
+            )
+            self._copy_files(entry_dir, Path(settings.RESULTS_DIR) / task_id)
+            os.utime(entry_dir / RESPONSE_FILE)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            with self._lock:
+                self._unpin(key)
+                self._remove(key)
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._unpin(key)
+            self._evict()  # in case the entry was skipped while pinned
+
+        update = {"task_id": task_id}
+        if cached.annotations_url:
+            update["annotations_url"] = cached.annotations_url.replace(
+                cached.task_id, task_id
+            )
+        return cached.model_copy(update=update)
+
+    def put(self, key: str, response: ExtractionResult) -> None:
+        """
+        Store a finished extraction together with its result files
+
+        Args:
+            key: Cache key from make_key
+            response: Response produced for response.task_id
+        """
+        entry_dir = self.root / key
+        staging_dir = self.root / f".{key}.{uuid.uuid4().hex}"
+
+        try:
+            self._copy_files(Path(settings.RESULTS_DIR) / response.task_id, staging_dir)
+            (staging_dir / RESPONSE_FILE).write_text(
+                response.model_dump_json(), encoding="utf-8"
+            )
+            size = self._dir_size(staging_dir)
+
+            with self._lock:
+                if key in self._pins:
+                    return  # being copied; the stored result is the same
+                if key in self._entries:
+                    self._remove(key)
+                os.replace(staging_dir, entry_dir)
+                self._entries[key] = size
+                self._total_bytes += size
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Could not cache result {key}: {str(e)}")
+        finally:
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from entries already on disk"""
+        entries = []
+        for entry_dir in self.root.iterdir():
+            response_file = entry_dir / RESPONSE_FILE
+            if entry_dir.name.startswith("."):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            elif response_file.exists():
+                entries.append((response_file.stat().st_mtime, entry_dir))
+
+        for _, entry_dir in sorted(entries):
+            size = self._dir_size(entry_dir)
+            self._entries[entry_dir.name] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under the size limit (pinned ones stay)"""
+        for key in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            self._remove(key)
+            self.evictions += 1
+
+    def _unpin(self, key: str) -> None:
+        """Release one lookup's hold on an entry"""
+        pins = self._pins.get(key, 0) - 1
+        if pins > 0:
+            self._pins[key] = pins
+        else:
+            self._pins.pop(key, None)
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry from disk and the index"""
+        self._total_bytes -= self._entries.pop(key, 0)
+        shutil.rmtree(self.root / key, ignore_errors=True)
+
+    @staticmethod
+    def _copy_files(source: Path, destination: Path) -> None:
+        """Copy result files (not the cached response) between directories, linking the source PDF"""
+        destination.mkdir(parents=True, exist_ok=True)
+        if not source.exists():
+            return
+        for path in source.rglob("*"):
+            if path.is_dir() or path.name == RESPONSE_FILE:
+                continue
+            target = destination / path.relative_to(source)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if path.name == SOURCE_FILE:
+                try:
+                    os.link(path, target)
+                    continue
+                except OSError:
+                    pass
+            shutil.copyfile(path, target)
+
+    @staticmethod
+    def _dir_size(path: Path) -> int:
+        """Total size of the files under a directory"""
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+# Shared result cache
+result_cache = ResultCache(
+    root=Path(settings.RESULTS_DIR) / "_cache",
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+)
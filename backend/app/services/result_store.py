@@ -0,0 +1,204 @@
+"""
+Result Store
+Retention for task result directories and leftover uploads
+"""
+import asyncio
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from loguru import logger
+
+from app.config import settings
+from app.utils.file_utils import cleanup_task_files
+
+
+@dataclass
+class StoredTask:
+    """A task directory with its size and last write time"""
+    path: Path
+    size: int
+    files: int
+    modified: float
+
+
+def scan_directory(root: Path) -> List[StoredTask]:
+    """
+    Measure every task directory directly under root
+
+    Internal directories (prefixed with "_" or ".", such as the result and
+    page caches, which bound their own size) are skipped.
+    """
+    tasks = []
+    if not root.exists():
+        return tasks
+
+    for entry in os.scandir(root):
+        if not entry.is_dir(follow_symlinks=False) or entry.name[0] in "_.":
+            continue
+        size = files = 0
+        modified = entry.stat().st_mtime
+        for dirpath, _, filenames in os.walk(entry.path):
+            for filename in filenames:
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except FileNotFoundError:
+                    continue
+                size += stat.st_size
+                files += 1
+                modified = max(modified, stat.st_mtime)
+        tasks.append(StoredTask(Path(entry.path), size, files, modified))
+    return tasks
+
+
+class ResultStore:
+    """
+    Enforces retention on RESULTS_DIR and UPLOAD_DIR
+
+    A periodic sweep deletes task results older than the TTL (measured from
+    their last write), then the oldest remaining ones until the total is
+    under the quota, and finally uploads left behind for longer than the
+    upload retention (e.g. by a crash mid-extraction).
+    """
+
+    def __init__(
+        self,
+        results_dir: Path,
+        upload_dir: Path,
+        ttl: int,
+        max_bytes: int,
+        upload_retention: int,
+        interval: int,
+    ):
+        self.results_dir = Path(results_dir)
+        self.upload_dir = Path(upload_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.upload_retention = upload_retention
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, float] = {
+            "tasks": 0,
+            "files": 0,
+            "size_bytes": 0,
+            "uploads": 0,
+            "upload_bytes": 0,
+            "expired": 0,
+            "evicted": 0,
+            "uploads_removed": 0,
+            "last_sweep": 0,
+        }
+
+    def release_upload(self, task_id: str) -> None:
+        """Delete a task's upload once extraction has finished with it"""
+        if settings.DELETE_UPLOADS_AFTER_EXTRACTION:
+            cleanup_task_files(task_id)
+
+    def sweep(self) -> Dict[str, float]:
+        """
+        Apply TTL, quota and upload retention once
+
+        Returns:
+            Store statistics after the sweep
+        """
+        now = time.time()
+        expired = evicted = 0
+
+        tasks = scan_directory(self.results_dir)
+        if self.ttl > 0:
+            kept = []
+            for task in tasks:
+                if now - task.modified > self.ttl:
+                    self._delete(task.path)
+                    expired += 1
+                else:
+                    kept.append(task)
+            tasks = kept
+
+        total = sum(task.size for task in tasks)
+        if self.max_bytes > 0 and total > self.max_bytes:
+            tasks.sort(key=lambda task: task.modified)
+            while tasks and total > self.max_bytes:
+                task = tasks.pop(0)
+                self._delete(task.path)
+                total -= task.size
+                evicted += 1
+
+        uploads = scan_directory(self.upload_dir)
+        uploads_removed = 0
+        if self.upload_retention > 0:
+            kept = []
+            for upload in uploads:
+                if now - upload.modified > self.upload_retention:
+                    self._delete(upload.path)
+                    uploads_removed += 1
+                else:
+                    kept.append(upload)
+            uploads = kept
+
+        if expired or evicted or uploads_removed:
+            logger.info(
+                f"Result sweep: {expired} expired, {evicted} evicted over quota, "
+                f"{uploads_removed} stale uploads removed"
+            )
+
+        with self._lock:
+            self._stats.update(
+                tasks=len(tasks),
+                files=sum(task.files for task in tasks),
+                size_bytes=total,
+                uploads=len(uploads),
+                upload_bytes=sum(upload.size for upload in uploads),
+                last_sweep=now,
+            )
+            self._stats["expired"] += expired
+            self._stats["evicted"] += evicted
+            self._stats["uploads_removed"] += uploads_removed
+            return dict(self._stats)
+
+    def stats(self) -> Dict[str, float]:
+        """Sizes and file counts as of the last sweep, plus removal counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    async def start(self) -> None:
+        """Start the background sweeper"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Result sweeper started (every {self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop the background sweeper"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """Sweep on startup and then every interval"""
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Result sweep failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def _delete(path: Path) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Shared result store
+result_store = ResultStore(
+    results_dir=Path(settings.RESULTS_DIR),
+    upload_dir=Path(settings.UPLOAD_DIR),
+    ttl=settings.RESULT_TTL_SECONDS,
+    max_bytes=settings.RESULT_STORE_MAX_BYTES,
+    upload_retention=settings.UPLOAD_RETENTION_SECONDS,
+    interval=settings.RESULT_SWEEP_INTERVAL,
+)
@@ -0,0 +1,287 @@
+"""
+Extraction Scheduler
+Weighted fair queuing of extraction work across clients and priority classes
+"""
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.config import settings
+from app.services.sharding import count_pages
+
+
+INTERACTIVE = "interactive"  # synchronous requests with a client waiting
+BULK = "bulk"  # background jobs and batch documents
+PRIORITIES = (INTERACTIVE, BULK)
+
+# Retry-After (seconds) for interactive work that timed out waiting for a slot
+RETRY_AFTER = 10
+
+
+class SchedulerBusyError(Exception):
+    """Raised when interactive work waits too long for a slot"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(eq=False)
+class Ticket:
+    """One piece of work waiting for, or holding, a scheduler slot"""
+    task_id: str
+    client: str
+    priority: str
+    cost: float
+    pool: Optional[str]
+    start_tag: float
+    finish_tag: float
+    seq: int
+    enqueued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    granted: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def waited(self) -> float:
+        """Seconds spent waiting for a slot (so far, if still waiting)"""
+        return (self.started_at or time.time()) - self.enqueued_at
+
+
+def estimate_cost(file_path: str, models: int = 1) -> float:
+    """Cost of extracting a PDF: its page count times the models run on it"""
+    try:
+        pages = count_pages(file_path)
+    except Exception:
+        pages = 1
+    return float(max(1, pages) * max(1, models))
+
+
+class FairScheduler:
+    """
+    Hands out extraction slots in weighted fair queuing order
+
+    Each ticket gets a virtual finish tag of its client's previous finish
+    tag (or the current virtual time, if later) plus cost / weight, where
+    cost is the page count and weight is the client's weight times its
+    priority class weight. Waiting tickets start in finish tag order, so a
+    client submitting many large documents advances its own tags and
+    cannot hold back a short document from anyone else, and interactive
+    requests are weighted ahead of bulk work of the same size.
+
+    At most max_concurrent tickets run at once; bulk work may not take the
+    interactive_reserved slots, so an interactive request never waits for
+    a long bulk document to finish. Pools (the job queue, batches) can
+    also cap how many of their own tickets run.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        interactive_reserved: int,
+        priority_weights: Dict[str, float],
+        client_weights: Dict[str, float],
+        queue_timeout: float,
+    ):
+        self.max_concurrent = max_concurrent
+        self.interactive_reserved = interactive_reserved
+        self.priority_weights = priority_weights
+        self.client_weights = client_weights
+        self.queue_timeout = queue_timeout
+
+        self._waiting: List[Ticket] = []
+        self._running: List[Ticket] = []
+        self._pool_limits: Dict[str, int] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._stats: Dict[str, float] = {
+            "dispatched": 0,
+            "refused": 0,
+            "wait_seconds_interactive": 0.0,
+            "wait_seconds_bulk": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the number of running tickets is bounded"""
+        return self.max_concurrent > 0
+
+    def limit_pool(self, pool: str, limit: int) -> None:
+        """Cap the tickets of one pool that may run at once"""
+        self._pool_limits[pool] = max(1, limit)
+
+    async def acquire(
+        self,
+        task_id: str,
+        client: str,
+        priority: str = INTERACTIVE,
+        cost: float = 1.0,
+        pool: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Ticket:
+        """
+        Wait for a slot; pair with release
+
+        Args:
+            task_id: Task the slot is for
+            client: Client identifier the work is shared out by
+            priority: INTERACTIVE or BULK
+            cost: Estimated cost (see estimate_cost)
+            pool: Pool whose own limit also applies
+            timeout: Seconds to wait before giving up (None: wait as long
+                as it takes, as background work does)
+
+        Returns:
+            The running ticket
+
+        Raises:
+            SchedulerBusyError: If no slot was granted within the timeout
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+
+        weight = self.priority_weights.get(priority, 1.0) * self.client_weights.get(client, 1.0)
+        start_tag = max(self._virtual_time, self._last_finish.get(client, 0.0))
+        ticket = Ticket(
+            task_id=task_id,
+            client=client,
+            priority=priority,
+            cost=cost,
+            pool=pool,
+            start_tag=start_tag,
+            finish_tag=start_tag + cost / max(weight, 1e-9),
+            seq=next(self._seq),
+            granted=asyncio.get_running_loop().create_future(),
+        )
+        self._last_finish[client] = ticket.finish_tag
+        self._waiting.append(ticket)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.granted), timeout)
+        except asyncio.TimeoutError:
+            if ticket.granted.done():
+                return ticket
+            queued = len(self._waiting)
+            self._withdraw(ticket)
+            self._stats["refused"] += 1
+            raise SchedulerBusyError(
+                f"Extraction capacity is busy ({queued} queued), try again later",
+                RETRY_AFTER,
+            )
+        except asyncio.CancelledError:
+            if ticket.granted.done():
+                self.release(ticket)
+            else:
+                self._withdraw(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """Free a ticket's slot and start the next waiting work (idempotent)"""
+        if ticket in self._running:
+            self._running.remove(ticket)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        task_id: str,
+        client: str,
+        priority: str = INTERACTIVE,
+        cost: float = 1.0,
+        pool: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Ticket]:
+        """Hold a slot for the duration of the block (see acquire)"""
+        ticket = await self.acquire(task_id, client, priority, cost, pool, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def position(self, task_id: str) -> Optional[int]:
+        """1-based place of a waiting task in the queue, or None if not waiting"""
+        for index, ticket in enumerate(self._ordered()):
+            if ticket.task_id == task_id:
+                return index + 1
+        return None
+
+    def client_tickets(self, client: str) -> List[Ticket]:
+        """A client's running tickets followed by its waiting ones in queue order"""
+        running = [t for t in self._running if t.client == client]
+        return running + [t for t in self._ordered() if t.client == client]
+
+    def stats(self) -> Dict[str, float]:
+        """Queue and slot counters"""
+        stats = dict(self._stats)
+        for priority in PRIORITIES:
+            stats[f"running_{priority}"] = sum(1 for t in self._running if t.priority == priority)
+            stats[f"queued_{priority}"] = sum(1 for t in self._waiting if t.priority == priority)
+        stats.update(
+            running=len(self._running),
+            queued=len(self._waiting),
+            clients=len({t.client for t in self._waiting + self._running}),
+            max_concurrent=self.max_concurrent,
+        )
+        return stats
+
+    def _ordered(self) -> List[Ticket]:
+        return sorted(self._waiting, key=lambda t: (t.finish_tag, t.seq))
+
+    def _can_start(self, ticket: Ticket) -> bool:
+        """Whether a waiting ticket fits in the free slots"""
+        if ticket.pool in self._pool_limits:
+            pool_running = sum(1 for t in self._running if t.pool == ticket.pool)
+            if pool_running >= self._pool_limits[ticket.pool]:
+                return False
+        if not self.enabled:
+            return True
+        limit = self.max_concurrent
+        if ticket.priority != INTERACTIVE:
+            limit = max(1, limit - self.interactive_reserved)
+        return len(self._running) < limit
+
+    def _dispatch(self) -> None:
+        """Start waiting tickets in finish tag order while slots are free"""
+        for ticket in self._ordered():
+            if not self._can_start(ticket):
+                continue
+            self._waiting.remove(ticket)
+            if ticket.granted.done():
+                continue  # cancelled while waiting
+            ticket.started_at = time.time()
+            self._running.append(ticket)
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            self._stats["dispatched"] += 1
+            self._stats[f"wait_seconds_{ticket.priority}"] += ticket.waited
+            ticket.granted.set_result(None)
+
+        # Clients with nothing in flight need no finish tag once virtual
+        # time has passed it, as they would start from virtual time anyway
+        active = {t.client for t in self._waiting + self._running}
+        for client in [c for c, tag in self._last_finish.items() if c not in active and tag <= self._virtual_time]:
+            del self._last_finish[client]
+
+    def _withdraw(self, ticket: Ticket) -> None:
+        """Drop a ticket that stopped waiting"""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+        if self._last_finish.get(ticket.client) == ticket.finish_tag:
+            self._last_finish[ticket.client] = ticket.start_tag
+        if not ticket.granted.done():
+            ticket.granted.cancel()
+        self._dispatch()
+
+
+# Shared extraction scheduler
+extraction_scheduler = FairScheduler(
+    max_concurrent=settings.SCHEDULER_MAX_CONCURRENT,
+    interactive_reserved=settings.SCHEDULER_INTERACTIVE_RESERVED,
+    priority_weights=settings.SCHEDULER_PRIORITY_WEIGHTS,
+    client_weights=settings.SCHEDULER_CLIENT_WEIGHTS,
+    queue_timeout=settings.SCHEDULER_QUEUE_TIMEOUT,
+)
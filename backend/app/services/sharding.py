@@ -0,0 +1,217 @@
+"""
+Page-range Sharding
+Splits large PDFs into page ranges and merges per-shard results back
+"""
+import asyncio
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+from app.models.schemas import ModelType
+from app.services.registry import model_registry
+
+
+@dataclass
+class Shard:
+    """A page range of a larger PDF, written to its own file"""
+    index: int
+    first_page: int  # 1-indexed, inclusive
+    last_page: int  # 1-indexed, inclusive
+    path: str
+    task_id: str
+
+    @property
+    def page_offset(self) -> int:
+        """Amount to add to shard-local page numbers"""
+        return self.first_page - 1
+
+
+def count_pages(file_path: str) -> int:
+    """Number of pages in a PDF"""
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def plan_shards(num_pages: int, shard_size: int) -> List[Tuple[int, int]]:
+    """
+    Split a page count into consecutive 1-indexed inclusive ranges
+
+    Args:
+        num_pages: Total pages in the document
+        shard_size: Maximum pages per shard
+
+    Returns:
+        List of (first_page, last_page) tuples
+    """
+    shard_size = max(1, shard_size)
+    return [
+        (start, min(start + shard_size - 1, num_pages))
+        for start in range(1, num_pages + 1, shard_size)
+    ]
+
+
+def shard_dir(file_path: str, task_id: str) -> Path:
+    """Directory holding a task's shards of a PDF"""
+    return Path(file_path).parent / "shards" / task_id
+
+
+def remove_shards(file_path: str, task_id: str) -> None:
+    """Delete a task's shards of a PDF once its extraction has finished"""
+    shutil.rmtree(shard_dir(file_path, task_id), ignore_errors=True)
+
+
+def split_pdf(
+    file_path: str,
+    ranges: List[Tuple[int, int]],
+    task_id: str,
+) -> List[Shard]:
+    """
+    Write each page range to its own PDF next to the upload
+
+    Shards go in a directory of their own per task (see shard_dir), as the
+    models of a comparison split the same upload at the same time.
+
+    Args:
+        file_path: Source PDF
+        ranges: 1-indexed inclusive page ranges
+        task_id: Parent task identifier
+
+    Returns:
+        Shards in page order
+    """
+    import fitz
+
+    directory = shard_dir(file_path, task_id)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    shards = []
+    with fitz.open(file_path) as source:
+        for index, (first_page, last_page) in enumerate(ranges):
+            shard_path = directory / f"pages_{first_page}-{last_page}.pdf"
+            with fitz.open() as shard_doc:
+                shard_doc.insert_pdf(
+                    source,
+                    from_page=first_page - 1,
+                    to_page=last_page - 1,
+                )
+                shard_doc.save(str(shard_path))
+            shards.append(
+                Shard(
+                    index=index,
+                    first_page=first_page,
+                    last_page=last_page,
+                    path=str(shard_path),
+                    task_id=f"{task_id}_p{first_page}-{last_page}",
+                )
+            )
+    return shards
+
+
+def shift_page(element: Any, offset: int) -> Any:
+    """Return a copy of an element with its page number offset"""
+    if not offset:
+        return element
+    if hasattr(element, "page"):
+        return element.model_copy(update={"page": element.page + offset})
+    return {**element, "page": element.get("page", 1) + offset}
+
+
+def element_page(element: Any) -> int:
+    """Page number of a DocumentElement or element dict"""
+    return element.get("page", 1) if isinstance(element, dict) else element.page
+
+
+def page_markdown(elements: List[Any]) -> str:
+    """Markdown of one page rebuilt from its elements' content"""
+    parts = []
+    for element in elements:
+        content = element.get("content") if isinstance(element, dict) else element.content
+        if content:
+            parts.append(content)
+    return "\n\n".join(parts)
+
+
+def merge_shard_results(
+    shards: List[Shard],
+    results: List[Dict[str, Any]],
+    task_id: str,
+) -> Dict[str, Any]:
+    """
+    Merge per-shard service results into one document result
+
+    Elements and markdown are concatenated in page order with page numbers
+    rebased onto the full document. Annotation images are moved from the
+    shard result directories into the parent task's directory.
+
+    Args:
+        shards: Shards in page order
+        results: Service results, one per shard
+        task_id: Parent task identifier
+
+    Returns:
+        Service-style result dict for the whole document
+    """
+    elements = []
+    markdown_parts = []
+    annotations_url = None
+
+    for shard, result in zip(shards, results):
+        elements.extend(
+            shift_page(element, shard.page_offset) for element in result["elements"]
+        )
+        if result["markdown_content"]:
+            markdown_parts.append(result["markdown_content"])
+        if result.get("annotations_url"):
+            annotations_url = result["annotations_url"].replace(shard.task_id, task_id)
+        _move_annotations(shard, task_id)
+
+    return {
+        "elements": elements,
+        "markdown_content": "\n\n".join(markdown_parts),
+        "annotations_url": annotations_url,
+    }
+
+
+def _move_annotations(shard: Shard, task_id: str) -> None:
+    """Move a shard's annotation images to the parent task, renumbering pages"""
+    shard_dir = Path(settings.RESULTS_DIR) / shard.task_id
+    source_dir = shard_dir / "annotations"
+    if source_dir.exists():
+        target_dir = Path(settings.RESULTS_DIR) / task_id / "annotations"
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for image in source_dir.glob("page_*.png"):
+            page = int(image.stem.split("_", 1)[1]) + shard.page_offset
+            shutil.move(str(image), target_dir / f"page_{page}.png")
+    shutil.rmtree(shard_dir, ignore_errors=True)
+
+
+def extract_shard(
+    model_value: str,
+    shard_path: str,
+    shard_task_id: str,
+    generate_annotations: bool,
+) -> Dict[str, Any]:
+    """
+    Run one shard through a model service (process pool entry point)
+
+    The service comes from the worker process's own model registry, so it
+    is loaded once and reused for later shards handled by that worker.
+    """
+    service = model_registry.get(ModelType(model_value))
+
+    result = asyncio.run(
+        service.extract(
+            file_path=shard_path,
+            task_id=shard_task_id,
+            generate_annotations=generate_annotations,
+        )
+    )
+    return {
+        "elements": list(result["elements"]),
+        "markdown_content": result["markdown_content"],
+        "annotations_url": result.get("annotations_url"),
+    }
@@ -0,0 +1,114 @@
+"""
+Result Spilling
+Writes finished pages to disk so a large document never sits in memory whole
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from app.config import settings
+from app.models.schemas import DocumentElement, ExtractionMetrics
+from app.models.pipeline import ExtractionResult
+from app.services.annotations import element_dict
+from app.services.columnar import ElementColumns
+
+
+ELEMENTS_FILE = "elements.jsonl"
+MARKDOWN_FILE = "content.md"  # also what the markdown endpoint serves
+
+# Characters of markdown read per chunk when streaming a spilled result
+CHUNK_SIZE = 65536
+
+
+def _task_dir(task_id: str) -> Path:
+    return Path(settings.RESULTS_DIR) / task_id
+
+
+class PageSpill:
+    """
+    On-disk result of one task, appended page by page
+
+    Elements go to elements.jsonl, one JSON object per line, and markdown
+    is appended to content.md with the same separators process_pdf uses.
+    Running totals stand in for the in-memory lists the metrics are
+    normally computed from.
+    """
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        result_dir = _task_dir(task_id)
+        result_dir.mkdir(parents=True, exist_ok=True)
+        self._elements = open(result_dir / ELEMENTS_FILE, "w", encoding="utf-8")
+        self._markdown = open(result_dir / MARKDOWN_FILE, "w", encoding="utf-8")
+
+        self.pages = 0  # pages with at least one element
+        self.num_elements = 0
+        self.element_counts: Dict[str, int] = {}
+        self.character_count = 0
+        self.word_count = 0
+
+    def add_page(self, elements: List[Any], markdown_content: str) -> None:
+        """Append one page's elements and markdown"""
+        for element in elements:
+            self._elements.write(json.dumps(element_dict(element)) + "\n")
+        if elements:
+            self.pages += 1
+            self.num_elements += len(elements)
+            for name, count in ElementColumns.from_elements(elements).element_counts().items():
+                self.element_counts[name] = self.element_counts.get(name, 0) + count
+
+        if markdown_content:
+            if self.character_count:
+                self._markdown.write("\n\n")
+                self.character_count += 2
+            self._markdown.write(markdown_content)
+            self.character_count += len(markdown_content)
+            self.word_count += len(markdown_content.split())
+
+    def close(self) -> None:
+        """Flush and close the spill files"""
+        self._elements.close()
+        self._markdown.close()
+
+    def metrics(self, extraction_time: float) -> ExtractionMetrics:
+        """Extraction metrics from the running totals"""
+        return ExtractionMetrics(
+            extraction_time=extraction_time,
+            num_pages=self.pages,
+            num_elements=self.num_elements,
+            element_counts=self.element_counts,
+            character_count=self.character_count,
+            word_count=self.word_count,
+        )
+
+
+def load_spilled(result: ExtractionResult) -> ExtractionResult:
+    """Copy of a spilled result with its elements and markdown read back in"""
+    result_dir = _task_dir(result.task_id)
+    with open(result_dir / ELEMENTS_FILE, encoding="utf-8") as f:
+        elements = [DocumentElement.model_validate_json(line) for line in f]
+    markdown_content = (result_dir / MARKDOWN_FILE).read_text(encoding="utf-8")
+    return result.model_copy(update={"elements": elements, "markdown_content": markdown_content})
+
+
+def stream_spilled(result: ExtractionResult) -> Iterator[bytes]:
+    """
+    JSON body of a spilled result, produced piece by piece from its files
+
+    The body matches the result's normal JSON form, with markdown_content
+    and elements read from disk as they are sent.
+    """
+    result_dir = _task_dir(result.task_id)
+    head = result.model_dump(mode="json", exclude={"elements", "markdown_content"})
+    yield json.dumps(head)[:-1].encode()
+
+    yield b', "markdown_content": "'
+    with open(result_dir / MARKDOWN_FILE, encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ""):
+            yield json.dumps(chunk)[1:-1].encode()
+
+    yield b'", "elements": ['
+    with open(result_dir / ELEMENTS_FILE, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            yield (", " if index else "").encode() + line.rstrip("\n").encode()
+    yield b"]}"
@@ -0,0 +1,202 @@
+"""
+Telemetry
+Per-stage timing spans and Prometheus-style metrics
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.models.schemas import ModelType
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store rendered in Prometheus text format
+
+    Supports labelled counters and histograms, plus gauges whose values are
+    read from callbacks at scrape time (queue depth, cache size, ...).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._gauges: Dict[str, Callable[[], Dict[LabelKey, float]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """Register HELP/TYPE metadata for a metric"""
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1.0) -> None:
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Record a histogram observation"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts followed by total count and sum
+            state = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], object],
+        label: Optional[str] = None,
+    ) -> None:
+        """
+        Register a gauge read at scrape time
+
+        Args:
+            name: Metric name
+            help_text: HELP text
+            read: Callback returning a number, or a {label value: number}
+                map when ``label`` is given
+            label: Label name for map-valued gauges
+        """
+        self.describe(name, "gauge", help_text)
+
+        def collect() -> Dict[LabelKey, float]:
+            value = read()
+            if label is not None:
+                return {((label, str(k)),): float(v) for k, v in value.items()}
+            return {(): float(value)}
+
+        self._gauges[name] = collect
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def header(name: str, default_kind: str) -> None:
+            kind, help_text = self._help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: list(state) for key, state in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        for name, series in sorted(counters.items()):
+            header(name, "counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for name, series in sorted(histograms.items()):
+            header(name, "histogram")
+            for key, state in series.items():
+                for bound, count in zip(self.buckets, state):
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {state[-2]}")
+                lines.append(f"{name}_count{_format_labels(key)} {state[-2]}")
+                lines.append(f"{name}_sum{_format_labels(key)} {state[-1]}")
+
+        for name, collect in sorted(self._gauges.items()):
+            header(name, "gauge")
+            try:
+                values = collect()
+            except Exception:
+                continue
+            for key, value in values.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Collects wall-clock durations of named processing stages
+
+    Usage:
+        timer = StageTimer()
+        with timer.stage("inference"):
+            ...
+        timer.timings  # {"inference": 1.23}
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a stage (stages entered more than once accumulate)"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def record(self, model: ModelType) -> None:
+        """Publish the collected stage timings to the stage histogram"""
+        for stage, seconds in self.timings.items():
+            metrics.observe(
+                "pdf_extraction_stage_seconds",
+                seconds,
+                {"model": model.value, "stage": stage},
+            )
+
+
+# Shared metrics registry
+metrics = MetricsRegistry()
+metrics.describe(
+    "pdf_extraction_stage_seconds",
+    "histogram",
+    "Time spent per extraction stage, by model and stage",
+)
+metrics.describe(
+    "http_request_duration_seconds",
+    "histogram",
+    "HTTP request latency by method, route and status",
+)
+metrics.describe(
+    "http_requests_total",
+    "counter",
+    "HTTP requests by method, route and status",
+)
+metrics.describe(
+    "pdf_pages_routed_total",
+    "counter",
+    "Pages extracted from the text layer or by the model, by model and route",
+)
@@ -0,0 +1,211 @@
+"""
+Text-layer Fast Path
+Classifies pages as text-native or complex and extracts easy pages with PyMuPDF
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+from app.models.schemas import DocumentElement, ElementType
+
+
+BULLET_PATTERN = re.compile(r"^\s*(?:[•‣◦⁃∙\-\*]|\(?\d{1,3}[.)])\s+")
+BOLD_FLAG = 1 << 4
+
+
+@dataclass
+class PageProfile:
+    """Text-layer statistics for one page and the routing decision"""
+    page: int  # 1-indexed
+    chars: int
+    image_coverage: float  # fraction of the page covered by images
+    drawings: int  # vector paths (rules, table borders, charts)
+    ruled_table: bool  # horizontal and vertical rules forming a table
+    garbled_ratio: float  # share of unmappable glyphs in the text layer
+    text_native: bool
+
+
+def classify_page(page: Any) -> PageProfile:
+    """
+    Score a PyMuPDF page as text-native (fast path) or scanned/complex (model)
+
+    A page qualifies when it has a real text layer of reasonable length,
+    little of it is covered by images, it has no ruled tables and few other
+    vector drawings (charts, diagrams) and its text decodes cleanly.
+    """
+    text = page.get_text("text").strip()
+    chars = len(text)
+    garbled_ratio = text.count("�") / chars if chars else 0.0
+
+    page_area = abs(page.rect) or 1.0
+    image_area = 0.0
+    for info in page.get_image_info():
+        image_area += abs(page.rect & info["bbox"])
+    image_coverage = min(1.0, image_area / page_area)
+
+    paths = page.get_drawings()
+    drawings = len(paths)
+    ruled_table = _has_ruled_grid(paths)
+
+    text_native = (
+        chars >= settings.TEXT_LAYER_MIN_CHARS
+        and image_coverage <= settings.TEXT_LAYER_MAX_IMAGE_COVERAGE
+        and drawings <= settings.TEXT_LAYER_MAX_DRAWINGS
+        and not ruled_table
+        and garbled_ratio <= settings.TEXT_LAYER_MAX_GARBLED_RATIO
+    )
+    return PageProfile(
+        page=page.number + 1,
+        chars=chars,
+        image_coverage=image_coverage,
+        drawings=drawings,
+        ruled_table=ruled_table,
+        garbled_ratio=garbled_ratio,
+        text_native=text_native,
+    )
+
+
+def _has_ruled_grid(paths: List[Dict[str, Any]], min_rules: int = 3) -> bool:
+    """Whether vector paths form a ruled table (several horizontal and vertical rules)"""
+    horizontal = vertical = 0
+    for path in paths:
+        for item in path["items"]:
+            if item[0] == "l":
+                start, end = item[1], item[2]
+                horizontal += abs(start.y - end.y) < 1 and abs(start.x - end.x) > 10
+                vertical += abs(start.x - end.x) < 1 and abs(start.y - end.y) > 10
+            elif item[0] == "re":
+                horizontal += 2
+                vertical += 2
+    return horizontal >= min_rules and vertical >= min_rules
+
+
+def classify_pages(file_path: str) -> List[PageProfile]:
+    """Classify every page of a PDF"""
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        return [classify_page(page) for page in doc]
+
+
+def _block_lines(block: Dict[str, Any]) -> List[Tuple[str, float, bool]]:
+    """(text, max font size, all bold) for each non-empty line of a block"""
+    lines = []
+    for line in block.get("lines", []):
+        spans = [span for span in line["spans"] if span["text"].strip()]
+        if not spans:
+            continue
+        text = "".join(span["text"] for span in spans).strip()
+        size = max(span["size"] for span in spans)
+        bold = all(span["flags"] & BOLD_FLAG for span in spans)
+        lines.append((text, size, bold))
+    return lines
+
+
+def _join_lines(lines: List[str]) -> str:
+    """Join wrapped lines, undoing end-of-line hyphenation"""
+    text = ""
+    for line in lines:
+        if text.endswith("-") and line[:1].islower():
+            text = text[:-1] + line
+        elif text:
+            text += " " + line
+        else:
+            text = line
+    return text
+
+
+def extract_pages(file_path: str, pages: List[int]) -> Dict[str, Any]:
+    """
+    Build elements and markdown for pages straight from the text layer
+
+    Blocks are typed from font size relative to the body text (title,
+    heading), bullet or number prefixes (list) and otherwise treated as
+    paragraphs.
+
+    Args:
+        file_path: Source PDF
+        pages: 1-indexed pages to extract
+
+    Returns:
+        Service-style result dict (elements, markdown_content), plus the
+        markdown of each page under page_markdown
+    """
+    import fitz
+
+    elements: List[DocumentElement] = []
+    page_markdown: Dict[int, List[str]] = {}
+
+    with fitz.open(file_path) as doc:
+        page_blocks = {
+            number: [
+                block for block in doc[number - 1].get_text("dict", sort=True)["blocks"]
+                if block.get("type") == 0
+            ]
+            for number in pages
+        }
+
+    # Body text is the font size carrying the most characters
+    size_chars: Dict[float, int] = {}
+    for blocks in page_blocks.values():
+        for block in blocks:
+            for text, size, _ in _block_lines(block):
+                size_chars[round(size, 1)] = size_chars.get(round(size, 1), 0) + len(text)
+    body_size = max(size_chars, key=size_chars.get) if size_chars else 10.0
+
+    for number in pages:
+        for block in page_blocks[number]:
+            lines = _block_lines(block)
+            if not lines:
+                continue
+            text = _join_lines([line[0] for line in lines])
+            size = max(line[1] for line in lines)
+            bold = all(line[2] for line in lines)
+            short = len(lines) <= 2 and len(text) <= 120
+
+            if short and size >= body_size * 1.6:
+                element_type, markdown = ElementType.TITLE, f"# {text}"
+            elif short and (size >= body_size * 1.15 or bold):
+                element_type, markdown = ElementType.HEADER, f"## {text}"
+            elif BULLET_PATTERN.match(lines[0][0]):
+                items = _list_items([line[0] for line in lines])
+                text = "\n".join(items)
+                element_type = ElementType.LIST
+                markdown = "\n".join(f"- {item}" for item in items)
+            else:
+                element_type, markdown = ElementType.TEXT, text
+
+            x0, y0, x1, y1 = block["bbox"]
+            elements.append(
+                DocumentElement(
+                    type=element_type,
+                    content=text,
+                    bbox={"x0": x0, "y0": y0, "x1": x1, "y1": y1},
+                    page=number,
+                    confidence=1.0,
+                )
+            )
+            page_markdown.setdefault(number, []).append(markdown)
+
+    per_page = {
+        number: "\n\n".join(page_markdown.get(number, [])) for number in pages
+    }
+    return {
+        "elements": elements,
+        "markdown_content": "\n\n".join(markdown for markdown in per_page.values() if markdown),
+        "page_markdown": per_page,
+        "annotations_url": None,
+    }
+
+
+def _list_items(lines: List[str]) -> List[str]:
+    """Split a list block into items, joining continuation lines"""
+    items: List[List[str]] = []
+    for line in lines:
+        if BULLET_PATTERN.match(line) or not items:
+            items.append([BULLET_PATTERN.sub("", line, count=1)])
+        else:
+            items[-1].append(line)
+    return [_join_lines(item) for item in items]
+
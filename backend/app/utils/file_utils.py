@@ -2,13 +2,31 @@
 File utilities for handling uploads and validation
 """
 from fastapi import UploadFile, HTTPException
+from dataclasses import dataclass
 from pathlib import Path
 import aiofiles
+import hashlib
 import os
+import shutil
+import zipfile
+from typing import Optional
 
 from app.config import settings
 
 
+# PDF header must appear within the first 1024 bytes
+PDF_MAGIC = b"%PDF"
+PDF_MAGIC_WINDOW = 1024
+
+
+@dataclass
+class SavedUpload:
+    """An upload written to disk"""
+    path: str
+    sha256: str
+    size: int
+
+
 async def validate_pdf(file: UploadFile) -> None:
     """
     Validate uploaded PDF file
@@ -27,42 +45,161 @@ async def validate_pdf(file: UploadFile) -> None:
     if file_ext != ".pdf":
         raise ValueError(f"Invalid file type: {file_ext}. Only PDF files are allowed.")
     
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
+    # Reject early when the client declared an oversized upload; the actual
+    # byte count is enforced while streaming to disk
+    if file.size is not None:
+        if file.size > settings.MAX_FILE_SIZE:
+            max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+            raise ValueError(f"File too large. Maximum size is {max_mb}MB")
+        
+        if file.size == 0:
+            raise ValueError("File is empty")
+
+
+class _StreamCheck:
+    """Size limit, %PDF header check and hashing applied chunk by chunk"""
     
-    if file_size > settings.MAX_FILE_SIZE:
-        max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
-        raise ValueError(f"File too large. Maximum size is {max_mb}MB")
+    def __init__(self, max_size: int, require_pdf: bool = True):
+        self.max_size = max_size
+        self.require_pdf = require_pdf
+        self.digest = hashlib.sha256()
+        self.size = 0
+    
+    def feed(self, chunk: bytes) -> None:
+        """Check and hash the next chunk, raising ValueError to abort"""
+        if self.size == 0 and self.require_pdf and PDF_MAGIC not in chunk[:PDF_MAGIC_WINDOW]:
+            raise ValueError("Invalid file content. Only PDF files are allowed.")
+        
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            max_mb = self.max_size / (1024 * 1024)
+            raise ValueError(f"File too large. Maximum size is {max_mb}MB")
+        
+        self.digest.update(chunk)
     
-    if file_size == 0:
-        raise ValueError("File is empty")
+    def finish(self, file_path: Path) -> SavedUpload:
+        """Validate the completed copy"""
+        if self.size == 0:
+            raise ValueError("File is empty")
+        return SavedUpload(path=str(file_path), sha256=self.digest.hexdigest(), size=self.size)
 
 
-async def save_upload_file(file: UploadFile, task_id: str) -> str:
+async def stream_upload_file(
+    file: UploadFile,
+    task_id: str,
+    max_size: Optional[int] = None,
+    require_pdf: bool = True,
+) -> SavedUpload:
     """
-    Save uploaded file to disk
+    Stream uploaded file to disk in fixed-size chunks
+    
+    The size limit, the %PDF header check and the content hash are all
+    handled during the copy, so at most one chunk is held in memory.
     
     Args:
         file: Uploaded file object
         task_id: Unique task identifier
+        max_size: Size limit in bytes (defaults to MAX_FILE_SIZE)
+        require_pdf: Whether to check for the %PDF header
         
     Returns:
-        Path to saved file
+        SavedUpload with path, SHA-256 and size
+        
+    Raises:
+        ValueError: If file is empty, too large or not a PDF
     """
     # Create upload directory for this task
     upload_dir = Path(settings.UPLOAD_DIR) / task_id
     upload_dir.mkdir(parents=True, exist_ok=True)
     
-    # Save file
-    file_path = upload_dir / file.filename
+    file_path = upload_dir / Path(file.filename).name
+    check = _StreamCheck(max_size or settings.MAX_FILE_SIZE, require_pdf)
     
-    async with aiofiles.open(file_path, "wb") as f:
-        content = await file.read()
-        await f.write(content)
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                check.feed(chunk)
+                await f.write(chunk)
+        
+        return check.finish(file_path)
+    except Exception:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise
+
+
+def save_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, task_id: str) -> SavedUpload:
+    """
+    Stream a PDF out of a zip archive with the same checks as an upload
     
-    return str(file_path)
+    Args:
+        archive: Open zip archive
+        info: Member to extract
+        task_id: Unique task identifier
+        
+    Returns:
+        SavedUpload with path, SHA-256 and size
+        
+    Raises:
+        ValueError: If the member is empty, too large or not a PDF
+    """
+    # The declared size is checked first; the streamed byte count is still
+    # enforced in case the archive lies about it
+    if info.file_size > settings.MAX_FILE_SIZE:
+        max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+        raise ValueError(f"File too large. Maximum size is {max_mb}MB")
+    
+    upload_dir = Path(settings.UPLOAD_DIR) / task_id
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    
+    file_path = upload_dir / Path(info.filename).name
+    check = _StreamCheck(settings.MAX_FILE_SIZE)
+    
+    try:
+        with archive.open(info) as source, open(file_path, "wb") as f:
+            for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                check.feed(chunk)
+                f.write(chunk)
+        
+        return check.finish(file_path)
+    except Exception:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise
+
+
+async def save_upload_file(file: UploadFile, task_id: str) -> str:
+    """
+    Save uploaded file to disk
+    
+    Args:
+        file: Uploaded file object
+        task_id: Unique task identifier
+        
+    Returns:
+        Path to saved file
+    """
+    upload = await stream_upload_file(file, task_id)
+    return upload.path
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 hash of a file's contents
+    
+    Args:
+        file_path: Path to file
+        chunk_size: Bytes read per iteration
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def cleanup_task_files(task_id: str) -> None:
@@ -74,12 +211,7 @@ def cleanup_task_files(task_id: str) -> None:
     """
     import shutil
     
-    # Remove upload directory
+    # Remove upload directory (results are expired by the result store)
     upload_dir = Path(settings.UPLOAD_DIR) / task_id
     if upload_dir.exists():
-        shutil.rmtree(upload_dir)
-    
-    # Optionally remove results (keep for now)
-    # results_dir = Path(settings.RESULTS_DIR) / task_id
-    # if results_dir.exists():
-    #     shutil.rmtree(results_dir)
+        shutil.rmtree(upload_dir, ignore_errors=True)
@@ -0,0 +1,70 @@
+"""
+Memory utilities for measuring process RSS
+"""
+import os
+import resource
+import sys
+import threading
+from typing import Optional
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """
+    Current resident set size of this process in bytes
+
+    Reads /proc on Linux and falls back to the peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return max_rss()
+
+
+def max_rss() -> int:
+    """Peak resident set size of this process since start, in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSSSampler:
+    """
+    Track the peak RSS over a block of code by sampling in a thread
+
+    Usage:
+        with PeakRSSSampler() as sampler:
+            ...
+        sampler.peak_bytes
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self.start_bytes = self.peak_bytes = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_rss())
+
+    @property
+    def delta_bytes(self) -> int:
+        """Peak growth over the RSS at entry"""
+        return max(0, self.peak_bytes - self.start_bytes)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss())
@@ -2,6 +2,7 @@
 Modal deployment configuration for PDF Extraction API
 Updated: Removed Surya OCR dependency temporarily
 """
+import os
 import modal
 from pathlib import Path
 
@@ -44,10 +45,17 @@ image = (
 # Create persistent volume for model caching
 volume = modal.Volume.from_name("pdf-models-cache", create_if_missing=True)
 
+# Hardware: MODAL_GPU=none deploys CPU-only containers, which run the cpu
+# execution profile (tuned threads, int8 quantized models)
+GPU = os.environ.get("MODAL_GPU", "T4")
+GPU = None if GPU.lower() in ("", "none", "cpu") else GPU
+CPU = float(os.environ["MODAL_CPU"]) if os.environ.get("MODAL_CPU") else None
+
 
 @app.function(
     image=image,
-    gpu="T4",  # Use T4 GPU for model inference
+    gpu=GPU,  # T4 GPU for model inference unless MODAL_GPU says otherwise
+    cpu=CPU,
     timeout=600,  # 10 minutes timeout
     volumes={"/cache": volume},
 )
@@ -60,21 +68,55 @@ def fastapi_app():
     return fastapi_app
 
 
-@app.function(
+@app.cls(
     image=image,
-    gpu="T4",
+    gpu=GPU,
+    cpu=CPU,
     timeout=600,
     volumes={"/cache": volume},
 )
-def process_pdf(pdf_bytes: bytes, model_name: str):
+class PDFWorker:
     """
-    Serverless function for PDF processing
+    Serverless PDF processing with models kept warm per container
     """
-    from app.services.processor import PDFProcessor
-    
-    processor = PDFProcessor()
-    result = processor.process(pdf_bytes, model_name)
-    return result
+
+    @modal.enter()
+    def load_models(self):
+        """Preload supported models once when the container starts"""
+        from app.services.processor import PDFProcessor
+        from app.services.registry import model_registry, supported_models
+
+        model_registry.preload(supported_models())
+        self.processor = PDFProcessor()
+
+    @modal.method()
+    def process_pdf(self, pdf_bytes: bytes, model_name: str) -> dict:
+        """
+        Process a PDF with the container's shared processor
+        """
+        import asyncio
+        import uuid
+        from app.config import settings
+        from app.models.schemas import ModelType
+        from app.services.result_store import result_store
+
+        task_id = str(uuid.uuid4())
+        upload_dir = Path(settings.UPLOAD_DIR) / task_id
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        file_path = upload_dir / "document.pdf"
+
+        try:
+            file_path.write_bytes(pdf_bytes)
+            result = asyncio.run(
+                self.processor.process_pdf(
+                    file_path=str(file_path),
+                    model=ModelType(model_name),
+                    task_id=task_id,
+                )
+            )
+        finally:
+            result_store.release_upload(task_id)
+        return result.model_dump(mode="json")
 
 
 if __name__ == "__main__":
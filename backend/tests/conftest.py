@@ -0,0 +1,35 @@
+"""
+Shared test setup
+Points uploads, results and the job database at a temporary directory
+before the app's modules (and their shared instances) are imported
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pytest
+
+_root = Path(tempfile.mkdtemp(prefix="pdf-extraction-tests-"))
+os.environ["UPLOAD_DIR"] = str(_root / "uploads")
+os.environ["RESULTS_DIR"] = str(_root / "results")
+os.environ["JOB_STORE_PATH"] = str(_root / "jobs.db")
+
+
+@pytest.fixture
+def make_pdf(tmp_path: Path) -> Callable[..., str]:
+    """Factory writing a PDF with one line of text per page"""
+
+    def make(pages: int = 3, name: str = "doc.pdf", texts: Optional[List[str]] = None) -> str:
+        import fitz
+
+        path = tmp_path / name
+        with fitz.open() as doc:
+            for number in range(pages):
+                page = doc.new_page()
+                text = texts[number] if texts else f"Page {number + 1}"
+                page.insert_text((72, 72), text, fontsize=11)
+            doc.save(str(path))
+        return str(path)
+
+    return make
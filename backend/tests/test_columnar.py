@@ -0,0 +1,141 @@
+"""Tests for content negotiation and the columnar element encoding"""
+import json
+
+import numpy as np
+import pytest
+
+from app.models.schemas import DocumentElement, ElementType, ExtractionMetrics, ExtractionResponse, ModelType
+from app.services.columnar import (
+    COLUMNAR_MEDIA_TYPE,
+    LAYOUT_VERSION,
+    ElementColumns,
+    encode_compact,
+    negotiate,
+)
+
+msgpack = pytest.importorskip("msgpack")
+
+
+ELEMENTS = [
+    DocumentElement(
+        type=ElementType.TITLE,
+        content="Report",
+        bbox={"x0": 10.0, "y0": 20.0, "x1": 200.0, "y1": 40.5},
+        page=1,
+        confidence=0.75,
+    ),
+    DocumentElement(type=ElementType.TEXT, content="Body", page=1),
+    DocumentElement(
+        type=ElementType.TITLE,
+        content="Appendix",
+        bbox={"x0": 10.0, "y0": 20.0, "x1": 200.0, "y1": 40.0},
+        page=3,
+    ),
+]
+
+
+def response() -> ExtractionResponse:
+    return ExtractionResponse(
+        task_id="task",
+        model=ModelType.DOCLING,
+        status="completed",
+        markdown_content="# Report",
+        elements=ELEMENTS,
+        metrics=ExtractionMetrics(
+            extraction_time=1.0,
+            num_pages=3,
+            num_elements=3,
+            element_counts={"title": 2, "text": 1},
+            character_count=8,
+            word_count=2,
+        ),
+    )
+
+
+def decode(elements):
+    """Rebuild (type, page, bbox, confidence, content) rows from a columnar dict"""
+    count = elements["count"]
+    if isinstance(elements["type"], bytes):
+        dtypes = elements["dtypes"]
+        types = np.frombuffer(elements["type"], dtype=dtypes["type"])
+        pages = np.frombuffer(elements["page"], dtype=dtypes["page"])
+        bboxes = np.frombuffer(elements["bbox"], dtype=dtypes["bbox"]).reshape(count, 4)
+        confidence = np.frombuffer(elements["confidence"], dtype=dtypes["confidence"])
+    else:
+        types, pages = elements["type"], elements["page"]
+        bboxes = np.array(elements["bbox"], dtype=float).reshape(count, 4)
+        confidence = np.array(elements["confidence"], dtype=float)
+
+    rows = []
+    for i in range(count):
+        bbox = None if np.isnan(bboxes[i]).any() else [round(float(v), 3) for v in bboxes[i]]
+        score = None if np.isnan(confidence[i]) else round(float(confidence[i]), 3)
+        rows.append((elements["strings"][types[i]], int(pages[i]), bbox, score, elements["content"][i]))
+    return rows
+
+
+EXPECTED = [
+    ("title", 1, [10.0, 20.0, 200.0, 40.5], 0.75, "Report"),
+    ("text", 1, None, None, "Body"),
+    ("title", 3, [10.0, 20.0, 200.0, 40.0], None, "Appendix"),
+]
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, None),
+        ("", None),
+        ("application/json", None),
+        ("*/*", None),
+        ("application/msgpack", "application/msgpack"),
+        ("application/x-msgpack;q=0.9", "application/x-msgpack"),
+        (COLUMNAR_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE),
+        # First acceptable type wins
+        (f"application/json, {COLUMNAR_MEDIA_TYPE}", None),
+        (f"text/html, APPLICATION/MSGPACK, {COLUMNAR_MEDIA_TYPE}", "application/msgpack"),
+        ("text/html", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_columns_share_a_type_table():
+    columns = ElementColumns.from_elements(ELEMENTS)
+    assert len(columns) == 3
+    assert columns.type_table == ["title", "text"]
+    assert columns.element_counts() == {"title": 2, "text": 1}
+    assert columns.num_pages() == 2
+
+
+def test_dicts_and_models_give_the_same_columns():
+    dicts = [element.model_dump(mode="json") for element in ELEMENTS]
+    assert ElementColumns.from_elements(dicts).to_dict() == ElementColumns.from_elements(ELEMENTS).to_dict()
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_columns_round_trip(binary):
+    encoded = ElementColumns.from_elements(ELEMENTS).to_dict(binary=binary)
+    assert encoded["layout"] == LAYOUT_VERSION
+    assert decode(encoded) == EXPECTED
+
+
+def test_json_columns_write_missing_values_as_null():
+    encoded = ElementColumns.from_elements(ELEMENTS).to_dict()
+    assert encoded["bbox"][4:8] == [None] * 4
+    assert encoded["confidence"] == [0.75, None, None]
+    json.dumps(encoded, allow_nan=False)
+
+
+@pytest.mark.parametrize("media_type", [COLUMNAR_MEDIA_TYPE, "application/msgpack"])
+def test_encode_compact_round_trip(media_type):
+    body = encode_compact(response(), media_type)
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        decoded = json.loads(body)
+    else:
+        decoded = msgpack.unpackb(body, raw=False)
+
+    assert decoded["task_id"] == "task"
+    assert decoded["metrics"]["num_elements"] == 3
+    assert decode(decoded["elements"]) == EXPECTED
@@ -0,0 +1,108 @@
+"""Tests for IoU matching and consensus voting across model results"""
+import numpy as np
+import pytest
+
+from app.models.schemas import DocumentElement, ElementType
+from app.services.columnar import ElementColumns
+from app.services.consensus import compare_elements, consensus_elements, iou, match_elements
+
+
+class Result:
+    """Stand-in for an ExtractionResponse; only elements are read"""
+
+    def __init__(self, elements):
+        self.elements = elements
+
+
+def element(x0, y0, x1, y1, page=1, type=ElementType.TEXT, content="", confidence=None):
+    return DocumentElement(
+        type=type,
+        content=content,
+        bbox={"x0": x0, "y0": y0, "x1": x1, "y1": y1},
+        page=page,
+        confidence=confidence,
+    )
+
+
+def columns(*elements):
+    return ElementColumns.from_elements(list(elements))
+
+
+def test_iou():
+    a = np.array([[0, 0, 10, 10], [0, 0, 10, 10], [0, 0, 10, 10]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=np.float32)
+    assert iou(a, b).tolist() == pytest.approx([1.0, 1 / 3, 0.0])
+    # Degenerate boxes have no area to overlap
+    assert iou(np.zeros(4), np.zeros(4)) == 0.0
+
+
+def test_matching_is_one_to_one_above_the_threshold_and_per_page():
+    a = columns(
+        element(0, 0, 100, 20),
+        element(0, 30, 100, 50),
+        element(0, 0, 100, 20, page=2),
+    )
+    b = columns(
+        element(0, 32, 100, 52),  # overlaps a[1]
+        element(2, 0, 100, 20),  # overlaps a[0] best (0.98)
+        element(0, 0, 100, 21),  # also overlaps a[0] (0.95), already taken
+        element(0, 0, 100, 20, page=3),  # same box, other page
+    )
+    matches = match_elements(a, b, threshold=0.5)
+    assert sorted((i, j) for i, j, _ in matches) == [(0, 1), (1, 0)]
+    assert all(score >= 0.5 for _, _, score in matches)
+
+    # a[1] and b[0] overlap by 18 of 22 rows
+    assert [(i, j) for i, j, _ in match_elements(a, b, threshold=0.9)] == [(0, 1)]
+
+
+def test_elements_without_a_bbox_are_not_matched():
+    a = ElementColumns.from_elements([{"type": "text", "content": "x", "page": 1}])
+    b = columns(element(0, 0, 10, 10))
+    assert match_elements(a, b, threshold=0.1) == []
+
+
+def test_consensus_needs_enough_votes():
+    cols = {
+        "docling": columns(
+            element(0, 0, 100, 20, type=ElementType.TITLE, content="Title", confidence=0.9),
+            element(0, 200, 100, 220, content="Only docling"),
+        ),
+        "mineru": columns(
+            element(0, 0, 100, 22, type=ElementType.TITLE, content="Titl", confidence=0.5),
+        ),
+        "surya": columns(
+            element(0, 1, 100, 20, type=ElementType.TEXT, content="Title"),
+        ),
+    }
+    matches = {
+        (a, b): match_elements(cols[a], cols[b], 0.5)
+        for a, b in (("docling", "mineru"), ("docling", "surya"), ("mineru", "surya"))
+    }
+
+    agreed = consensus_elements(cols, matches, min_votes=2)
+    assert len(agreed) == 1
+    title = agreed[0]
+    assert title.type == ElementType.TITLE  # two of three models
+    assert title.content == "Title"  # most confident member
+    assert title.confidence == pytest.approx(1.0)
+    assert (title.bbox.x0, title.bbox.y0, title.bbox.x1, title.bbox.y1) == (0, 0, 100, 20)
+
+    assert consensus_elements(cols, matches, min_votes=4) == []
+
+
+def test_compare_elements_reports_each_pair():
+    results = {
+        "docling": Result([element(0, 0, 100, 20), element(0, 30, 100, 50, type=ElementType.TABLE)]),
+        "surya": Result([element(0, 0, 100, 20)]),
+    }
+    report = compare_elements(results, include_consensus=True, threshold=0.5)
+
+    pair = report["pairs"]["docling_vs_surya"]
+    assert pair["matched"] == 1
+    assert pair["unmatched"] == {"reference": 1, "candidate": 0}
+    assert pair["agreement"] == pytest.approx(2 / 3)
+    assert pair["per_type"]["text"] == {"precision": 1.0, "recall": 1.0}
+    assert pair["per_type"]["table"]["recall"] == 0.0
+    assert report["consensus"]["min_votes"] == 2
+    assert report["consensus"]["num_elements"] == 1
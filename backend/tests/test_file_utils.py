@@ -0,0 +1,104 @@
+"""Tests for upload validation: size limits and the %PDF header check"""
+import asyncio
+import hashlib
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+
+from app.config import settings
+from app.utils.file_utils import PDF_MAGIC_WINDOW, save_zip_member, stream_upload_file, validate_pdf
+
+
+PDF = b"%PDF-1.7\n" + b"x" * 5000
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch) -> Path:
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    # Small chunks so the limits are hit part way through the copy
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1024)
+    return tmp_path
+
+
+def upload(data: bytes, filename: str = "doc.pdf", size=None) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename, size=size)
+
+
+def test_upload_is_saved_with_its_hash(upload_dir):
+    saved = asyncio.run(stream_upload_file(upload(PDF), "task"))
+    assert Path(saved.path) == upload_dir / "task" / "doc.pdf"
+    assert Path(saved.path).read_bytes() == PDF
+    assert saved.size == len(PDF)
+    assert saved.sha256 == hashlib.sha256(PDF).hexdigest()
+
+
+def test_header_may_follow_leading_bytes():
+    data = b"\0" * (PDF_MAGIC_WINDOW - 10) + PDF
+    assert asyncio.run(stream_upload_file(upload(data), "task")).size == len(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"PK\x03\x04" + b"x" * 5000,  # zip
+        b"\0" * PDF_MAGIC_WINDOW + PDF,  # header past the window
+    ],
+)
+def test_non_pdf_content_is_rejected(upload_dir, data):
+    with pytest.raises(ValueError, match="Only PDF files"):
+        asyncio.run(stream_upload_file(upload(data), "task"))
+    assert not (upload_dir / "task").exists()
+
+
+def test_header_check_can_be_skipped():
+    saved = asyncio.run(stream_upload_file(upload(b"PK\x03\x04" + b"x" * 100, "docs.zip"), "task", require_pdf=False))
+    assert saved.size == 104
+
+
+def test_oversized_upload_is_rejected_while_streaming(upload_dir):
+    with pytest.raises(ValueError, match="too large"):
+        asyncio.run(stream_upload_file(upload(PDF), "task", max_size=2048))
+    assert not (upload_dir / "task").exists()
+
+
+def test_empty_upload_is_rejected(upload_dir):
+    with pytest.raises(ValueError, match="empty"):
+        asyncio.run(stream_upload_file(upload(b""), "task"))
+    assert not (upload_dir / "task").exists()
+
+
+@pytest.mark.parametrize(
+    "filename, size, message",
+    [
+        ("doc.txt", 10, "Invalid file type"),
+        ("doc.pdf", settings.MAX_FILE_SIZE + 1, "too large"),
+        ("doc.pdf", 0, "empty"),
+    ],
+)
+def test_validate_pdf_checks_declared_metadata(filename, size, message):
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(validate_pdf(upload(b"", filename, size)))
+
+
+def test_validate_pdf_accepts_undeclared_size():
+    asyncio.run(validate_pdf(upload(PDF)))
+
+
+def test_zip_members_get_the_same_checks(upload_dir, monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("good.pdf", PDF)
+        archive.writestr("fake.pdf", b"not a pdf")
+        archive.writestr("big.pdf", PDF * 2)
+
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", len(PDF))
+    with zipfile.ZipFile(buffer) as archive:
+        assert save_zip_member(archive, archive.getinfo("good.pdf"), "good").size == len(PDF)
+        with pytest.raises(ValueError, match="Only PDF files"):
+            save_zip_member(archive, archive.getinfo("fake.pdf"), "fake")
+        with pytest.raises(ValueError, match="too large"):
+            save_zip_member(archive, archive.getinfo("big.pdf"), "big")
+    assert not (upload_dir / "fake").exists()
@@ -0,0 +1,156 @@
+"""Tests for the background job queue and its stores"""
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from app.models.pipeline import JobStatus
+from app.services.jobs import (
+    InMemoryJobStore,
+    Job,
+    JobQueue,
+    QueueFullError,
+    SQLiteJobStore,
+)
+
+
+class Answer(BaseModel):
+    value: int
+
+
+async def wait_finished(queue: JobQueue, task_id: str) -> Job:
+    for _ in range(200):
+        job = queue.get(task_id)
+        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {task_id} did not finish")
+
+
+def test_job_lifecycle():
+    async def scenario():
+        queue = JobQueue(InMemoryJobStore(), max_size=5, workers=1)
+        await queue.start()
+        try:
+            async def succeed():
+                return Answer(value=42)
+
+            async def fail():
+                raise RuntimeError("model crashed")
+
+            queued = queue.submit("ok", "single", succeed, {"model": "docling"})
+            assert queued.status == JobStatus.QUEUED
+            queue.submit("bad", "single", fail)
+
+            done = await wait_finished(queue, "ok")
+            assert done.status == JobStatus.COMPLETED
+            assert Answer.model_validate_json(done.result).value == 42
+            assert done.started_at <= done.finished_at
+            assert done.metadata == {"model": "docling"}
+            assert queue.get("ok").result == done.result  # results can be fetched again
+
+            failed = await wait_finished(queue, "bad")
+            assert failed.status == JobStatus.FAILED
+            assert failed.error == "model crashed"
+            assert queue.depth == 0
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_submit_refuses_when_not_running_or_full():
+    async def scenario():
+        queue = JobQueue(InMemoryJobStore(), max_size=0, workers=1)
+
+        async def runner():
+            return Answer(value=1)
+
+        with pytest.raises(QueueFullError):
+            queue.submit("early", "single", runner)
+        await queue.start()
+        try:
+            with pytest.raises(QueueFullError):
+                queue.submit("full", "single", runner)
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_jobs_dropped_before_running_are_discarded():
+    async def scenario():
+        queue = JobQueue(InMemoryJobStore(), max_size=5, workers=1)
+        await queue.start()
+        release = threading.Event()
+        discarded = []
+
+        async def block():
+            await asyncio.to_thread(release.wait, 5)
+            return Answer(value=1)
+
+        try:
+            queue.submit("running", "single", block, discard=lambda: discarded.append("running"))
+            queue.submit("waiting", "single", block, discard=lambda: discarded.append("waiting"))
+            for _ in range(200):
+                if queue.get("running").status == JobStatus.RUNNING:
+                    break
+                await asyncio.sleep(0.01)
+            assert queue.depth == 1
+        finally:
+            await queue.stop()
+            release.set()
+        # The running job's runner frees its own resources
+        assert discarded == ["waiting"]
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_expires_and_bounds_finished_jobs():
+    store = InMemoryJobStore(ttl=60, max_jobs=3)
+    store.create(Job(task_id="expired", kind="single", finished_at=time.time() - 120))
+    store.create(Job(task_id="running", kind="single", status=JobStatus.RUNNING))
+    store.create(Job(task_id="old", kind="single", finished_at=time.time() - 10))
+    assert store.get("expired") is None
+
+    store.create(Job(task_id="new", kind="single", finished_at=time.time()))
+    store.create(Job(task_id="newest", kind="single"))
+    assert store.get("old") is None  # oldest finished job made way
+    assert store.get("running") is not None
+    assert store.get("new") is not None
+
+
+def test_sqlite_store_round_trip_and_recover(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(path)
+    store.create(Job(task_id="queued", kind="single", metadata={"model": "surya"}))
+    store.create(Job(task_id="running", kind="compare"))
+    store.create(Job(task_id="done", kind="single"))
+    store.update("running", status=JobStatus.RUNNING, started_at=time.time())
+    store.update("done", status=JobStatus.COMPLETED, finished_at=time.time(), result="{}")
+
+    job = store.get("queued")
+    assert job.status == JobStatus.QUEUED and job.metadata == {"model": "surya"}
+    assert store.get("missing") is None
+
+    # A new process finds the unfinished jobs of the last one
+    reopened = SQLiteJobStore(path)
+    assert reopened.recover() == 2
+    for task_id in ("queued", "running"):
+        job = reopened.get(task_id)
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Interrupted by server restart"
+        assert job.finished_at is not None
+    done = reopened.get("done")
+    assert done.status == JobStatus.COMPLETED and done.result == "{}"
+    assert reopened.recover() == 0
+
+
+def test_sqlite_store_expires_finished_jobs(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), ttl=60)
+    store.create(Job(task_id="old", kind="single", finished_at=time.time() - 120))
+    store.create(Job(task_id="fresh", kind="single"))
+    assert store.get("old") is None
+    assert store.get("fresh") is not None
@@ -0,0 +1,151 @@
+"""Tests for automatic model selection (model=auto)"""
+import pytest
+
+from app.benchmarks import results
+from app.config import settings
+from app.models.pipeline import DocumentAnalysis
+from app.models.schemas import ModelType
+from app.services import model_selection
+from app.services.model_selection import PageFeatures, select_model
+
+
+MODELS = [ModelType.DOCLING, ModelType.MINERU, ModelType.SURYA]
+
+
+@pytest.fixture(autouse=True)
+def defaults(monkeypatch):
+    """Prior-based timings and default thresholds, whatever the environment says"""
+    monkeypatch.setattr(results, "load_report", lambda: None)
+    monkeypatch.setattr(settings, "AUTO_MODEL_QUALITY_THRESHOLD", 0.75)
+    monkeypatch.setattr(settings, "AUTO_MODEL_QUALITY", {})
+    monkeypatch.setattr(settings, "TEXT_FAST_PATH_ENABLED", True)
+
+
+def profile(monkeypatch, pages, *features, text_native=False):
+    """Make every sampled page of a pages-long document have the given features"""
+    sampled = [
+        PageFeatures(page=n + 1, text_native=text_native, features=frozenset(features), scripts={"latin": 100})
+        for n in range(pages)
+    ]
+    analysis = DocumentAnalysis(
+        pages=pages,
+        sampled_pages=pages,
+        text_native_pages=pages if text_native else 0,
+        scanned_pages=pages if "scanned" in features else 0,
+        table_pages=pages if "table" in features else 0,
+        equation_pages=pages if "equation" in features else 0,
+        non_latin_pages=pages if "non_latin" in features else 0,
+        scripts={"latin": 1.0},
+    )
+    monkeypatch.setattr(model_selection, "analyse_document", lambda file_path: (analysis, sampled))
+
+
+def test_fastest_model_that_passes_is_chosen(monkeypatch):
+    profile(monkeypatch, 10)
+    selection = select_model("doc.pdf", MODELS)
+    assert selection.model == ModelType.SURYA
+    assert [c.model for c in selection.candidates] == [ModelType.SURYA, ModelType.MINERU, ModelType.DOCLING]
+    assert selection.candidates[0].estimated_seconds == 35.0
+    assert all(c.meets_threshold for c in selection.candidates)
+
+
+@pytest.mark.parametrize(
+    "threshold, expected",
+    [
+        (0.4, ModelType.SURYA),  # table quality 0.45
+        (0.6, ModelType.MINERU),  # 0.65
+        (0.75, ModelType.DOCLING),  # 0.9
+    ],
+)
+def test_threshold_decides_how_far_down_the_speed_order_to_go(monkeypatch, threshold, expected):
+    monkeypatch.setattr(settings, "AUTO_MODEL_QUALITY_THRESHOLD", threshold)
+    profile(monkeypatch, 10, "table")
+    selection = select_model("doc.pdf", MODELS)
+    assert selection.model == expected
+    assert selection.quality_threshold == threshold
+
+
+def test_page_counts_at_its_weakest_feature(monkeypatch):
+    profile(monkeypatch, 4, "table", "equation")
+    candidates = {c.model: c for c in select_model("doc.pdf", MODELS).candidates}
+    assert candidates[ModelType.SURYA].expected_quality == 0.3
+    assert candidates[ModelType.MINERU].expected_quality == 0.65
+    assert candidates[ModelType.DOCLING].expected_quality == 0.8
+
+
+def test_best_model_is_chosen_when_none_passes(monkeypatch):
+    monkeypatch.setattr(settings, "AUTO_MODEL_QUALITY_THRESHOLD", 0.95)
+    profile(monkeypatch, 10, "equation")
+    selection = select_model("doc.pdf", MODELS)
+    assert selection.model == ModelType.MINERU
+    assert not any(c.meets_threshold for c in selection.candidates)
+    assert selection.reason.startswith("No model is expected")
+
+
+def test_quality_overrides_apply(monkeypatch):
+    monkeypatch.setattr(settings, "AUTO_MODEL_QUALITY", {"surya": {"table": 0.8}})
+    profile(monkeypatch, 10, "table")
+    assert select_model("doc.pdf", MODELS).model == ModelType.SURYA
+
+
+def test_measured_throughput_replaces_the_defaults(monkeypatch):
+    monkeypatch.setattr(results, "load_report", lambda: {"services": {"docling": {"pages": 26, "seconds_per_page": 1.0}}})
+    profile(monkeypatch, 10)
+    selection = select_model("doc.pdf", MODELS)
+    assert selection.model == ModelType.DOCLING
+    assert selection.candidates[0].measured
+
+
+def test_pipeline_figures_are_not_used_for_scoring(monkeypatch):
+    # Pipeline figures average in the cheap fast-path pages, which
+    # score_model already discounts by the share of pages the model gets
+    monkeypatch.setattr(
+        results,
+        "load_report",
+        lambda: {
+            "pipeline": {"surya": {"pages": 26, "seconds_per_page": 0.5}},
+            "services": {"surya": {"pages": 26, "seconds_per_page": 2.0}},
+        },
+    )
+    sampled = [
+        PageFeatures(page=n + 1, text_native=n % 2 == 0, features=frozenset(), scripts={"latin": 100})
+        for n in range(10)
+    ]
+    analysis = DocumentAnalysis(
+        pages=10,
+        sampled_pages=10,
+        text_native_pages=5,
+        scanned_pages=0,
+        table_pages=0,
+        equation_pages=0,
+        non_latin_pages=0,
+    )
+    monkeypatch.setattr(model_selection, "analyse_document", lambda file_path: (analysis, sampled))
+
+    candidates = {c.model: c for c in select_model("doc.pdf", MODELS).candidates}
+    assert candidates[ModelType.SURYA].seconds_per_page == 2.0
+    assert candidates[ModelType.SURYA].estimated_seconds == 10.0  # 5 model pages at 2s
+    assert candidates[ModelType.SURYA].measured
+
+
+def test_text_native_pages_cost_no_model_time(monkeypatch):
+    profile(monkeypatch, 10, "table", text_native=True)
+    selection = select_model("doc.pdf", MODELS)
+    assert all(c.expected_quality == 1.0 and c.estimated_seconds == 0 for c in selection.candidates)
+    assert selection.model == ModelType.SURYA  # ties go to the fastest per page
+    assert "fast path" in selection.reason
+
+    monkeypatch.setattr(settings, "TEXT_FAST_PATH_ENABLED", False)
+    assert select_model("doc.pdf", MODELS).model == ModelType.DOCLING
+
+
+def test_real_document_is_profiled(make_pdf):
+    analysis, pages = model_selection.analyse_document(make_pdf(pages=3))
+    assert analysis.pages == analysis.sampled_pages == 3
+    assert [page.page for page in pages] == [1, 2, 3]
+    assert analysis.table_pages == analysis.equation_pages == analysis.non_latin_pages == 0
+
+
+def test_no_models_is_an_error():
+    with pytest.raises(ValueError):
+        select_model("doc.pdf", [])
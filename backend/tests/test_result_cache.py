@@ -0,0 +1,115 @@
+"""Tests for the content-addressed result cache"""
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.models.pipeline import ExtractionResult
+from app.models.schemas import ExtractionMetrics, ModelType
+from app.services.result_cache import ResultCache
+
+
+def make_result(task_id: str, markdown: str = "# Title") -> ExtractionResult:
+    result_dir = Path(settings.RESULTS_DIR) / task_id
+    result_dir.mkdir(parents=True, exist_ok=True)
+    (result_dir / "content.md").write_text(markdown, encoding="utf-8")
+    return ExtractionResult(
+        task_id=task_id,
+        model=ModelType.DOCLING,
+        status="completed",
+        markdown_content=markdown,
+        elements=[],
+        metrics=ExtractionMetrics(
+            extraction_time=1.0,
+            num_pages=1,
+            num_elements=0,
+            element_counts={},
+            character_count=len(markdown),
+            word_count=len(markdown.split()),
+        ),
+        annotations_url=f"/api/v1/extract/annotations/{task_id}",
+    )
+
+
+@pytest.fixture
+def cache(tmp_path) -> ResultCache:
+    return ResultCache(root=tmp_path / "cache", max_bytes=10 ** 6)
+
+
+def test_hit_is_served_under_the_new_task(cache):
+    key = ResultCache.make_key("hash", ModelType.DOCLING, True)
+    assert cache.get(key, "first") is None
+    cache.put(key, make_result("original", "# Cached"))
+
+    hit = cache.get(key, "second")
+    assert hit.task_id == "second"
+    assert hit.markdown_content == "# Cached"
+    assert hit.annotations_url == "/api/v1/extract/annotations/second"
+    copied = Path(settings.RESULTS_DIR) / "second" / "content.md"
+    assert copied.read_text(encoding="utf-8") == "# Cached"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_hit_links_the_source_pdf(cache):
+    key = ResultCache.make_key("hash", ModelType.DOCLING, True)
+    result = make_result("original")
+    (Path(settings.RESULTS_DIR) / "original" / "source.pdf").write_bytes(b"%PDF-1.7")
+    cache.put(key, result)
+
+    cache.get(key, "linked")
+    source = Path(settings.RESULTS_DIR) / "linked" / "source.pdf"
+    assert source.read_bytes() == b"%PDF-1.7"
+    assert source.samefile(cache.root / key / "source.pdf")
+
+
+def test_key_covers_options_and_render_settings(monkeypatch):
+    base = ResultCache.make_key("hash", ModelType.DOCLING, True)
+    assert base == ResultCache.make_key("hash", ModelType.DOCLING, True)
+    variants = {
+        ResultCache.make_key("other", ModelType.DOCLING, True),
+        ResultCache.make_key("hash", ModelType.SURYA, True),
+        ResultCache.make_key("hash", ModelType.DOCLING, False),
+        ResultCache.make_key("hash", ModelType.DOCLING, True, text_fast_path=True),
+    }
+    monkeypatch.setattr(settings, "DPI_POLICY", "adaptive")
+    variants.add(ResultCache.make_key("hash", ModelType.DOCLING, True))
+    monkeypatch.setattr(settings, "DPI_POLICY", "fixed")
+    monkeypatch.setattr(settings, "PAGE_REUSE_ENABLED", not settings.PAGE_REUSE_ENABLED)
+    variants.add(ResultCache.make_key("hash", ModelType.DOCLING, True))
+    assert base not in variants and len(variants) == 6
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    probe = ResultCache(root=tmp_path / "probe", max_bytes=10 ** 6)
+    probe.put("probe", make_result("probe-task"))
+    entry_size = probe.stats()["size_bytes"]
+
+    cache = ResultCache(root=tmp_path / "cache", max_bytes=entry_size * 2)
+    for name in ("a", "b"):
+        cache.put(name, make_result(f"task-{name}"))
+    assert cache.get("a", "reader") is not None  # a is now the most recent
+    cache.put("c", make_result("task-c"))
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("b", "reader") is None
+    assert cache.get("a", "reader") is not None
+    assert cache.get("c", "reader") is not None
+    assert not (tmp_path / "cache" / "b").exists()
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    cache = ResultCache(root=tmp_path / "cache", max_bytes=10 ** 6)
+    cache.put("kept", make_result("task-kept"))
+
+    reopened = ResultCache(root=tmp_path / "cache", max_bytes=10 ** 6)
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get("kept", "again").task_id == "again"
+
+
+def test_unreadable_entry_counts_as_a_miss(cache):
+    cache.put("broken", make_result("task-broken"))
+    (cache.root / "broken" / "response.json").write_text("{not json", encoding="utf-8")
+
+    assert cache.get("broken", "reader") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 0
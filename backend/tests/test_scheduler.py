@@ -0,0 +1,144 @@
+"""Tests for the weighted fair queuing extraction scheduler"""
+import asyncio
+from typing import List
+
+import pytest
+
+from app.services.scheduler import (
+    BULK,
+    INTERACTIVE,
+    FairScheduler,
+    SchedulerBusyError,
+    estimate_cost,
+)
+
+
+def make_scheduler(
+    max_concurrent: int = 1,
+    interactive_reserved: int = 0,
+    **client_weights: float,
+) -> FairScheduler:
+    return FairScheduler(
+        max_concurrent=max_concurrent,
+        interactive_reserved=interactive_reserved,
+        priority_weights={INTERACTIVE: 4.0, BULK: 1.0},
+        client_weights=client_weights,
+        queue_timeout=30,
+    )
+
+
+async def start_order(scheduler: FairScheduler, requests: List[tuple]) -> List[str]:
+    """
+    Queue (task_id, client, priority, cost) requests behind a held slot,
+    then release slots one at a time and record the order they start in
+    """
+    blocker = await scheduler.acquire("blocker", "other", INTERACTIVE, 1.0)
+    started: List[str] = []
+
+    async def run(task_id: str, client: str, priority: str, cost: float) -> None:
+        ticket = await scheduler.acquire(task_id, client, priority, cost)
+        started.append(task_id)
+        await asyncio.sleep(0)
+        scheduler.release(ticket)
+
+    tasks = []
+    for request in requests:
+        tasks.append(asyncio.create_task(run(*request)))
+        await asyncio.sleep(0)  # queue in submission order
+    scheduler.release(blocker)
+    await asyncio.gather(*tasks)
+    return started
+
+
+def test_short_document_overtakes_a_clients_backlog():
+    scheduler = make_scheduler()
+    order = asyncio.run(start_order(scheduler, [
+        ("a1", "a", BULK, 20.0),
+        ("a2", "a", BULK, 20.0),
+        ("a3", "a", BULK, 20.0),
+        ("b1", "b", BULK, 2.0),
+    ]))
+    assert order.index("b1") < order.index("a2")
+    assert [t for t in order if t.startswith("a")] == ["a1", "a2", "a3"]
+
+
+def test_interactive_is_weighted_ahead_of_bulk_of_the_same_size():
+    scheduler = make_scheduler()
+    order = asyncio.run(start_order(scheduler, [
+        ("bulk", "a", BULK, 10.0),
+        ("interactive", "b", INTERACTIVE, 10.0),
+    ]))
+    assert order == ["interactive", "bulk"]
+
+
+def test_client_weights_scale_the_share():
+    scheduler = make_scheduler(heavy=4.0)
+    order = asyncio.run(start_order(scheduler, [
+        ("light1", "light", BULK, 10.0),
+        ("light2", "light", BULK, 10.0),
+        ("heavy1", "heavy", BULK, 10.0),
+        ("heavy2", "heavy", BULK, 10.0),
+    ]))
+    assert order.index("heavy2") < order.index("light2")
+
+
+def test_bulk_cannot_take_reserved_interactive_slots():
+    async def scenario():
+        scheduler = make_scheduler(max_concurrent=2, interactive_reserved=1)
+        first = await scheduler.acquire("bulk1", "a", BULK)
+        with pytest.raises(SchedulerBusyError):
+            await scheduler.acquire("bulk2", "a", BULK, timeout=0.05)
+        interactive = await scheduler.acquire("live", "b", INTERACTIVE, timeout=0.05)
+        assert scheduler.stats()["running"] == 2
+        scheduler.release(first)
+        scheduler.release(interactive)
+        assert scheduler.stats()["running"] == 0
+        assert scheduler.stats()["refused"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_pool_limit_caps_its_own_tickets():
+    async def scenario():
+        scheduler = make_scheduler(max_concurrent=4)
+        scheduler.limit_pool("jobs", 1)
+        held = await scheduler.acquire("job1", "a", BULK, pool="jobs")
+        waiting = asyncio.create_task(scheduler.acquire("job2", "a", BULK, pool="jobs"))
+        await asyncio.sleep(0)
+        assert scheduler.position("job2") == 1
+        other = await scheduler.acquire("single", "b", INTERACTIVE, timeout=0.05)
+        scheduler.release(held)
+        ticket = await waiting
+        assert ticket.task_id == "job2" and scheduler.position("job2") is None
+        scheduler.release(ticket)
+        scheduler.release(other)
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_ticket_is_withdrawn():
+    async def scenario():
+        scheduler = make_scheduler()
+        held = await scheduler.acquire("held", "a")
+        with pytest.raises(SchedulerBusyError) as error:
+            await scheduler.acquire("late", "b", timeout=0.01)
+        assert error.value.retry_after > 0
+        assert scheduler.position("late") is None
+        assert scheduler.stats()["queued"] == 0
+        scheduler.release(held)
+        scheduler.release(held)  # idempotent
+        assert scheduler.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(make_scheduler().acquire("t", "a", priority="urgent"))
+
+
+def test_estimate_cost_counts_pages_times_models(make_pdf):
+    path = make_pdf(pages=4)
+    assert estimate_cost(path) == 4.0
+    assert estimate_cost(path, models=3) == 12.0
+    assert estimate_cost("/nonexistent.pdf") == 1.0
@@ -0,0 +1,73 @@
+"""Tests for page-range sharding and merging"""
+from pathlib import Path
+
+from app.models.schemas import DocumentElement, ElementType
+from app.services import sharding
+
+
+def test_plan_shards_covers_every_page():
+    assert sharding.plan_shards(10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert sharding.plan_shards(3, 10) == [(1, 3)]
+    assert sharding.plan_shards(2, 0) == [(1, 1), (2, 2)]
+
+
+def test_split_pdf_writes_each_range_under_the_task(make_pdf):
+    path = make_pdf(pages=5)
+    shards = sharding.split_pdf(path, [(1, 2), (3, 5)], "task")
+
+    assert [(s.first_page, s.last_page, s.page_offset) for s in shards] == [(1, 2, 0), (3, 5, 2)]
+    assert [sharding.count_pages(s.path) for s in shards] == [2, 3]
+    assert [s.task_id for s in shards] == ["task_p1-2", "task_p3-5"]
+    for shard in shards:
+        assert Path(shard.path).parent == sharding.shard_dir(path, "task")
+
+    # Another task splitting the same upload gets its own files
+    other = sharding.split_pdf(path, [(1, 2)], "other")
+    assert other[0].path != shards[0].path
+
+    sharding.remove_shards(path, "task")
+    assert not sharding.shard_dir(path, "task").exists()
+    assert Path(other[0].path).exists()
+
+
+def test_merge_rebases_pages_onto_the_document(make_pdf):
+    path = make_pdf(pages=5)
+    shards = sharding.split_pdf(path, [(1, 2), (3, 5)], "task")
+    results = [
+        {
+            "elements": [
+                DocumentElement(type=ElementType.TITLE, content="Intro", page=1),
+                DocumentElement(type=ElementType.TEXT, content="Body", page=2),
+            ],
+            "markdown_content": "# Intro\n\nBody",
+            "annotations_url": None,
+        },
+        {
+            "elements": [
+                {"type": "text", "content": "Later", "page": 1},
+                {"type": "table", "content": "| a |", "page": 3},
+            ],
+            "markdown_content": "Later",
+            "annotations_url": "/api/v1/extract/annotations/task_p3-5",
+        },
+    ]
+
+    merged = sharding.merge_shard_results(shards, results, "task")
+
+    assert [sharding.element_page(e) for e in merged["elements"]] == [1, 2, 3, 5]
+    assert merged["markdown_content"] == "# Intro\n\nBody\n\nLater"
+    assert merged["annotations_url"] == "/api/v1/extract/annotations/task"
+    # Inputs are left untouched
+    assert results[1]["elements"][0]["page"] == 1
+
+
+def test_shift_page_handles_models_and_dicts():
+    element = DocumentElement(type=ElementType.TEXT, content="x", page=2)
+    assert sharding.shift_page(element, 3).page == 5
+    assert sharding.shift_page(element, 0) is element
+    assert sharding.shift_page({"content": "x"}, 2)["page"] == 3
+
+
+def test_page_markdown_joins_element_content():
+    elements = [{"content": "One", "page": 1}, {"content": "", "page": 1}, {"content": "Two", "page": 1}]
+    assert sharding.page_markdown(elements) == "One\n\nTwo"